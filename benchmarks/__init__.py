@@ -0,0 +1,9 @@
+"""
+Offline performance benchmarks
+
+Every network dependency is replaced by a local stand-in (see stubs.py) and
+inputs are synthetic (see corpus.py), so results are comparable across
+commits and machines. Run with:
+
+    python -m benchmarks.run
+"""
@@ -0,0 +1,720 @@
+"""
+Individual benchmark cases
+
+Each case takes a BenchContext and returns a flat-ish dict of metrics. Keys
+ending in _per_sec are higher-is-better; latencies (p50/p99/mean/seconds)
+are lower-is-better, which is what run.py --compare relies on.
+"""
+import os
+import pickle
+import random
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+from src.utils.config import settings
+from benchmarks import corpus
+from benchmarks.stubs import StubWeb
+
+
+@dataclass
+class BenchContext:
+    encoder: object
+    encoder_name: str
+    workdir: Path
+    items: int = 200
+    queries: int = 200
+    search_sizes: List[int] = field(default_factory=lambda: [10_000, 100_000])
+    backends: List[str] = field(default_factory=lambda: ["chroma", "flat"])
+    llm_latency: float = 0.05
+
+
+@contextmanager
+def override(**values):
+    """Temporarily replace settings attributes"""
+    saved = {name: getattr(settings, name) for name in values}
+    for name, value in values.items():
+        setattr(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+
+def latency_summary(latencies: List[float]) -> Dict:
+    if not latencies:
+        return {"count": 0}
+    ordered = sorted(latencies)
+    
+    def pct(q: float) -> float:
+        return round(ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000, 3)
+    
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50_ms": pct(0.50),
+        "p99_ms": pct(0.99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def _rate(count: int, seconds: float) -> float:
+    return round(count / seconds, 2) if seconds > 0 else 0.0
+
+
+def _embedding_manager(ctx: BenchContext, name: str, partitioning: str = "none", backend: str = "chroma"):
+    from src.models.embeddings import EmbeddingManager
+    return EmbeddingManager(persist_dir=ctx.workdir / backend, collection_name=name, model=ctx.encoder,
+                            partitioning=partitioning, backend=backend)
+
+
+def bench_collectors(ctx: BenchContext) -> Dict:
+    """Throughput and time to first item of the HN, Medium and dev.to collectors against the stub server"""
+    from src.collectors.devto_collector import DevToCollector
+    from src.collectors.hn_collector import HNCollector
+    from src.collectors.medium_collector import MediumCollector
+    
+    limit = min(ctx.items, 100)
+    results = {}
+    with StubWeb(n_items=limit) as web, override(
+        HN_API_BASE_URL=web.hn_api_url,
+        MEDIUM_FEED_URL=web.feed_url("medium"),
+        DEVTO_FEED_URL=web.feed_url("devto"),
+    ):
+        for name, collector in (("hackernews", HNCollector()), ("medium", MediumCollector()),
+                                ("devto", DevToCollector())):
+            start = time.perf_counter()
+            first = None
+            count = 0
+            for _ in collector.iter_articles(limit=limit):
+                if first is None:
+                    first = time.perf_counter() - start
+                count += 1
+            elapsed = time.perf_counter() - start
+            results[name] = {"items": count, "seconds": round(elapsed, 3),
+                             "first_item_seconds": round(first or 0.0, 3),
+                             "items_per_sec": _rate(count, elapsed)}
+    return results
+
+
+def bench_records(ctx: BenchContext) -> Dict:
+    """RecordBatch write and replay rates, file size vs pickle, and peak memory of replay vs a loaded list"""
+    from src.collectors.records import RecordBatch
+    
+    articles = corpus.articles(ctx.items, seed=3)
+    path = ctx.workdir / "records" / "articles.rec"
+    start = time.perf_counter()
+    RecordBatch.from_records(articles).write(path)
+    write_elapsed = time.perf_counter() - start
+    pickled = pickle.dumps(articles, protocol=pickle.HIGHEST_PROTOCOL)
+    del articles
+    
+    start = time.perf_counter()
+    with RecordBatch.open(path) as batch:
+        replayed = sum(1 for _ in batch)
+    replay_elapsed = time.perf_counter() - start
+    
+    tracemalloc.start()
+    with RecordBatch.open(path) as batch:
+        for _ in batch:
+            pass
+    replay_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.reset_peak()
+    loaded = pickle.loads(pickled)
+    list_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del loaded
+    
+    return {
+        "items": replayed,
+        "write_items_per_sec": _rate(replayed, write_elapsed),
+        "replay_items_per_sec": _rate(replayed, replay_elapsed),
+        "file_mb": round(path.stat().st_size / 1e6, 2),
+        "pickle_mb": round(len(pickled) / 1e6, 2),
+        "replay_peak_mb": round(replay_peak / 1e6, 2),
+        "loaded_list_peak_mb": round(list_peak / 1e6, 2),
+    }
+
+
+def bench_extract_content(ctx: BenchContext) -> Dict:
+    """fetch_page_text docs/sec over synthetic pages (local HTTP + HTML parsing), plus multi-MB pages"""
+    from src.collectors.pages import fetch_page_text
+    
+    with StubWeb(n_items=min(ctx.items, 200)) as web:
+        urls = [web.page_url(i) for i in web.ids]
+        chars = 0
+        start = time.perf_counter()
+        for url in urls:
+            chars += len(fetch_page_text(url, "bench"))
+        elapsed = time.perf_counter() - start
+    page_bytes = sum(len(page) for page in web.server.RequestHandlerClass.pages.values())
+    
+    # ~4 MB pages: time and peak memory should not grow with the page
+    with StubWeb(n_items=5, paragraphs_per_page=6000) as web:
+        large_urls = [web.page_url(i) for i in web.ids]
+        start = time.perf_counter()
+        for url in large_urls:
+            fetch_page_text(url, "bench")
+        large_elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        fetch_page_text(large_urls[0], "bench")
+        large_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        large_mb = len(web.server.RequestHandlerClass.pages[web.ids[0]]) / 1e6
+    return {
+        "docs": len(urls),
+        "seconds": round(elapsed, 3),
+        "docs_per_sec": _rate(len(urls), elapsed),
+        "input_mb_per_sec": round(page_bytes / elapsed / 1e6, 3) if elapsed else 0.0,
+        "output_chars": chars,
+        "large_page_mb": round(large_mb, 2),
+        "large_page_seconds": round(large_elapsed / len(large_urls), 4),
+        "large_page_peak_mb": round(large_peak / 1e6, 2),
+    }
+
+
+def bench_citations(ctx: BenchContext) -> Dict:
+    """Citation enrichment against the stub provider: cold bulk vs per-paper lookups, cached, and stale refresh"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from src.collectors.citations import CitationEnricher, SemanticScholarProvider, base_id
+    from src.database.models import Base
+    
+    engine = create_engine(f"sqlite:///{ctx.workdir / 'citations.db'}")
+    Base.metadata.create_all(engine)
+    sessions = sessionmaker(bind=engine)
+    ids = [f"2401.{i:05d}v1" for i in range(ctx.items)]
+    batch_path = "POST /graph/v1/paper/batch"
+    with StubWeb(n_items=1) as web:
+        provider = SemanticScholarProvider(api_url=web.citation_api_url)
+        
+        sample = ids[:50]
+        start = time.perf_counter()
+        for arxiv_id in sample:
+            provider.fetch([base_id(arxiv_id)])
+        single_elapsed = time.perf_counter() - start
+        
+        enricher = CitationEnricher(provider, session_factory=sessions)
+        before = web.requests(batch_path)
+        start = time.perf_counter()
+        enricher.lookup(ids)
+        cold_elapsed = time.perf_counter() - start
+        cold_requests = web.requests(batch_path) - before
+        
+        before = web.requests(batch_path)
+        start = time.perf_counter()
+        enricher.lookup(ids)
+        warm_elapsed = time.perf_counter() - start
+        warm_requests = web.requests(batch_path) - before
+        
+        # Everything stale: served from the table at once, refreshed behind the caller's back
+        stale = CitationEnricher(provider, session_factory=sessions, ttl_hours=0)
+        before = web.requests(batch_path)
+        start = time.perf_counter()
+        stale.lookup(ids)
+        stale_elapsed = time.perf_counter() - start
+        stale.close(timeout=60)
+        refresh_requests = web.requests(batch_path) - before
+    engine.dispose()
+    
+    return {
+        "papers": len(ids),
+        "per_paper_ids_per_sec": _rate(len(sample), single_elapsed),
+        "cold_ids_per_sec": _rate(len(ids), cold_elapsed),
+        "cold_requests": cold_requests,
+        "cached_ids_per_sec": _rate(len(ids), warm_elapsed),
+        "cached_requests": warm_requests,
+        "stale_lookup_seconds": round(stale_elapsed, 4),
+        "background_refresh_requests": refresh_requests,
+    }
+
+
+def bench_reconcile(ctx: BenchContext) -> Dict:
+    """SQLite/vector index reconciliation: per-row checks vs paged diff, then repair of missing and orphaned items"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from src.database.models import Article, Base
+    from src.models.reconcile import Reconciler
+    
+    engine = create_engine(f"sqlite:///{ctx.workdir / 'reconcile.db'}")
+    Base.metadata.create_all(engine)
+    sessions = sessionmaker(bind=engine)
+    em = _embedding_manager(ctx, "bench_reconcile")
+    articles = corpus.articles(ctx.items, seed=6)
+    db = sessions()
+    rows = [Article(source=a.source, source_id=a.source_id, title=a.title, url=a.url, content=a.content,
+                    published_date=a.published_date) for a in articles]
+    db.add_all(rows)
+    db.commit()
+    # Every tenth row never made it into the index, and 5% of the vectors lost their row
+    indexed = [row for i, row in enumerate(rows) if i % 10]
+    em.add_items("article", [str(row.id) for row in indexed], [row.title for row in indexed],
+                 [{} for _ in indexed], [row.published_date for row in indexed])
+    orphans = max(ctx.items // 20, 1)
+    em.add_items("article", [str(10 ** 9 + i) for i in range(orphans)], ["orphan"] * orphans,
+                 [{} for _ in range(orphans)], [datetime.now()] * orphans)
+    
+    sample = rows[:200]
+    start = time.perf_counter()
+    for row in sample:
+        for collection in em.type_collections("article"):
+            if collection.get(ids=[f"article_{row.id}"], include=[])["ids"]:
+                break
+    per_row_elapsed = time.perf_counter() - start
+    db.close()
+    
+    start = time.perf_counter()
+    check = Reconciler(em, sessions, dry_run=True).run()
+    check_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    repair = Reconciler(em, sessions).run()
+    repair_elapsed = time.perf_counter() - start
+    engine.dispose()
+    
+    return {
+        "rows": len(rows),
+        "per_row_check_rows_per_sec": _rate(len(sample), per_row_elapsed),
+        "paged_check_rows_per_sec": _rate(len(rows), check_elapsed),
+        "missing_vectors": check["article"]["missing_vectors"],
+        "orphaned_vectors": check["orphaned_vectors"],
+        "repair_seconds": round(repair_elapsed, 3),
+        "repaired": repair["article"]["missing_vectors"] + repair["orphaned_vectors"],
+    }
+
+
+def bench_indexing(ctx: BenchContext) -> Dict:
+    """EmbeddingManager.add_article items/sec (encode + upsert), plus batched encoding alone"""
+    em = _embedding_manager(ctx, "bench_indexing")
+    articles = corpus.articles(ctx.items, seed=1)
+    
+    start = time.perf_counter()
+    for i, article in enumerate(articles):
+        em.add_article(str(i), article.title, article.content, {"source": article.source})
+    add_elapsed = time.perf_counter() - start
+    
+    texts = [f"{a.title}\n\n{a.content[:1000]}" for a in articles]
+    start = time.perf_counter()
+    em.generate_embeddings(texts, show_progress_bar=False)
+    encode_elapsed = time.perf_counter() - start
+    
+    return {
+        "items": len(articles),
+        "add_article_items_per_sec": _rate(len(articles), add_elapsed),
+        "batch_encode_items_per_sec": _rate(len(texts), encode_elapsed),
+    }
+
+
+def bench_backfill(ctx: BenchContext) -> Dict:
+    """Historical backfill storage: add_paper one at a time vs sharded jobs with batched encoding and writes"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from src.collectors.records import PaperData
+    from src.database.models import Base
+    from src.ingest.backfill import BackfillJob
+    
+    engine = create_engine(f"sqlite:///{ctx.workdir / 'backfill.db'}")
+    Base.metadata.create_all(engine)
+    sessions = sessionmaker(bind=engine)
+    rng = random.Random(7)
+    since = datetime(2024, 1, 1)
+    days = 28
+    per_day = max(ctx.items // days, 1)
+    
+    def fetch(start, end, before_request):
+        # Stands in for the arXiv API: one page per shard, paced like the real collector
+        before_request()
+        papers = []
+        for day in range((end - start).days):
+            date = start + timedelta(days=day)
+            for i in range(per_day):
+                papers.append(PaperData(
+                    arxiv_id=f"{date:%y%m}.{date.day:02d}{i:03d}v1", title=corpus.words(rng, 10),
+                    authors=["A. Author", "B. Author"], abstract=corpus.words(rng, 150), categories=["cs.LG"],
+                    published_date=date, arxiv_url="", pdf_url="", citation_count=0))
+        return papers
+    
+    sample = fetch(since, since + timedelta(days=1), lambda: None)
+    single = _embedding_manager(ctx, "bench_backfill_single")
+    start = time.perf_counter()
+    for paper in sample:
+        single.add_paper(paper.arxiv_id, paper.title, paper.abstract, {"title": paper.title},
+                         published_date=paper.published_date)
+    single_elapsed = time.perf_counter() - start
+    
+    with override(BACKFILL_DIR=ctx.workdir / "backfill", ARXIV_REQUEST_INTERVAL=0.0):
+        job = BackfillJob(since, since + timedelta(days=days), shard_days=7,
+                          embedding_manager=_embedding_manager(ctx, "bench_backfill"),
+                          session_factory=sessions, fetch=fetch)
+        report = job.run()
+        resumed = BackfillJob(since, since + timedelta(days=days), shard_days=7,
+                              embedding_manager=job.embedding_manager, session_factory=sessions, fetch=fetch)
+        start = time.perf_counter()
+        resumed.run()
+        resume_elapsed = time.perf_counter() - start
+    engine.dispose()
+    
+    return {
+        "papers": report["stored"],
+        "shards": report["shards"],
+        # The hashing encoder has no multi-process pool and encodes in-process
+        "encoder_processes": (job.processes or os.cpu_count()) if hasattr(ctx.encoder, "start_multi_process_pool") else 1,
+        "add_paper_papers_per_sec": _rate(len(sample), single_elapsed),
+        "backfill_papers_per_sec": report["stored_per_sec"],
+        "completed_rerun_seconds": round(resume_elapsed, 4),
+    }
+
+
+def bench_fulltext(ctx: BenchContext) -> Dict:
+    """PDF download + extraction + chunked embedding against the stub server, cold and from cache"""
+    from src.collectors.arxiv_collector import PaperData
+    from src.ingest.pdf import FullTextIngestor, PdfDownloader
+    
+    n = min(ctx.items, 50)
+    cache_dir = ctx.workdir / "pdf_cache"
+    with StubWeb(n_items=n, pdf_pages=10) as web:
+        papers = [
+            PaperData(arxiv_id=f"bench.{i}", title=f"Paper {i}", authors=[], abstract="", categories=[],
+                      published_date=datetime.now(), arxiv_url=web.page_url(i), pdf_url=web.pdf_url(i))
+            for i in web.ids
+        ]
+        results = {"papers": n}
+        for phase in ("cold", "cached"):
+            # Fresh collection per phase, so "cached" differs only in skipping the downloads
+            em = _embedding_manager(ctx, f"bench_fulltext_{phase}")
+            with FullTextIngestor(em, downloader=PdfDownloader(cache_dir=cache_dir)) as ingestor:
+                start = time.perf_counter()
+                stats = ingestor.ingest(papers)
+                elapsed = time.perf_counter() - start
+            results[phase] = {
+                "papers_per_sec": _rate(stats.get("ingested", 0), elapsed),
+                "chunks_per_sec": _rate(stats.get("chunks", 0), elapsed),
+                "failed": n - stats.get("ingested", 0),
+            }
+    results["cache_mb"] = round(sum(p.stat().st_size for p in cache_dir.glob("*.pdf")) / 1e6, 3)
+    return results
+
+
+def bench_search(ctx: BenchContext) -> Dict:
+    """EmbeddingManager.search latency over a single collection of random vectors, per backend"""
+    return {backend: _search_backend(ctx, backend) for backend in ctx.backends}
+
+
+def _search_backend(ctx: BenchContext, backend: str) -> Dict:
+    dim = len(ctx.encoder.encode("probe"))
+    questions = [corpus.words(random.Random(i), 6) for i in range(ctx.queries)]
+    results = {}
+    for size in ctx.search_sizes:
+        name = f"bench_search_{size}"
+        em = _embedding_manager(ctx, name, backend=backend)
+        batch_size = em.client.get_max_batch_size()
+        vectors = corpus.unit_vectors(size, dim, seed=size)
+        start = time.perf_counter()
+        for lo in range(0, size, batch_size):
+            hi = min(lo + batch_size, size)
+            em.collection.add(
+                ids=[f"vec_{i}" for i in range(lo, hi)],
+                embeddings=vectors[lo:hi],
+                documents=[f"document {i}" for i in range(lo, hi)],
+                metadatas=[{"type": "paper" if i % 2 else "article"} for i in range(lo, hi)],
+            )
+        build_elapsed = time.perf_counter() - start
+        
+        latencies = []
+        for question in questions:
+            start = time.perf_counter()
+            em.search(question, n_results=10)
+            latencies.append(time.perf_counter() - start)
+        filtered = []
+        for question in questions[: max(1, len(questions) // 4)]:
+            start = time.perf_counter()
+            em.search(question, n_results=10, filter_type="paper")
+            filtered.append(time.perf_counter() - start)
+        
+        # Cost of opening the store in a fresh process (e.g. a new API worker) up to its first answer
+        start = time.perf_counter()
+        reopened = _embedding_manager(ctx, name, backend=backend)
+        reopened.search(questions[0], n_results=10)
+        reopen_elapsed = time.perf_counter() - start
+        
+        results[str(size)] = {
+            "build_items_per_sec": _rate(size, build_elapsed),
+            "open_and_first_query_ms": round(reopen_elapsed * 1000, 3),
+            "search": latency_summary(latencies),
+            "search_filtered": latency_summary(filtered),
+        }
+        em.client.delete_collection(name)
+    return results
+
+
+def bench_search_partitioned(ctx: BenchContext) -> Dict:
+    """Search latency with vectors spread over 12 monthly article partitions"""
+    dim = len(ctx.encoder.encode("probe"))
+    questions = [corpus.words(random.Random(i), 6) for i in range(ctx.queries)]
+    now = datetime.now()
+    months = [now - timedelta(days=30 * m) for m in range(12)]
+    results = {}
+    for size in ctx.search_sizes:
+        name = f"bench_partitioned_{size}"
+        em = _embedding_manager(ctx, name, partitioning="monthly")
+        batch_size = em.client.get_max_batch_size()
+        vectors = corpus.unit_vectors(size, dim, seed=size)
+        per_month = -(-size // len(months))
+        start = time.perf_counter()
+        for m, month in enumerate(months):
+            collection = em._partition("article", month)
+            for lo in range(m * per_month, min((m + 1) * per_month, size), batch_size):
+                hi = min(lo + batch_size, (m + 1) * per_month, size)
+                collection.add(
+                    ids=[f"vec_{i}" for i in range(lo, hi)],
+                    embeddings=vectors[lo:hi],
+                    documents=[f"document {i}" for i in range(lo, hi)],
+                    metadatas=[{"type": "article", "published_ts": int(month.timestamp())}] * (hi - lo),
+                )
+        build_elapsed = time.perf_counter() - start
+        
+        def timed_search(**kwargs) -> List[float]:
+            latencies = []
+            for question in questions:
+                t0 = time.perf_counter()
+                em.search(question, n_results=10, **kwargs)
+                latencies.append(time.perf_counter() - t0)
+            return latencies
+        
+        results[str(size)] = {
+            "partitions": len(em.partitions()),
+            "build_items_per_sec": _rate(size, build_elapsed),
+            "search_all_partitions": latency_summary(timed_search()),
+            "search_last_30_days": latency_summary(timed_search(since=now - timedelta(days=30))),
+        }
+        for item_type, month in em.partitions():
+            em.client.delete_collection(f"{name}-{item_type}-{month}")
+    return results
+
+
+def bench_quantization(ctx: BenchContext) -> Dict:
+    """Flat backend query latency and recall@10 per storage format, against exact float32 results"""
+    import numpy as np
+    from src.models.flat_index import QUANTIZATIONS, FlatClient
+    dim = len(ctx.encoder.encode("probe"))
+    queries = corpus.unit_vectors(ctx.queries, dim, seed=1)
+    results = {}
+    for size in ctx.search_sizes:
+        vectors = corpus.unit_vectors(size, dim, seed=size)
+        exact = None
+        per_format = {}
+        for quantization in ("none", "float16", "int8"):
+            client = FlatClient(ctx.workdir / "quantization", quantization=quantization)
+            name = f"bench_quantization_{size}_{quantization}"
+            collection = client.get_or_create_collection(name)
+            batch_size = client.get_max_batch_size()
+            for lo in range(0, size, batch_size):
+                hi = min(lo + batch_size, size)
+                collection.add(ids=[f"vec_{i}" for i in range(lo, hi)], embeddings=vectors[lo:hi],
+                               documents=[""] * (hi - lo), metadatas=[{"type": "article"}] * (hi - lo))
+            
+            latencies, found = [], []
+            for query in queries:
+                start = time.perf_counter()
+                response = collection.query(query_embeddings=[query], n_results=10, include=[])
+                latencies.append(time.perf_counter() - start)
+                found.append(set(response["ids"][0]))
+            if exact is None:
+                exact = found
+            code_bytes = 4 if quantization == "none" else np.dtype(QUANTIZATIONS[quantization][1]).itemsize
+            per_format[quantization] = {
+                "recall_at_10": round(float(np.mean([len(a & b) / 10 for a, b in zip(found, exact)])), 4),
+                "scanned_bytes_per_vector": dim * code_bytes,
+                "search": latency_summary(latencies),
+            }
+            client.delete_collection(name)
+        results[str(size)] = per_format
+    return results
+
+
+def bench_rank(ctx: BenchContext) -> Dict:
+    """FeatureExtractor + Recommender.rank_items with precomputed embeddings"""
+    from src.models.feature_extractor import FeatureExtractor
+    from src.models.recommender import Recommender
+    
+    n = max(ctx.items, 1000)
+    articles = corpus.articles(n, seed=2)
+    vectors = corpus.unit_vectors(n, seed=2)
+    interests = corpus.unit_vectors(1, seed=3)[0]
+    with override(MODELS_DIR=ctx.workdir / "models"):
+        settings.MODELS_DIR.mkdir(parents=True, exist_ok=True)
+        recommender = Recommender()
+    
+    start = time.perf_counter()
+    features = [
+        FeatureExtractor.extract_article_features(a, None, [], item_embedding=v, interests_embedding=interests)
+        for a, v in zip(articles, vectors)
+    ]
+    feature_elapsed = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    recommender.rank_items(articles, features)
+    rank_elapsed = time.perf_counter() - start
+    
+    # Per-user ranking: one similarity product, then batched predicts over (user, item) rows
+    users = 100
+    profiles = corpus.unit_vectors(users, seed=4)
+    start = time.perf_counter()
+    similarity = FeatureExtractor.similarity_matrix(vectors, profiles)
+    recommender.rank_items_for_users(articles, features, similarity)
+    users_elapsed = time.perf_counter() - start
+    
+    return {
+        "items": n,
+        "features_items_per_sec": _rate(n, feature_elapsed),
+        "rank_items_per_sec": _rate(n, rank_elapsed),
+        "total_items_per_sec": _rate(n, feature_elapsed + rank_elapsed),
+        "users": users,
+        "rank_user_items_per_sec": _rate(n * users, users_elapsed),
+    }
+
+
+def bench_feature_store(ctx: BenchContext) -> Dict:
+    """Re-ranking features for stored articles: recomputed (encoding included) vs bulk-loaded from the store"""
+    import numpy as np
+    from src.models.feature_extractor import FeatureExtractor
+    from src.models.feature_store import FeatureStore
+    
+    em = _embedding_manager(ctx, "bench_features")
+    articles = corpus.articles(ctx.items, seed=5)
+    interests = settings.USER_INTERESTS
+    n_profiles = 8
+    
+    start = time.perf_counter()
+    features = [FeatureExtractor.extract_article_features(a, em, interests) for a in articles]
+    recompute_elapsed = time.perf_counter() - start
+    
+    store = FeatureStore(ctx.workdir / "features", "bench")
+    similarity = np.random.default_rng(0).random((len(articles), n_profiles), dtype=np.float32)
+    keys = [a.url for a in articles]
+    start = time.perf_counter()
+    store.write("article", keys, features, [a.published_date for a in articles], similarity, list(range(n_profiles)))
+    write_elapsed = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    cold = store.load("article", 0, keys=keys)
+    cold_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    for profile_id in range(n_profiles):
+        store.load("article", profile_id, keys=keys)
+    warm_elapsed = (time.perf_counter() - start) / n_profiles
+    
+    return {
+        "items": len(cold),
+        "recompute_items_per_sec": _rate(len(articles), recompute_elapsed),
+        "write_items_per_sec": _rate(len(articles), write_elapsed),
+        "load_cold_items_per_sec": _rate(len(cold), cold_elapsed),
+        "load_items_per_sec": _rate(len(cold), warm_elapsed),
+    }
+
+
+def bench_retriever_cache(ctx: BenchContext) -> Dict:
+    """Retriever latency with and without its caches over a skewed query mix, plus hit rates"""
+    from src.rag.retriever import Retriever
+    
+    em = _embedding_manager(ctx, "bench_retriever_cache")
+    articles = corpus.articles(min(ctx.items, 500), seed=6)
+    for i, article in enumerate(articles):
+        em.add_article(str(i), article.title, article.content, {"source": article.source, "title": article.title})
+    
+    # A few popular questions asked often, a long tail asked rarely
+    rng = random.Random(6)
+    unique = [f"What is new in {a.title.lower()}?" for a in corpus.articles(max(ctx.queries, 10), seed=7)]
+    weights = [1 / (rank + 1) for rank in range(len(unique))]
+    queries = rng.choices(unique, weights=weights, k=len(unique) * 4)
+    
+    results = {}
+    for name, retriever in (("uncached", Retriever(em, embedding_cache_size=0, result_cache_size=0)),
+                            ("cached", Retriever(em))):
+        latencies = []
+        for i, query in enumerate(queries):
+            if i == len(queries) // 2:
+                # A write mid-run invalidates every cached result
+                em.add_article("new", "Fresh article", articles[0].content, {"source": "bench"})
+            start = time.perf_counter()
+            retriever.retrieve(query, n_results=5)
+            latencies.append(time.perf_counter() - start)
+        results[name] = latency_summary(latencies)
+        if name == "cached":
+            results["cache"] = retriever.cache_stats()
+    results["queries"] = len(queries)
+    results["unique_queries"] = len(set(queries))
+    return results
+
+
+def bench_qa(ctx: BenchContext) -> Dict:
+    """End-to-end retrieve + generate latency against the mock OpenAI-compatible server"""
+    from src.api import mock_llm
+    from src.rag.generator import Generator
+    from src.rag.retriever import Retriever
+    
+    em = _embedding_manager(ctx, "bench_qa")
+    for i, article in enumerate(corpus.articles(min(ctx.items, 500), seed=4)):
+        em.add_article(str(i), article.title, article.content, {"source": article.source, "title": article.title})
+    # Uncached, so the second pass over the questions measures the same path
+    retriever = Retriever(em, embedding_cache_size=0, result_cache_size=0)
+    questions = [f"What is new in {a.title.lower()}?" for a in corpus.articles(min(ctx.queries, 50), seed=5)]
+    
+    server = mock_llm.start_in_background(first_token_latency=ctx.llm_latency, token_latency=0.0)
+    try:
+        with override(OPENAI_API_KEY="benchmark", OPENAI_BASE_URL=f"http://127.0.0.1:{server.server_port}/v1"):
+            generator = Generator()
+        
+        retrieve, total, first_token = [], [], []
+        for question in questions:
+            start = time.perf_counter()
+            context = retriever.retrieve(question, n_results=5)
+            retrieved = time.perf_counter()
+            generator.generate_answer(question, context)
+            retrieve.append(retrieved - start)
+            total.append(time.perf_counter() - start)
+        for question in questions:
+            start = time.perf_counter()
+            context = retriever.retrieve(question, n_results=5)
+            stream = generator.stream_answer(question, context)
+            next(stream)
+            first_token.append(time.perf_counter() - start)
+            for _ in stream:
+                pass
+    finally:
+        server.shutdown()
+        server.server_close()
+    
+    return {
+        "mock_first_token_latency_ms": ctx.llm_latency * 1000,
+        "retrieve": latency_summary(retrieve),
+        "answer_total": latency_summary(total),
+        "stream_time_to_first_token": latency_summary(first_token),
+    }
+
+
+CASES = {
+    "collectors": bench_collectors,
+    "records": bench_records,
+    "extract_content": bench_extract_content,
+    "citations": bench_citations,
+    "indexing": bench_indexing,
+    "fulltext": bench_fulltext,
+    "search": bench_search,
+    "search_partitioned": bench_search_partitioned,
+    "quantization": bench_quantization,
+    "rank": bench_rank,
+    "feature_store": bench_feature_store,
+    "reconcile": bench_reconcile,
+    "backfill": bench_backfill,
+    "retriever_cache": bench_retriever_cache,
+    "qa": bench_qa,
+}
+
+
+def new_workdir() -> tempfile.TemporaryDirectory:
+    return tempfile.TemporaryDirectory(prefix="bench_", ignore_cleanup_errors=True)
@@ -0,0 +1,139 @@
+"""
+Synthetic corpora and an offline encoder for benchmarks
+"""
+import random
+import textwrap
+import zlib
+from datetime import datetime, timedelta
+from typing import List, Union
+import numpy as np
+from src.collectors.records import ArticleData
+
+VOCABULARY = (
+    "model training data learning neural network transformer attention layer gradient "
+    "optimizer loss embedding vector retrieval search index query latency throughput "
+    "benchmark evaluation dataset label feature inference batch token sequence context "
+    "language vision image diffusion reinforcement policy reward agent graph node edge "
+    "kernel memory cache compute parallel distributed scale cluster pipeline stream"
+).split()
+
+EMBEDDING_DIM = 384  # all-MiniLM-L6-v2
+
+
+def words(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(VOCABULARY) for _ in range(n))
+
+
+def paragraphs(rng: random.Random, n: int, words_per_paragraph: int = 80) -> List[str]:
+    return [words(rng, words_per_paragraph).capitalize() + "." for _ in range(n)]
+
+
+def html_page(rng: random.Random, title: str, n_paragraphs: int = 20) -> str:
+    """A blog-like HTML page with scripts, styles and navigation noise"""
+    body = "\n".join(f"<p>{p}</p>" for p in paragraphs(rng, n_paragraphs))
+    return (
+        f"<html><head><title>{title}</title>"
+        "<style>body { font-family: sans-serif; }</style>"
+        "<script>window.analytics = { track: function () {} };</script></head>"
+        f"<body><nav><a href='/'>Home</a>  <a href='/about'>About</a></nav>"
+        f"<article><h1>{title}</h1>\n{body}\n</article>"
+        "<footer>Copyright</footer></body></html>"
+    )
+
+
+def pdf_document(rng: random.Random, title: str, n_pages: int = 5, paragraphs_per_page: int = 4) -> bytes:
+    """A minimal multi-page PDF with a text layer (Helvetica, one content stream per page)"""
+    objects = {1: b"<< /Type /Catalog /Pages 2 0 R >>", 3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    kids = []
+    for page in range(n_pages):
+        lines = [title] if page == 0 else []
+        for paragraph in paragraphs(rng, paragraphs_per_page):
+            lines.extend(textwrap.wrap(paragraph, 90) + [""])
+        text = " ".join(f"({line}) '" for line in lines)
+        stream = f"BT /F1 10 Tf 12 TL 50 760 Td {text} ET".encode()
+        page_id, content_id = 4 + 2 * page, 5 + 2 * page
+        objects[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        objects[page_id] = (b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+        kids.append(b"%d 0 R" % page_id)
+    objects[2] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), n_pages)
+    
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(out)
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, objects[number])
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offsets[number] for number in sorted(objects))
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def articles(n: int, seed: int = 0) -> List[ArticleData]:
+    rng = random.Random(seed)
+    now = datetime.now()
+    return [
+        ArticleData(
+            source=rng.choice(["hackernews", "devto", "medium"]),
+            source_id=str(i),
+            title=words(rng, 8).capitalize(),
+            url=f"https://example.com/{i}",
+            content=" ".join(paragraphs(rng, 5)),
+            author=f"author{i % 50}",
+            published_date=now - timedelta(days=rng.randint(0, 30)),
+            upvotes=rng.randint(0, 800),
+        )
+        for i in range(n)
+    ]
+
+
+def unit_vectors(n: int, dim: int = EMBEDDING_DIM, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+class HashingEncoder:
+    """
+    Deterministic bag-of-words encoder with SentenceTransformer's encode() signature
+    
+    Used when the real model is not available offline. It exercises every code
+    path around the encoder, but its timings say nothing about model inference.
+    """
+    
+    name = "hashing"
+    
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+    
+    def _encode_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in text.lower().split():
+            h = zlib.crc32(word.encode())
+            vector[h % self.dim] += 1.0 if h & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def encode(self, texts: Union[str, List[str]], show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        if isinstance(texts, str):
+            return self._encode_one(texts)
+        return np.stack([self._encode_one(t) for t in texts]) if texts else np.zeros((0, self.dim), np.float32)
+
+
+def load_encoder(kind: str = "auto"):
+    """
+    Return (encoder, name)
+    
+    "model" requires the sentence-transformers model in the local cache,
+    "hashing" always uses HashingEncoder and "auto" tries the model first.
+    """
+    if kind in ("auto", "model"):
+        try:
+            from sentence_transformers import SentenceTransformer
+            from src.utils.config import settings
+            return SentenceTransformer(settings.EMBEDDING_MODEL, local_files_only=True), settings.EMBEDDING_MODEL
+        except Exception:
+            if kind == "model":
+                raise
+    return HashingEncoder(), HashingEncoder.name
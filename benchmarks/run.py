@@ -0,0 +1,177 @@
+"""
+Run the offline benchmark suite and compare saved results
+
+Examples:
+    python -m benchmarks.run                                  # all cases, 10k/100k vectors
+    python -m benchmarks.run --cases search --search-sizes 10000,100000,1000000
+    python -m benchmarks.run --compare benchmarks/results/A.json benchmarks/results/B.json
+
+Results are written to benchmarks/results/<timestamp>_<commit>.json.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import traceback
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+# Never reach out to the Hugging Face hub; use the cached model or fall back
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+from benchmarks import cases, corpus  # noqa: E402
+import logging  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+RESULTS_DIR = Path(__file__).parent / "results"
+# Cases whose numbers mostly reflect the encoder; flagged when the stand-in is used
+ENCODER_BOUND = {"indexing"}
+
+
+def _git(*args) -> str:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, timeout=10,
+                              cwd=Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def environment(encoder_name: str) -> Dict:
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git("rev-parse", "--short", "HEAD") or "unknown",
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "encoder": encoder_name,
+    }
+
+
+def run(case_names, ctx: cases.BenchContext) -> Dict:
+    results = {}
+    for name in case_names:
+        logger.info(f"Running benchmark: {name}")
+        start = time.perf_counter()
+        try:
+            result = cases.CASES[name](ctx)
+            result["wall_seconds"] = round(time.perf_counter() - start, 3)
+            if name in ENCODER_BOUND and ctx.encoder_name == corpus.HashingEncoder.name:
+                result["note"] = "offline stand-in encoder; not representative of model inference"
+        except Exception as e:
+            logger.error(f"Benchmark {name} failed: {e}")
+            result = {"error": f"{type(e).__name__}: {e}", "traceback": traceback.format_exc()}
+        results[name] = result
+    return results
+
+
+def save(report: Dict, output_dir: Path) -> Path:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    env = report["environment"]
+    stamp = datetime.fromisoformat(env["timestamp"]).strftime("%Y%m%d-%H%M%S")
+    path = output_dir / f"{stamp}_{env['commit']}.json"
+    path.write_text(json.dumps(report, indent=2))
+    return path
+
+
+def _flatten(data: Dict, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    for key, value in data.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from _flatten(value, name)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, float(value)
+
+
+def _direction(metric: str) -> int:
+    """+1 if higher is better, -1 if lower is better, 0 if informational"""
+    leaf = metric.rsplit(".", 1)[-1]
+    if leaf.endswith("_per_sec"):
+        return 1
+    if leaf.endswith("_ms") or leaf in ("seconds", "wall_seconds"):
+        return -1
+    return 0
+
+
+def compare(old_path: Path, new_path: Path, threshold: float = 0.10) -> int:
+    """Print metric deltas; returns the number of regressions beyond threshold"""
+    old = json.loads(Path(old_path).read_text())
+    new = json.loads(Path(new_path).read_text())
+    print(f"old: {old['environment']['commit']} ({old['environment']['encoder']})  "
+          f"new: {new['environment']['commit']} ({new['environment']['encoder']})")
+    if old["environment"]["encoder"] != new["environment"]["encoder"]:
+        print("warning: results were produced with different encoders")
+    
+    old_metrics = dict(_flatten(old["results"]))
+    regressions = 0
+    for metric, new_value in _flatten(new["results"]):
+        direction = _direction(metric)
+        if metric not in old_metrics or direction == 0 or metric.endswith("wall_seconds"):
+            continue
+        old_value = old_metrics[metric]
+        change = (new_value - old_value) / old_value if old_value else 0.0
+        flag = ""
+        if change * direction < -threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change * direction > threshold:
+            flag = "  improved"
+        print(f"{metric:<60} {old_value:>12.3f} {new_value:>12.3f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline performance benchmarks")
+    parser.add_argument("--cases", default=",".join(cases.CASES),
+                        help=f"Comma-separated subset of: {', '.join(cases.CASES)}")
+    parser.add_argument("--items", type=int, default=200, help="Items for collector/indexing/rank cases")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per search size")
+    parser.add_argument("--search-sizes", default="10000,100000",
+                        help="Collection sizes for the search case (e.g. 10000,100000,1000000)")
+    parser.add_argument("--backends", default="chroma,flat", help="Vector store backends for the search case")
+    parser.add_argument("--encoder", choices=["auto", "model", "hashing"], default="auto",
+                        help="'auto' uses the cached sentence-transformers model if present")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Mock LLM first-token latency (s)")
+    parser.add_argument("--output-dir", type=Path, default=RESULTS_DIR)
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), type=Path,
+                        help="Compare two saved result files instead of running")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as a regression")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, threshold=args.threshold) else 0)
+    
+    selected = [name.strip() for name in args.cases.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in cases.CASES]
+    if unknown:
+        parser.error(f"Unknown cases: {', '.join(unknown)}")
+    
+    encoder, encoder_name = corpus.load_encoder(args.encoder)
+    logger.info(f"Using encoder: {encoder_name}")
+    with cases.new_workdir() as workdir:
+        ctx = cases.BenchContext(
+            encoder=encoder,
+            encoder_name=encoder_name,
+            workdir=Path(workdir),
+            items=args.items,
+            queries=args.queries,
+            search_sizes=[int(size) for size in args.search_sizes.split(",") if size.strip()],
+            llm_latency=args.llm_latency,
+            backends=[name.strip() for name in args.backends.split(",") if name.strip()],
+        )
+        report = {"environment": environment(encoder_name), "results": run(selected, ctx)}
+    
+    path = save(report, args.output_dir)
+    print(json.dumps(report["results"], indent=2, default=str))
+    print(f"Saved results to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Local stand-ins for the Hacker News API, RSS feeds and article pages
+
+    with StubWeb(n_items=50) as web:
+        settings.HN_API_BASE_URL = web.hn_api_url
+        ...
+
+Paths served:
+    /v0/topstories.json, /v0/item/<id>.json    Hacker News Firebase API
+    /feed/medium.xml, /feed/devto.xml          RSS 2.0 feeds
+    /page/<id>.html                            synthetic article pages
+    /pdf/<id>.pdf                              synthetic paper PDFs (when pdf_pages > 0)
+    POST /graph/v1/paper/batch                 Semantic Scholar bulk citation counts
+
+fail_first makes every path answer 503 that many times before succeeding,
+to exercise client retries.
+"""
+import json
+import random
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections import Counter
+from typing import Dict
+from xml.sax.saxutils import escape
+from benchmarks import corpus
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    # Filled in per server by StubWeb
+    pages: Dict[int, bytes] = {}
+    pdfs: Dict[int, bytes] = {}
+    titles: Dict[int, str] = {}
+    latency = 0.0
+    fail_first = 0
+    attempts: Counter = Counter()
+    attempts_lock = threading.Lock()
+    
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+    
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        path = self.path.split("?", 1)[0]
+        base = f"http://{self.headers.get('Host')}"
+        if self.fail_first:
+            with self.attempts_lock:
+                self.attempts[path] += 1
+                failing = self.attempts[path] <= self.fail_first
+            if failing:
+                self.send_error(503)
+                return
+        
+        if path == "/v0/topstories.json":
+            self._send(json.dumps(sorted(self.pages)).encode(), "application/json")
+        elif path.startswith("/v0/item/") and path.endswith(".json"):
+            item_id = int(path[len("/v0/item/"):-len(".json")])
+            if item_id not in self.pages:
+                self._send(b"null", "application/json")
+                return
+            self._send(json.dumps({
+                "id": item_id,
+                "type": "story",
+                "title": self.titles[item_id],
+                "url": f"{base}/page/{item_id}.html",
+                "by": f"user{item_id % 17}",
+                "time": int(time.time()) - item_id * 600,
+                "score": (item_id * 37) % 500,
+            }).encode(), "application/json")
+        elif path.startswith("/feed/") and path.endswith(".xml"):
+            self._send(self._rss(base, path[len("/feed/"):-len(".xml")]), "application/rss+xml")
+        elif path.startswith("/page/") and path.endswith(".html"):
+            item_id = int(path[len("/page/"):-len(".html")])
+            if item_id in self.pages:
+                self._send(self.pages[item_id], "text/html; charset=utf-8")
+            else:
+                self.send_error(404)
+        elif path.startswith("/pdf/") and path.endswith(".pdf"):
+            item_id = int(path[len("/pdf/"):-len(".pdf")])
+            if item_id in self.pdfs:
+                self._send(self.pdfs[item_id], "application/pdf")
+            else:
+                self.send_error(404)
+        else:
+            self.send_error(404)
+    
+    def do_POST(self):
+        if self.latency:
+            time.sleep(self.latency)
+        path = self.path.split("?", 1)[0]
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        with self.attempts_lock:
+            self.attempts[f"POST {path}"] += 1
+        if path != "/graph/v1/paper/batch":
+            self.send_error(404)
+            return
+        # Deterministic counts; IDs ending in 9 are unknown to the provider
+        papers = [None if key.endswith("9") else {"paperId": key, "citationCount": sum(map(ord, key)) % 500}
+                  for key in body.get("ids", [])]
+        self._send(json.dumps(papers).encode(), "application/json")
+    
+    def _rss(self, base: str, name: str) -> bytes:
+        items = []
+        for item_id in sorted(self.pages):
+            link = f"{base}/page/{item_id}.html"
+            items.append(
+                f"<item><title>{escape(self.titles[item_id])}</title><link>{link}</link>"
+                f"<guid>{name}-{item_id}</guid><author>user{item_id % 17}</author>"
+                f"<pubDate>{formatdate(time.time() - item_id * 600)}</pubDate>"
+                f"<description>{escape(self.titles[item_id])}</description></item>"
+            )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f"<title>{name}</title><link>{base}</link><description>stub feed</description>"
+            + "".join(items) + "</channel></rss>"
+        ).encode()
+    
+    def _send(self, data: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StubWeb:
+    """Threaded HTTP server with n_items stories, feeds and pages, on a free port"""
+    
+    def __init__(self, n_items: int = 50, paragraphs_per_page: int = 20, latency: float = 0.0,
+                 host: str = "127.0.0.1", seed: int = 0, pdf_pages: int = 0, fail_first: int = 0):
+        rng = random.Random(seed)
+        titles = {i: corpus.words(rng, 8).capitalize() for i in range(1, n_items + 1)}
+        pages = {i: corpus.html_page(rng, titles[i], paragraphs_per_page).encode() for i in titles}
+        pdfs = {i: corpus.pdf_document(rng, titles[i], pdf_pages) for i in titles} if pdf_pages else {}
+        handler = type("StubHandler", (_StubHandler,), {
+            "pages": pages, "pdfs": pdfs, "titles": titles, "latency": latency,
+            "fail_first": fail_first, "attempts": Counter(), "attempts_lock": threading.Lock(),
+        })
+        self.server = ThreadingHTTPServer((host, 0), handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://{host}:{self.server.server_port}"
+        self.ids = sorted(pages)
+    
+    @property
+    def hn_api_url(self) -> str:
+        return f"{self.base_url}/v0"
+    
+    def feed_url(self, name: str) -> str:
+        return f"{self.base_url}/feed/{name}.xml"
+    
+    def page_url(self, item_id: int) -> str:
+        return f"{self.base_url}/page/{item_id}.html"
+    
+    def pdf_url(self, item_id: int) -> str:
+        return f"{self.base_url}/pdf/{item_id}.pdf"
+    
+    @property
+    def citation_api_url(self) -> str:
+        return f"{self.base_url}/graph/v1"
+    
+    def requests(self, path: str) -> int:
+        """Requests served so far for a path ("POST /graph/v1/paper/batch" for POSTs)"""
+        return self.server.RequestHandlerClass.attempts[path]
+    
+    def __enter__(self) -> "StubWeb":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+        return False
@@ -0,0 +1,4 @@
+"""HTTP API service"""
+from .metrics import LatencyMetrics
+
+__all__ = ["LatencyMetrics"]
@@ -0,0 +1,10 @@
+"""
+Run the API service: python -m src.api
+"""
+import uvicorn
+from src.utils.config import settings
+
+
+if __name__ == "__main__":
+    # Single process so the warm model singletons are loaded exactly once
+    uvicorn.run("src.api.app:app", host=settings.API_HOST, port=settings.API_PORT, workers=1)
@@ -0,0 +1,316 @@
+"""
+Async HTTP service for Q&A, search and the daily feed
+"""
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import List, Dict, Optional, Callable, Iterator, AsyncIterator
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from src.api.metrics import LatencyMetrics
+from src.database import Paper, Article, UserProfile, UserRecommendation, SessionLocal, init_db
+from src.models import EmbeddingManager, Recommender, FeatureExtractor, FeatureStore, ProfileStore
+from src.models.profiles import DEFAULT_PROFILE, parse_interests
+from src.rag import Retriever, Generator
+from src.utils import instrumentation
+from src.utils.config import settings
+from src.utils.profiling import Profiler, new_run_id
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class AskRequest(BaseModel):
+    """Q&A request body"""
+    question: str
+    n_results: int = 5
+    filter_type: Optional[str] = None
+
+
+class ProfileRequest(BaseModel):
+    """User profile body"""
+    interests: List[str]
+    active: bool = True
+
+
+class ServiceState:
+    """Warm singletons shared by all requests"""
+    
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.API_EXECUTOR_WORKERS,
+            thread_name_prefix="api-blocking"
+        )
+        self.pending = asyncio.Semaphore(settings.API_MAX_PENDING)
+        self.metrics = LatencyMetrics()
+        
+        # Model loads happen once, here, instead of per request
+        self.embedding_manager = EmbeddingManager()
+        self.retriever = Retriever(self.embedding_manager)
+        self.recommender = Recommender()
+        self.feature_store = (FeatureStore.for_model(self.embedding_manager.model_name)
+                              if settings.FEATURE_STORE_ENABLED else None)
+        try:
+            self.generator: Optional[Generator] = Generator()
+        except ValueError as e:
+            logger.warning(f"LLM generator unavailable, Q&A endpoints disabled: {e}")
+            self.generator = None
+    
+    async def run_blocking(self, func: Callable, *args):
+        """Run a blocking call on the bounded executor"""
+        async with self.pending:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+    
+    async def iterate_blocking(self, iterator: Iterator) -> AsyncIterator:
+        """Drain a blocking iterator one item at a time on the executor"""
+        sentinel = object()
+        while True:
+            item = await self.run_blocking(next, iterator, sentinel)
+            if item is sentinel:
+                break
+            yield item
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_db()
+    app.state.service = ServiceState()
+    logger.info("API service ready")
+    try:
+        yield
+    finally:
+        app.state.service.shutdown()
+
+
+app = FastAPI(title="ML Learning Assistant", lifespan=lifespan)
+
+
+def _service(request: Request) -> ServiceState:
+    return request.app.state.service
+
+
+def _require_generator(service: ServiceState) -> Generator:
+    if service.generator is None:
+        raise HTTPException(status_code=503, detail="LLM generator is not configured")
+    return service.generator
+
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Use the route template so /search?q=... doesn't explode cardinality
+        route = request.scope.get("route")
+        path = getattr(route, "path", request.url.path)
+        service = getattr(request.app.state, "service", None)
+        if service is not None:
+            service.metrics.observe(request.method, path, status, time.perf_counter() - start)
+
+
+@app.get("/health")
+async def health(request: Request) -> Dict:
+    service = _service(request)
+    return {"status": "ok", "llm": service.generator is not None,
+            "index": service.embedding_manager.version_status()}
+
+
+@app.post("/ask")
+async def ask(body: AskRequest, request: Request, profile: bool = False) -> Dict:
+    service = _service(request)
+    generator = _require_generator(service)
+    
+    if profile:
+        def answer() -> Dict:
+            # One blocking call, so retrieval and generation land in the same profile
+            with Profiler(new_run_id("qa"), "ask") as profiler:
+                context = service.retriever.retrieve(body.question, body.n_results, body.filter_type)
+                result = generator.generate_answer(body.question, context)
+            return {**result, "profile": profiler.summary}
+        return await service.run_blocking(answer)
+    
+    context = await service.run_blocking(
+        service.retriever.retrieve, body.question, body.n_results, body.filter_type
+    )
+    return await service.run_blocking(generator.generate_answer, body.question, context)
+
+
+@app.post("/ask/stream")
+async def ask_stream(body: AskRequest, request: Request) -> StreamingResponse:
+    service = _service(request)
+    generator = _require_generator(service)
+    
+    context = await service.run_blocking(
+        service.retriever.retrieve, body.question, body.n_results, body.filter_type
+    )
+    
+    async def events():
+        # Citations are known before generation starts, send them first
+        yield f"data: {json.dumps({'citations': generator.extract_citations(context)})}\n\n"
+        async for delta in service.iterate_blocking(generator.stream_answer(body.question, context)):
+            yield f"data: {json.dumps({'delta': delta})}\n\n"
+        yield "data: [DONE]\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/search")
+async def search(request: Request,
+                 q: str = Query(..., min_length=1),
+                 n_results: int = Query(10, ge=1, le=100),
+                 filter_type: Optional[str] = Query(None, pattern="^(paper|article|document)$"),
+                 since: Optional[datetime] = None,
+                 until: Optional[datetime] = None) -> List[Dict]:
+    service = _service(request)
+    return await service.run_blocking(service.embedding_manager.search, q, n_results, filter_type, since, until)
+
+
+def _user_picks(db, model, item_type: str, user_id: int, count: int) -> List:
+    """A user's latest recommended items of one type as (row, score) pairs"""
+    return (
+        db.query(model, UserRecommendation.score)
+        .join(UserRecommendation, UserRecommendation.item_id == model.id)
+        .filter(UserRecommendation.user_id == user_id, UserRecommendation.item_type == item_type)
+        .order_by(UserRecommendation.recommended_date.desc(), UserRecommendation.score.desc())
+        .limit(count).all()
+    )
+
+
+def _rerank(service: ServiceState, rows: List, kind: str, profile_id: Optional[int],
+            interests: List[str], count: int) -> List:
+    """Rank rows from stored features; only rows the feature store lacks are featurized (and encoded)"""
+    by_key = {(row.arxiv_id if kind == "paper" else row.url): row for row in rows}
+    ranked = []
+    if service.feature_store is not None and profile_id is not None:
+        matrix = service.feature_store.load(kind, profile_id, keys=list(by_key),
+                                            feature_names=service.recommender.feature_names)
+        ranked = service.recommender.rank_matrix([by_key[key] for key in matrix.keys], matrix.X)
+        rows = [by_key[key] for key in matrix.missing]
+    if rows:
+        extract = (FeatureExtractor.extract_paper_features if kind == "paper"
+                   else FeatureExtractor.extract_article_features)
+        features = [extract(row, service.embedding_manager, interests) for row in rows]
+        ranked += service.recommender.rank_items(rows, features)
+    return sorted(ranked, key=lambda pair: pair[1], reverse=True)[:count]
+
+
+def _load_feed(service: ServiceState, papers_count: int, articles_count: int, rerank: bool,
+               user: Optional[str] = None) -> Dict:
+    """Load the current feed from the database (blocking)"""
+    db = SessionLocal()
+    try:
+        profile = None
+        if user is not None:
+            profile = db.query(UserProfile).filter(UserProfile.name == user).first()
+            if profile is None:
+                raise HTTPException(status_code=404, detail=f"Unknown user: {user}")
+        if rerank:
+            # Score the most recently collected items with the warm ranking model
+            papers = db.query(Paper).order_by(Paper.collected_date.desc()).limit(papers_count * 10).all()
+            articles = db.query(Article).order_by(Article.collected_date.desc()).limit(articles_count * 10).all()
+            interests = parse_interests(profile.interests) if profile else settings.USER_INTERESTS
+            profile_id = profile.id if profile else (
+                db.query(UserProfile.id).filter(UserProfile.name == DEFAULT_PROFILE).scalar())
+            ranked_papers = _rerank(service, papers, "paper", profile_id, interests, papers_count)
+            ranked_articles = _rerank(service, articles, "article", profile_id, interests, articles_count)
+        elif profile is not None:
+            ranked_papers = _user_picks(db, Paper, "paper", profile.id, papers_count)
+            ranked_articles = _user_picks(db, Article, "article", profile.id, articles_count)
+        else:
+            ranked_papers = [
+                (p, p.relevance_score) for p in
+                db.query(Paper).filter(Paper.recommended.is_(True))
+                .order_by(Paper.recommended_date.desc(), Paper.relevance_score.desc())
+                .limit(papers_count).all()
+            ]
+            ranked_articles = [
+                (a, a.relevance_score) for a in
+                db.query(Article).filter(Article.recommended.is_(True))
+                .order_by(Article.recommended_date.desc(), Article.relevance_score.desc())
+                .limit(articles_count).all()
+            ]
+        
+        return {
+            "papers": [{
+                "arxiv_id": p.arxiv_id,
+                "title": p.title,
+                "url": p.arxiv_url,
+                "score": float(score),
+                "summary": p.personalized_summary,
+            } for p, score in ranked_papers],
+            "articles": [{
+                "source": a.source,
+                "title": a.title,
+                "url": a.url,
+                "score": float(score),
+                "summary": a.personalized_summary,
+            } for a, score in ranked_articles],
+        }
+    finally:
+        db.close()
+
+
+@app.get("/feed")
+async def feed(request: Request,
+               papers: int = Query(settings.TOP_PAPERS_COUNT, ge=0, le=100),
+               articles: int = Query(settings.TOP_ARTICLES_COUNT, ge=0, le=100),
+               rerank: bool = False,
+               user: Optional[str] = None) -> Dict:
+    service = _service(request)
+    return await service.run_blocking(_load_feed, service, papers, articles, rerank, user)
+
+
+def _profile_dict(profile: UserProfile) -> Dict:
+    return {"name": profile.name, "interests": parse_interests(profile.interests), "active": profile.active}
+
+
+def _list_profiles() -> List[Dict]:
+    db = SessionLocal()
+    try:
+        return [_profile_dict(p) for p in db.query(UserProfile).order_by(UserProfile.name).all()]
+    finally:
+        db.close()
+
+
+def _save_profile(name: str, body: ProfileRequest) -> Dict:
+    db = SessionLocal()
+    try:
+        # The embedding is computed lazily by the next feed run
+        return _profile_dict(ProfileStore.upsert(db, name, body.interests, body.active))
+    finally:
+        db.close()
+
+
+@app.get("/users")
+async def list_users(request: Request) -> List[Dict]:
+    return await _service(request).run_blocking(_list_profiles)
+
+
+@app.put("/users/{name}")
+async def save_user(name: str, body: ProfileRequest, request: Request) -> Dict:
+    interests = [i.strip() for i in body.interests if i.strip()]
+    if not interests:
+        raise HTTPException(status_code=422, detail="At least one interest is required")
+    return await _service(request).run_blocking(_save_profile, name, ProfileRequest(interests=interests, active=body.active))
+
+
+@app.get("/metrics")
+async def metrics(request: Request, format: str = Query("prometheus", pattern="^(prometheus|json)$")):
+    service = _service(request)
+    if format == "json":
+        return {"requests": service.metrics.snapshot(), "retriever_cache": service.retriever.cache_stats(),
+                **instrumentation.REGISTRY.snapshot()}
+    return PlainTextResponse(service.metrics.render_prometheus() + instrumentation.REGISTRY.render_prometheus())
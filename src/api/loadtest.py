@@ -0,0 +1,92 @@
+"""
+Minimal closed-loop load generator for the API service
+
+Example:
+    python -m src.api.loadtest --url http://127.0.0.1:8000 --endpoint ask --concurrency 16 --requests 200
+"""
+import argparse
+import json
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+SAMPLE_QUESTIONS = [
+    "What is retrieval-augmented generation?",
+    "How do transformers handle long context?",
+    "What are recent advances in diffusion models?",
+    "How does contrastive learning work?",
+    "What is parameter-efficient fine-tuning?",
+]
+
+
+def _request(base_url: str, endpoint: str, i: int, timeout: float) -> float:
+    question = SAMPLE_QUESTIONS[i % len(SAMPLE_QUESTIONS)]
+    if endpoint == "search":
+        url = f"{base_url}/search?{urllib.parse.urlencode({'q': question})}"
+        req = urllib.request.Request(url)
+    elif endpoint == "feed":
+        req = urllib.request.Request(f"{base_url}/feed")
+    else:
+        path = "/ask/stream" if endpoint == "stream" else "/ask"
+        req = urllib.request.Request(
+            f"{base_url}{path}",
+            data=json.dumps({"question": question}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+    
+    start = time.perf_counter()
+    with urllib.request.urlopen(req, timeout=timeout) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(q * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def run(base_url: str, endpoint: str, concurrency: int, total: int, timeout: float = 60.0) -> Dict:
+    """Fire `total` requests with `concurrency` in flight and summarize latency"""
+    latencies: List[float] = []
+    errors = 0
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(_request, base_url.rstrip("/"), endpoint, i, timeout) for i in range(total)]
+        for future in futures:
+            try:
+                latencies.append(future.result())
+            except Exception:
+                errors += 1
+    elapsed = time.perf_counter() - start
+    
+    latencies.sort()
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": _percentile(latencies, 0.50),
+        "p95": _percentile(latencies, 0.95),
+        "p99": _percentile(latencies, 0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API service")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--endpoint", choices=["ask", "stream", "search", "feed"], default="ask")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100)
+    args = parser.parse_args()
+    
+    print(json.dumps(run(args.url, args.endpoint, args.concurrency, args.requests), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Request latency metrics for the API service
+"""
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class LatencyMetrics:
+    """Thread-safe per-route latency histograms"""
+    
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, str, int], Dict] = {}
+    
+    def observe(self, method: str, route: str, status: int, seconds: float):
+        """Record one request duration"""
+        key = (method, route, status)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+                self._series[key] = series
+            series["counts"][bisect_left(self.buckets, seconds)] += 1
+            series["sum"] += seconds
+            series["count"] += 1
+    
+    def snapshot(self) -> List[Dict]:
+        """Return a JSON-friendly view with approximate percentiles"""
+        with self._lock:
+            items = [(key, dict(series, counts=list(series["counts"])))
+                     for key, series in self._series.items()]
+        
+        result = []
+        for (method, route, status), series in sorted(items):
+            result.append({
+                "method": method,
+                "route": route,
+                "status": status,
+                "count": series["count"],
+                "mean": series["sum"] / series["count"] if series["count"] else 0.0,
+                "p50": self._percentile(series, 0.50),
+                "p95": self._percentile(series, 0.95),
+                "p99": self._percentile(series, 0.99),
+            })
+        return result
+    
+    def render_prometheus(self) -> str:
+        """Render all series in the Prometheus text exposition format"""
+        name = "http_request_duration_seconds"
+        lines = [
+            f"# HELP {name} HTTP request latency in seconds",
+            f"# TYPE {name} histogram",
+        ]
+        with self._lock:
+            items = sorted((key, dict(series, counts=list(series["counts"])))
+                           for key, series in self._series.items())
+        
+        for (method, route, status), series in items:
+            labels = f'method="{method}",route="{route}",status="{status}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, series["counts"]):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {series["count"]}')
+            lines.append(f"{name}_sum{{{labels}}} {series['sum']}")
+            lines.append(f"{name}_count{{{labels}}} {series['count']}")
+        return "\n".join(lines) + "\n"
+    
+    def _percentile(self, series: Dict, q: float) -> float:
+        """Upper bucket bound containing the q-th quantile"""
+        if not series["count"]:
+            return 0.0
+        target = q * series["count"]
+        cumulative = 0
+        for bound, count in zip(self.buckets, series["counts"]):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return float("inf")
@@ -0,0 +1,165 @@
+"""
+Mock OpenAI-compatible chat completions server for local load testing
+
+Run with:
+    python -m src.api.mock_llm --port 8001 --first-token-latency 0.3
+
+and point the service at it with OPENAI_BASE_URL=http://127.0.0.1:8001/v1
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CANNED_ANSWER = (
+    "Based on the provided context, the key idea is to learn representations that "
+    "transfer across tasks [Source 1]. Related work extends this with retrieval "
+    "and careful evaluation [Source 2]."
+)
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    """Serves /v1/chat/completions with canned text and configurable latency"""
+    
+    # Overridden per server via make_server()
+    first_token_latency = 0.2
+    token_latency = 0.01
+    answer = CANNED_ANSWER
+    
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+    
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json({"object": "list", "data": [{"id": "mock", "object": "model"}]})
+        else:
+            self.send_error(404)
+    
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        prompt_chars = sum(len(m.get("content", "")) for m in body.get("messages", []))
+        model = body.get("model", "mock")
+        tokens = self.answer.split(" ")
+        
+        time.sleep(self.first_token_latency)
+        
+        if body.get("stream"):
+            include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+            self._stream(model, tokens, prompt_chars // 4 if include_usage else None)
+        else:
+            time.sleep(self.token_latency * len(tokens))
+            self._send_json({
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": self.answer},
+                    "finish_reason": "stop",
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_chars // 4,
+                    "completion_tokens": len(tokens),
+                    "total_tokens": prompt_chars // 4 + len(tokens),
+                },
+            })
+    
+    def _stream(self, model: str, tokens, prompt_tokens: Optional[int] = None):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        for i, token in enumerate(tokens):
+            text = token if i == 0 else f" {token}"
+            self._send_chunk(completion_id, model, {"content": text}, None)
+            time.sleep(self.token_latency)
+        self._send_chunk(completion_id, model, {}, "stop")
+        if prompt_tokens is not None:
+            # Final usage-only chunk, as sent for stream_options={"include_usage": true}
+            usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(tokens),
+                "total_tokens": prompt_tokens + len(tokens),
+            }
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": [], "usage": usage}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+    
+    def _send_chunk(self, completion_id: str, model: str, delta: dict, finish_reason: Optional[str]):
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        self.wfile.flush()
+    
+    def _send_json(self, payload: dict):
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def make_server(host: str = "127.0.0.1", port: int = 0,
+                first_token_latency: float = 0.2, token_latency: float = 0.01,
+                answer: str = CANNED_ANSWER) -> ThreadingHTTPServer:
+    """Create (but don't start) a mock LLM server; port 0 picks a free port"""
+    handler = type("ConfiguredMockLLMHandler", (MockLLMHandler,), {
+        "first_token_latency": first_token_latency,
+        "token_latency": token_latency,
+        "answer": answer,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_background(**kwargs) -> ThreadingHTTPServer:
+    """Start a mock LLM server on a daemon thread and return it"""
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--first-token-latency", type=float, default=0.2)
+    parser.add_argument("--token-latency", type=float, default=0.01)
+    args = parser.parse_args()
+    
+    server = make_server(args.host, args.port, args.first_token_latency, args.token_latency)
+    logger.info(f"Mock LLM listening on http://{args.host}:{server.server_port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,13 @@
 """Data collection modules"""
-from .arxiv_collector import ArxivCollector, PaperData
+from .records import ArticleData, PaperData, RecordBatch
+from .arxiv_collector import ArxivCollector
 from .hn_collector import HNCollector, ArticleData as HNArticleData
 from .medium_collector import MediumCollector, ArticleData as MediumArticleData
 from .devto_collector import DevToCollector, ArticleData as DevToArticleData
 
 __all__ = [
-    "ArxivCollector", "PaperData",
+    "ArticleData", "PaperData", "RecordBatch",
+    "ArxivCollector",
     "HNCollector", "MediumCollector", "DevToCollector",
     "HNArticleData", "MediumArticleData", "DevToArticleData"
 ]
@@ -2,30 +2,18 @@
 ArXiv paper collection module
 """
 import arxiv
+import requests
 from datetime import datetime, timedelta
-from typing import List, Optional
-from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional
+from src.collectors.records import PaperData
 from src.utils.config import settings
+from src.utils import instrumentation
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-@dataclass
-class PaperData:
-    """Paper data structure"""
-    arxiv_id: str
-    title: str
-    authors: List[str]
-    abstract: str
-    categories: List[str]
-    published_date: datetime
-    arxiv_url: str
-    pdf_url: str
-    citation_count: int = 0
-
-
 class ArxivCollector:
     """Fetches papers from ArXiv"""
     
@@ -44,8 +32,20 @@ class ArxivCollector:
         Returns:
             List of PaperData objects
         """
+        papers = list(self.iter_recent_papers(days, max_results))
+        logger.info(f"Fetched {len(papers)} papers from ArXiv")
+        return papers
+    
+    def iter_recent_papers(self, days: int = 1, max_results: Optional[int] = None) -> Iterator[PaperData]:
+        """
+        Yield recent papers as the ArXiv API pages them in
+        
+        Same arguments as fetch_recent_papers. API errors are counted, logged
+        and re-raised, so a failed fetch is not mistaken for a day without
+        papers; papers already yielded stay valid.
+        """
         max_results = max_results or self.max_results
-        papers = []
+        count = 0
         
         # Build query for categories
         category_query = " OR ".join([f"cat:{cat}" for cat in self.categories])
@@ -61,30 +61,72 @@ class ArxivCollector:
         cutoff_date = datetime.now() - timedelta(days=days)
         
         try:
-            for result in search.results():
-                # Filter by date
-                if result.published.date() >= cutoff_date.date():
-                    paper = PaperData(
-                        arxiv_id=result.entry_id.split('/')[-1],
-                        title=result.title,
-                        authors=[author.name for author in result.authors],
-                        abstract=result.summary,
-                        categories=result.categories,
-                        published_date=result.published,
-                        arxiv_url=result.entry_id,
-                        pdf_url=result.pdf_url,
-                        citation_count=0  # ArXiv doesn't provide citation count directly
-                    )
-                    papers.append(paper)
-                    
-                    if len(papers) >= max_results:
+            with instrumentation.COLLECTOR_SECONDS.time(source="arxiv"):
+                for result in self._client(min(search.max_results, settings.ARXIV_PAGE_SIZE)).results(search):
+                    # Filter by date
+                    if result.published.date() < cutoff_date.date():
+                        continue
+                    yield self._to_paper(result)
+                    count += 1
+                    instrumentation.COLLECTOR_ITEMS.inc(source="arxiv")
+                    if count >= max_results:
                         break
-                        
-        except Exception as e:
-            logger.error(f"Error fetching ArXiv papers: {e}")
+        except (arxiv.ArxivError, requests.RequestException) as e:
+            instrumentation.HTTP_ERRORS.inc(source="arxiv")
+            logger.error(f"Error fetching ArXiv papers after {count}: {e}")
+            raise
+    
+    def iter_date_range(self, start: datetime, end: datetime, categories: Optional[List[str]] = None,
+                        page_size: Optional[int] = None,
+                        before_request: Optional[Callable[[], None]] = None) -> Iterator[PaperData]:
+        """
+        Yield every paper submitted in [start, end), oldest first
         
-        logger.info(f"Fetched {len(papers)} papers from ArXiv")
-        return papers
+        Each API request fetches one page of page_size results (default
+        ARXIV_PAGE_SIZE); before_request is called ahead of each one, so
+        concurrent callers can share a rate limit. Unlike the other iterators,
+        errors propagate, so a caller can retry the whole range.
+        """
+        categories = categories or self.categories
+        page_size = page_size or settings.ARXIV_PAGE_SIZE
+        last = end - timedelta(minutes=1)
+        query = (f"({' OR '.join(f'cat:{cat}' for cat in categories)}) "
+                 f"AND submittedDate:[{start:%Y%m%d%H%M} TO {last:%Y%m%d%H%M}]")
+        client = self._client(page_size)
+        offset = 0
+        with instrumentation.COLLECTOR_SECONDS.time(source="arxiv_range"):
+            while True:
+                if before_request is not None:
+                    before_request()
+                search = arxiv.Search(query=query, max_results=offset + page_size,
+                                      sort_by=arxiv.SortCriterion.SubmittedDate,
+                                      sort_order=arxiv.SortOrder.Ascending)
+                page = list(client.results(search, offset=offset))
+                for result in page:
+                    yield self._to_paper(result)
+                instrumentation.COLLECTOR_ITEMS.inc(len(page), source="arxiv_range")
+                if len(page) < page_size:
+                    return
+                offset += len(page)
+    
+    @staticmethod
+    def _client(page_size: int) -> arxiv.Client:
+        """API client with requests ARXIV_REQUEST_INTERVAL apart and ARXIV_RETRIES retries"""
+        return arxiv.Client(page_size=page_size, delay_seconds=settings.ARXIV_REQUEST_INTERVAL, num_retries=settings.ARXIV_RETRIES)
+    
+    @staticmethod
+    def _to_paper(result) -> PaperData:
+        return PaperData(
+            arxiv_id=result.entry_id.split('/')[-1],
+            title=result.title,
+            authors=[author.name for author in result.authors],
+            abstract=result.summary,
+            categories=result.categories,
+            published_date=result.published,
+            arxiv_url=result.entry_id,
+            pdf_url=result.pdf_url,
+            citation_count=0  # ArXiv doesn't provide citation count directly
+        )
     
     def fetch_by_query(self, query: str, max_results: int = 10) -> List[PaperData]:
         """
@@ -97,8 +139,10 @@ class ArxivCollector:
         Returns:
             List of PaperData objects
         """
-        papers = []
-        
+        return list(self.iter_by_query(query, max_results))
+    
+    def iter_by_query(self, query: str, max_results: int = 10) -> Iterator[PaperData]:
+        """Yield papers matching a search query as they arrive (API errors are re-raised)"""
         search = arxiv.Search(
             query=query,
             max_results=max_results,
@@ -106,21 +150,11 @@ class ArxivCollector:
         )
         
         try:
-            for result in search.results():
-                paper = PaperData(
-                    arxiv_id=result.entry_id.split('/')[-1],
-                    title=result.title,
-                    authors=[author.name for author in result.authors],
-                    abstract=result.summary,
-                    categories=result.categories,
-                    published_date=result.published,
-                    arxiv_url=result.entry_id,
-                    pdf_url=result.pdf_url,
-                    citation_count=0
-                )
-                papers.append(paper)
-        except Exception as e:
+            with instrumentation.COLLECTOR_SECONDS.time(source="arxiv_query"):
+                for result in self._client(min(max_results, settings.ARXIV_PAGE_SIZE)).results(search):
+                    yield self._to_paper(result)
+        except (arxiv.ArxivError, requests.RequestException) as e:
+            instrumentation.HTTP_ERRORS.inc(source="arxiv_query")
             logger.error(f"Error searching ArXiv: {e}")
-        
-        return papers
+            raise
 
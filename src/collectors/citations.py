@@ -0,0 +1,221 @@
+"""
+Citation-count enrichment for arXiv papers
+
+Counts come from a bulk provider (Semantic Scholar's paper batch endpoint by
+default; any object with a fetch(arxiv_ids) method works) and are cached in
+the citation_counts table. A lookup serves fresh entries from the table,
+fetches unknown IDs in one request per CITATION_BATCH_SIZE, and returns stale
+entries as they are while a background thread refreshes them, also updating
+the stored papers.
+"""
+import queue
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+import requests
+from sqlalchemy import or_
+from src.collectors.records import PaperData
+from src.database.models import CitationCount, Paper, SessionLocal
+from src.utils import instrumentation
+from src.utils.config import settings
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_VERSION = re.compile(r"v\d+$")
+
+
+def base_id(arxiv_id: str) -> str:
+    """arXiv ID without its version suffix: 2401.01234v2 -> 2401.01234"""
+    return _VERSION.sub("", arxiv_id)
+
+
+class SemanticScholarProvider:
+    """POST /paper/batch with ARXIV:<id> keys; unknown papers come back as null"""
+    
+    max_batch = 500
+    
+    def __init__(self, api_url: Optional[str] = None, api_key: Optional[str] = None,
+                 timeout: Optional[float] = None, retries: Optional[int] = None):
+        self.api_url = (api_url or settings.CITATION_API_URL).rstrip("/")
+        self.timeout = timeout or settings.CITATION_TIMEOUT
+        self.retries = settings.CITATION_RETRIES if retries is None else retries
+        self._session = requests.Session()
+        api_key = api_key or settings.CITATION_API_KEY
+        if api_key:
+            self._session.headers["x-api-key"] = api_key
+    
+    def fetch(self, arxiv_ids: List[str]) -> Dict[str, int]:
+        """Citation counts of the papers the provider knows, keyed by the given IDs"""
+        counts = {}
+        for lo in range(0, len(arxiv_ids), self.max_batch):
+            batch = arxiv_ids[lo:lo + self.max_batch]
+            for arxiv_id, paper in zip(batch, self._post(batch)):
+                if paper is not None:
+                    counts[arxiv_id] = int(paper.get("citationCount") or 0)
+        return counts
+    
+    def _post(self, batch: List[str]) -> List[Optional[Dict]]:
+        for attempt in range(self.retries + 1):
+            with instrumentation.HTTP_REQUEST_SECONDS.time(source="citations"):
+                response = self._session.post(
+                    f"{self.api_url}/paper/batch", params={"fields": "citationCount"},
+                    json={"ids": [f"ARXIV:{arxiv_id}" for arxiv_id in batch]}, timeout=self.timeout
+                )
+            if response.status_code != 429 and response.status_code < 500 or attempt == self.retries:
+                break
+            time.sleep(settings.PDF_RETRY_BACKOFF * 2 ** attempt)
+        response.raise_for_status()
+        instrumentation.HTTP_RESPONSE_BYTES.observe(len(response.content), source="citations")
+        return response.json()
+
+
+PROVIDERS = {"semanticscholar": SemanticScholarProvider}
+
+
+class CitationEnricher:
+    """
+    Cached, batched citation counts with background refresh of stale entries
+    
+    Args:
+        provider: Object with fetch(arxiv_ids) -> {arxiv_id: count}
+            (default: the CITATION_PROVIDER one)
+        session_factory: SQLAlchemy session factory for the cache table
+        ttl_hours: Age after which a cached count is refreshed
+    """
+    
+    def __init__(self, provider=None, session_factory: Callable = SessionLocal,
+                 ttl_hours: Optional[float] = None, batch_size: Optional[int] = None):
+        self.provider = provider or PROVIDERS[settings.CITATION_PROVIDER]()
+        self.session_factory = session_factory
+        self.ttl = timedelta(hours=settings.CITATION_TTL_HOURS if ttl_hours is None else ttl_hours)
+        self.batch_size = batch_size or settings.CITATION_BATCH_SIZE
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+    
+    @staticmethod
+    def _now() -> datetime:
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+    
+    def lookup(self, arxiv_ids: Iterable[str]) -> Dict[str, int]:
+        """
+        Citation counts keyed by the given (possibly versioned) IDs
+        
+        Fresh cache entries cost one query; unknown IDs are fetched in bulk
+        before returning; stale entries are returned as cached and queued
+        for a background refresh. IDs the provider could not be asked about
+        map to 0.
+        """
+        arxiv_ids = list(dict.fromkeys(arxiv_ids))
+        bases = {arxiv_id: base_id(arxiv_id) for arxiv_id in arxiv_ids}
+        db = self.session_factory()
+        try:
+            cached = {row.arxiv_id: row for row in
+                      db.query(CitationCount).filter(CitationCount.arxiv_id.in_(set(bases.values())))}
+            cutoff = self._now() - self.ttl
+            counts, stale = {}, []
+            for base, row in cached.items():
+                counts[base] = row.citation_count
+                if row.fetched_date is None or row.fetched_date < cutoff:
+                    stale.append(base)
+            missing = sorted(set(bases.values()) - set(cached))
+            instrumentation.CITATION_LOOKUPS.inc(len(cached) - len(stale), outcome="fresh")
+            instrumentation.CITATION_LOOKUPS.inc(len(stale), outcome="stale")
+            instrumentation.CITATION_LOOKUPS.inc(len(missing), outcome="missing")
+            for lo in range(0, len(missing), self.batch_size):
+                counts.update(self._fetch(db, missing[lo:lo + self.batch_size]))
+        finally:
+            db.close()
+        self._enqueue(stale)
+        return {arxiv_id: counts.get(base, 0) for arxiv_id, base in bases.items()}
+    
+    def enrich(self, papers: List[PaperData]) -> int:
+        """Set citation_count on papers in place; returns how many have citations"""
+        counts = self.lookup(paper.arxiv_id for paper in papers)
+        for paper in papers:
+            paper.citation_count = counts[paper.arxiv_id]
+        return sum(1 for paper in papers if paper.citation_count)
+    
+    def _fetch(self, db, bases: List[str], update_papers: bool = False) -> Dict[str, int]:
+        """Ask the provider about bases and write the answers to the cache (and stored papers)"""
+        try:
+            counts = self.provider.fetch(bases)
+        except Exception as e:
+            instrumentation.HTTP_ERRORS.inc(source="citations")
+            logger.warning(f"Could not fetch citation counts for {len(bases)} papers: {e}")
+            return {}
+        now = self._now()
+        rows = {row.arxiv_id: row for row in db.query(CitationCount).filter(CitationCount.arxiv_id.in_(bases))}
+        for base in bases:
+            row = rows.get(base)
+            if row is None:
+                row = CitationCount(arxiv_id=base)
+                db.add(row)
+            row.citation_count = counts.get(base, 0)
+            row.found = base in counts
+            row.fetched_date = now
+        if update_papers and counts:
+            # Papers are stored under their versioned ID
+            stored = db.query(Paper).filter(or_(Paper.arxiv_id.in_(list(counts)),
+                                                *(Paper.arxiv_id.like(f"{base}v%") for base in counts)))
+            for paper in stored:
+                paper.citation_count = counts.get(base_id(paper.arxiv_id), paper.citation_count)
+        db.commit()
+        return {base: counts.get(base, 0) for base in bases}
+    
+    # Background refresh
+    
+    def _enqueue(self, bases: List[str]):
+        with self._lock:
+            bases = [base for base in bases if base not in self._queued]
+            if not bases:
+                return
+            self._queued.update(bases)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._refresh_loop, name="citation-refresh", daemon=True)
+                self._worker.start()
+        for base in bases:
+            self._queue.put(base)
+    
+    def _refresh_loop(self):
+        while True:
+            base = self._queue.get()
+            if base is None:
+                return
+            batch = [base]
+            while len(batch) < self.batch_size:
+                try:
+                    base = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if base is None:
+                    self._queue.put(None)
+                    break
+                batch.append(base)
+            db = self.session_factory()
+            try:
+                if self._fetch(db, batch, update_papers=True):
+                    logger.info(f"Refreshed citation counts of {len(batch)} papers")
+            except Exception as e:
+                logger.warning(f"Citation refresh failed: {e}")
+            finally:
+                db.close()
+                with self._lock:
+                    self._queued.difference_update(batch)
+    
+    def close(self, timeout: Optional[float] = None):
+        """Stop the refresh thread once its queue is drained, waiting at most timeout seconds"""
+        with self._lock:
+            worker = self._worker
+            self._worker = None
+        if worker is None:
+            return
+        self._queue.put(None)
+        worker.join(timeout)
+        if worker.is_alive():
+            logger.info("Citation refresh still running; remaining stale counts are refreshed next time")
@@ -2,85 +2,62 @@
 Medium article collector
 """
 import feedparser
-import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
-from typing import List, Optional
-from dataclasses import dataclass
+from typing import Iterator, List
+from src.collectors.pages import fetch_page_text
+from src.collectors.records import ArticleData
+from src.utils import instrumentation
+from src.utils.config import settings
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-@dataclass
-class ArticleData:
-    """Article data structure"""
-    source: str
-    source_id: str
-    title: str
-    url: str
-    content: str
-    author: Optional[str] = None
-    published_date: Optional[datetime] = None
-    upvotes: int = 0
-
-
 class MediumCollector:
     """Fetches articles from Medium"""
     
     def fetch(self, limit: int = 20) -> List[ArticleData]:
         """Fetch articles from Medium (via RSS)"""
-        articles = []
+        return list(self.iter_articles(limit))
+    
+    def iter_articles(self, limit: int = 20) -> Iterator[ArticleData]:
+        """
+        Yield feed entries one at a time, each as soon as its page is extracted
         
+        Feed errors are counted, logged and re-raised, so a failed fetch is not
+        mistaken for a complete source; a page that cannot be extracted only
+        falls back to the entry summary.
+        """
+        count = 0
         try:
-            # Medium RSS feed for ML/AI topics
-            feed_url = "https://medium.com/feed/tag/machine-learning"
-            feed = feedparser.parse(feed_url)
-            
-            for entry in feed.entries[:limit]:
-                content = self._extract_content(entry.link)
-                
-                article = ArticleData(
-                    source="medium",
-                    source_id=entry.get("id", entry.link),
-                    title=entry.title,
-                    url=entry.link,
-                    content=content or entry.get("summary", ""),
-                    author=entry.get("author"),
-                    published_date=datetime(*entry.published_parsed[:6]) if entry.get("published_parsed") else None,
-                    upvotes=0
-                )
-                articles.append(article)
+            with instrumentation.COLLECTOR_SECONDS.time(source="medium"):
+                # Medium RSS feed for ML/AI topics
+                feed_url = settings.MEDIUM_FEED_URL
+                feed = feedparser.parse(feed_url)
+                # feedparser reports network and HTTP errors on the result instead of raising
+                if feed.get("status", 200) >= 400:
+                    raise OSError(f"{feed_url} returned HTTP {feed.status}")
+                if feed.bozo and not feed.entries:
+                    raise feed.bozo_exception
                 
+                for entry in feed.entries[:limit]:
+                    content = fetch_page_text(entry.link, "medium")
+                    
+                    yield ArticleData(
+                        source="medium",
+                        source_id=entry.get("id", entry.link),
+                        title=entry.title,
+                        url=entry.link,
+                        content=content or entry.get("summary", ""),
+                        author=entry.get("author"),
+                        published_date=datetime(*entry.published_parsed[:6]) if entry.get("published_parsed") else None,
+                        upvotes=0
+                    )
+                    count += 1
+                    instrumentation.COLLECTOR_ITEMS.inc(source="medium")
+                    
         except Exception as e:
-            logger.error(f"Error fetching Medium articles: {e}")
-        
-        return articles
-    
-    def _extract_content(self, url: str) -> str:
-        """Extract text content from a URL"""
-        try:
-            response = requests.get(url, timeout=10, headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            })
-            soup = BeautifulSoup(response.content, "html.parser")
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            # Get text
-            text = soup.get_text()
-            
-            # Clean up whitespace
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = " ".join(chunk for chunk in chunks if chunk)
-            
-            return text[:5000]  # Limit content length
-            
-        except Exception as e:
-            logger.debug(f"Could not extract content from {url}: {e}")
-            return ""
-
+            instrumentation.HTTP_ERRORS.inc(source="medium")
+            logger.error(f"Error fetching Medium articles after {count}: {e}")
+            raise
@@ -0,0 +1,263 @@
+"""
+Collected record types and a columnar batch file for replaying them
+
+PaperData and ArticleData are slotted dataclasses shared by every collector.
+RecordBatch stores one kind of record column by column in a single binary
+file:
+
+    b"RECB" | version u32 | header length u64 | JSON header | 8-byte aligned buffers
+
+Strings are one UTF-8 blob plus int64 offsets, string lists add a row ->
+string offset array, integers are int64, and datetimes are int64 microseconds
+with a flag byte (missing, naive or UTC). Opening a file only maps it; rows
+are decoded on access, so a day's collection can be replayed without holding
+it in memory.
+"""
+import json
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+import numpy as np
+
+_MAGIC = b"RECB"
+_VERSION = 1
+_PREAMBLE = struct.Struct("<4sIQ")
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# Datetime flag per row
+_MISSING, _NAIVE, _UTC = 0, 1, 2
+
+
+class _Record:
+    """Base for slotted records"""
+    __slots__ = ()
+    
+    def __setstate__(self, state):
+        # Checkpoints written before records had slots pickled a plain __dict__
+        if isinstance(state, tuple):
+            state = {**(state[0] or {}), **(state[1] or {})}
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+
+@dataclass(slots=True)
+class PaperData(_Record):
+    """Paper data structure"""
+    arxiv_id: str
+    title: str
+    authors: List[str]
+    abstract: str
+    categories: List[str]
+    published_date: datetime
+    arxiv_url: str
+    pdf_url: str
+    citation_count: int = 0
+
+
+@dataclass(slots=True)
+class ArticleData(_Record):
+    """Article data structure"""
+    source: str
+    source_id: str
+    title: str
+    url: str
+    content: str
+    author: Optional[str] = None
+    published_date: Optional[datetime] = None
+    upvotes: int = 0
+
+
+# kind -> (record class, column types); column order follows the dataclass fields
+SCHEMAS: Dict[str, tuple] = {
+    "paper": (PaperData, {
+        "arxiv_id": "str", "title": "str", "authors": "strs", "abstract": "str", "categories": "strs",
+        "published_date": "datetime", "arxiv_url": "str", "pdf_url": "str", "citation_count": "int",
+    }),
+    "article": (ArticleData, {
+        "source": "str", "source_id": "str", "title": "str", "url": "str", "content": "str",
+        "author": "str", "published_date": "datetime", "upvotes": "int",
+    }),
+}
+_KINDS = {cls: kind for kind, (cls, _) in SCHEMAS.items()}
+
+
+def record_kind(record: _Record) -> str:
+    """"paper" or "article" for a record instance"""
+    return _KINDS[type(record)]
+
+
+def _encode_strings(values: List[Optional[str]], name: str, buffers: Dict[str, np.ndarray]):
+    encoded = [b"" if value is None else value.encode("utf-8", "surrogatepass") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    buffers[f"{name}.data"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    buffers[f"{name}.offsets"] = offsets
+    if any(value is None for value in values):
+        buffers[f"{name}.valid"] = np.fromiter((value is not None for value in values), dtype=np.uint8,
+                                               count=len(values))
+
+
+def _encode_datetimes(values: List[Optional[datetime]], name: str, buffers: Dict[str, np.ndarray]):
+    micros = np.zeros(len(values), dtype=np.int64)
+    flags = np.zeros(len(values), dtype=np.uint8)
+    for i, value in enumerate(values):
+        if value is None:
+            continue
+        if value.tzinfo is None:
+            delta, flags[i] = value - _EPOCH, _NAIVE
+        else:
+            delta, flags[i] = value - _EPOCH_UTC, _UTC
+        micros[i] = (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+    buffers[f"{name}.micros"] = micros
+    buffers[f"{name}.flags"] = flags
+
+
+class RecordBatch:
+    """
+    Records of one kind held column by column
+    
+    Build with from_records() and write(), or open() a file written earlier.
+    Rows come back as PaperData / ArticleData through indexing or iteration.
+    """
+    
+    def __init__(self, kind: str, rows: int, buffers: Dict[str, Union[np.ndarray, memoryview]],
+                 source: Optional[mmap.mmap] = None):
+        if kind not in SCHEMAS:
+            raise ValueError(f"Unknown record kind: {kind}")
+        self.kind = kind
+        self.record_class, self.columns = SCHEMAS[kind]
+        self.rows = rows
+        self._buffers = buffers
+        self._mmap = source
+    
+    @classmethod
+    def from_records(cls, records: Iterable[_Record], kind: Optional[str] = None) -> "RecordBatch":
+        """Column-encode records (all of the same kind)"""
+        records = list(records)
+        if kind is None:
+            if not records:
+                raise ValueError("Cannot infer the kind of an empty batch")
+            kind = record_kind(records[0])
+        record_class, columns = SCHEMAS[kind]
+        if any(type(record) is not record_class for record in records):
+            raise TypeError(f"Every record in a {kind} batch must be a {record_class.__name__}")
+        
+        buffers: Dict[str, np.ndarray] = {}
+        for name, column_type in columns.items():
+            values = [getattr(record, name) for record in records]
+            if column_type == "str":
+                _encode_strings(values, name, buffers)
+            elif column_type == "strs":
+                counts = [len(value or ()) for value in values]
+                row_offsets = np.zeros(len(values) + 1, dtype=np.int64)
+                np.cumsum(counts, out=row_offsets[1:])
+                buffers[f"{name}.rows"] = row_offsets
+                _encode_strings([item for value in values for item in (value or ())], name, buffers)
+            elif column_type == "int":
+                buffers[f"{name}.values"] = np.asarray([value or 0 for value in values], dtype=np.int64)
+            else:
+                _encode_datetimes(values, name, buffers)
+        return cls(kind, len(records), buffers)
+    
+    def write(self, path: Path) -> Path:
+        """Write the batch to path atomically"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        layout, offset = {}, 0
+        for name, buffer in self._buffers.items():
+            buffer = np.asarray(buffer)
+            layout[name] = [offset, buffer.dtype.str, int(buffer.size)]
+            offset += -(-buffer.nbytes // 8) * 8
+        header = json.dumps({"kind": self.kind, "rows": self.rows, "buffers": layout}).encode("utf-8")
+        header += b" " * (-(_PREAMBLE.size + len(header)) % 8)
+        
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(_PREAMBLE.pack(_MAGIC, _VERSION, len(header)))
+            f.write(header)
+            for buffer in self._buffers.values():
+                data = np.ascontiguousarray(buffer).tobytes()
+                f.write(data)
+                f.write(b"\0" * (-len(data) % 8))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        return path
+    
+    @classmethod
+    def open(cls, path: Path) -> "RecordBatch":
+        """Map a batch file; rows are decoded lazily"""
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _PREAMBLE.size:
+                raise ValueError(f"{path} is not a record batch")
+            source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, header_length = _PREAMBLE.unpack_from(source, 0)
+        if magic != _MAGIC or version != _VERSION:
+            source.close()
+            raise ValueError(f"{path} is not a version {_VERSION} record batch")
+        start = _PREAMBLE.size + header_length
+        header = json.loads(source[_PREAMBLE.size:start])
+        buffers = {
+            name: np.frombuffer(source, dtype=np.dtype(dtype), count=count, offset=start + offset)
+            for name, (offset, dtype, count) in header["buffers"].items()
+        }
+        return cls(header["kind"], header["rows"], buffers, source)
+    
+    def close(self):
+        self._buffers = {}
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+    
+    def __enter__(self) -> "RecordBatch":
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+        return False
+    
+    def __len__(self) -> int:
+        return self.rows
+    
+    def _string(self, name: str, i: int) -> Optional[str]:
+        valid = self._buffers.get(f"{name}.valid")
+        if valid is not None and not valid[i]:
+            return None
+        offsets = self._buffers[f"{name}.offsets"]
+        return self._buffers[f"{name}.data"][offsets[i]:offsets[i + 1]].tobytes().decode("utf-8", "surrogatepass")
+    
+    def _value(self, name: str, column_type: str, i: int):
+        if column_type == "str":
+            return self._string(name, i)
+        if column_type == "strs":
+            rows = self._buffers[f"{name}.rows"]
+            return [self._string(name, j) for j in range(rows[i], rows[i + 1])]
+        if column_type == "int":
+            return int(self._buffers[f"{name}.values"][i])
+        flag = self._buffers[f"{name}.flags"][i]
+        if flag == _MISSING:
+            return None
+        delta = timedelta(microseconds=int(self._buffers[f"{name}.micros"][i]))
+        return _EPOCH + delta if flag == _NAIVE else _EPOCH_UTC + delta
+    
+    def __getitem__(self, i: int) -> _Record:
+        if i < 0:
+            i += self.rows
+        if not 0 <= i < self.rows:
+            raise IndexError(i)
+        return self.record_class(**{name: self._value(name, column_type, i)
+                                    for name, column_type in self.columns.items()})
+    
+    def __iter__(self) -> Iterator[_Record]:
+        for i in range(self.rows):
+            yield self[i]
+    
+    def column(self, name: str) -> list:
+        """Every value of one field, without building records"""
+        column_type = self.columns[name]
+        return [self._value(name, column_type, i) for i in range(self.rows)]
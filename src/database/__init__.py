@@ -1,3 +1,9 @@
-from .models import Paper, Article, UserInteraction, init_db, get_db, SessionLocal
+from .models import (
+    Paper, Article, ArticleSignature, UserInteraction, UserProfile, UserRecommendation, LocalDocument,
+    CitationCount, init_db, get_db, SessionLocal
+)
 
-__all__ = ["Paper", "Article", "UserInteraction", "init_db", "get_db", "SessionLocal"]
+__all__ = [
+    "Paper", "Article", "ArticleSignature", "UserInteraction", "UserProfile", "UserRecommendation",
+    "LocalDocument", "CitationCount", "init_db", "get_db", "SessionLocal"
+]
@@ -1,7 +1,7 @@
 """
 Database models for storing papers and articles
 """
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Float, Boolean
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Float, Boolean, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime, timezone
@@ -58,6 +58,100 @@ class Article(Base):
     def __repr__(self):
         return f"<Article(source='{self.source}', title='{self.title[:50]}...')>"
 
+
+class ArticleSignature(Base):
+    """MinHash signature of an article, used for cross-source near-duplicate detection"""
+    __tablename__ = "article_signatures"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    url = Column(String, unique=True, index=True)  # Matches Article.url
+    source = Column(String)
+    signature = Column(LargeBinary)  # Little-endian uint32 MinHash values
+    cluster_url = Column(String, index=True)  # URL of the cluster representative
+    collected_date = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+    
+    def __repr__(self):
+        return f"<ArticleSignature(url='{self.url}', cluster_url='{self.cluster_url}')>"
+
+
+class UserInteraction(Base):
+    """User feedback on a recommended paper or article"""
+    __tablename__ = "user_interactions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    item_type = Column(String, index=True)  # paper or article
+    item_id = Column(Integer, index=True)
+    action = Column(String)  # click, like, dismiss, etc.
+    rating = Column(Float, nullable=True)
+    timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    def __repr__(self):
+        return f"<UserInteraction(item_type='{self.item_type}', item_id={self.item_id}, action='{self.action}')>"
+
+
+class UserProfile(Base):
+    """A reader with their own interests; the daily feed ranks every active profile"""
+    __tablename__ = "user_profiles"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True)
+    interests = Column(Text)  # Comma-separated, like USER_INTERESTS
+    embedding = Column(LargeBinary, nullable=True)  # float32 embedding of the joined interests
+    embedding_model = Column(String, nullable=True)  # Model that produced embedding
+    active = Column(Boolean, default=True)
+    created_date = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_date = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    def __repr__(self):
+        return f"<UserProfile(name='{self.name}', interests='{(self.interests or '')[:50]}')>"
+
+
+class UserRecommendation(Base):
+    """A paper or article selected for one user by a daily feed run"""
+    __tablename__ = "user_recommendations"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, index=True)  # UserProfile.id
+    item_type = Column(String)  # paper or article
+    item_id = Column(Integer, index=True)  # Paper.id or Article.id
+    score = Column(Float)
+    recommended_date = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+    
+    def __repr__(self):
+        return f"<UserRecommendation(user_id={self.user_id}, item_type='{self.item_type}', item_id={self.item_id})>"
+
+
+class LocalDocument(Base):
+    """Manifest entry for a file ingested from a local directory"""
+    __tablename__ = "local_documents"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    path = Column(String, unique=True, index=True)  # Absolute, resolved path
+    doc_id = Column(String, unique=True)  # Vector store ID: document_<doc_id>_chunk_<n>
+    mtime_ns = Column(Integer)
+    size = Column(Integer)
+    sha256 = Column(String)
+    title = Column(String)
+    chunks = Column(Integer, default=0)
+    published_date = Column(DateTime)  # Ingestion time; selects the vector partition holding the chunks
+    ingested_date = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    def __repr__(self):
+        return f"<LocalDocument(path='{self.path}', chunks={self.chunks})>"
+
+
+class CitationCount(Base):
+    """Cached citation count of an arXiv paper (ID without version suffix)"""
+    __tablename__ = "citation_counts"
+    
+    arxiv_id = Column(String, primary_key=True)
+    citation_count = Column(Integer, default=0)
+    found = Column(Boolean, default=True)  # False when the provider does not know the paper (yet)
+    fetched_date = Column(DateTime, index=True)  # Naive UTC; entries older than CITATION_TTL_HOURS are stale
+    
+    def __repr__(self):
+        return f"<CitationCount(arxiv_id='{self.arxiv_id}', citation_count={self.citation_count})>"
+
 # Database setup
 # Handle SQLite connection string
 db_url = settings.DATABASE_URL
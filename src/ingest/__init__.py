@@ -0,0 +1,8 @@
+"""
+Full-text ingestion into the vector store
+"""
+from .pdf import FullTextIngestor, PdfDownloader, extract_pdf_text
+from .local import LocalIngestor
+from .backfill import BackfillJob
+
+__all__ = ["FullTextIngestor", "PdfDownloader", "extract_pdf_text", "LocalIngestor", "BackfillJob"]
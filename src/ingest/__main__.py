@@ -0,0 +1,80 @@
+"""
+Full-text ingestion:
+    python -m src.ingest arxiv [--limit N] [--force]
+    python -m src.ingest local <directory> [--processes N]
+    python -m src.ingest backfill --since 2023-01-01 [--until 2025-01-01] [--categories cs.LG,cs.CL]
+"""
+import argparse
+import json
+from datetime import datetime
+from pathlib import Path
+from src.database import Paper, SessionLocal, init_db
+from src.ingest.backfill import BackfillJob
+from src.ingest.local import LocalIngestor
+from src.ingest.pdf import FullTextIngestor
+from src.models import EmbeddingManager
+
+
+def ingest_arxiv(args):
+    init_db()
+    db = SessionLocal()
+    try:
+        # Detached from the session so rows can be read from the download threads
+        papers = db.query(Paper).order_by(Paper.published_date.desc()).limit(args.limit).all()
+        db.expunge_all()
+    finally:
+        db.close()
+    
+    with FullTextIngestor(EmbeddingManager(), download_workers=args.workers,
+                          extract_processes=args.processes) as ingestor:
+        stats = ingestor.ingest(papers, force=args.force)
+    print(json.dumps(stats, indent=2))
+
+
+def ingest_local(args):
+    stats = LocalIngestor(EmbeddingManager(), processes=args.processes, batch_size=args.batch_size).ingest(args.directory)
+    print(json.dumps(stats, indent=2))
+
+
+def backfill(args):
+    init_db()
+    job = BackfillJob(args.since, args.until, categories=args.categories.split(",") if args.categories else None,
+                      shard_days=args.shard_days, collect_workers=args.workers, processes=args.processes,
+                      write_batch=args.batch_size)
+    print(json.dumps(job.run(fresh=args.fresh), indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest full text into the vector store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    arxiv = commands.add_parser("arxiv", help="Download and index PDFs of stored papers")
+    arxiv.add_argument("--limit", type=int, default=100, help="Most recent papers to process")
+    arxiv.add_argument("--force", action="store_true", help="Re-ingest papers that already have full text")
+    arxiv.add_argument("--workers", type=int, help="Concurrent downloads (default: PDF_DOWNLOAD_WORKERS)")
+    arxiv.add_argument("--processes", type=int, help="Extraction processes (default: PDF_EXTRACT_PROCESSES)")
+    arxiv.set_defaults(func=ingest_arxiv)
+    
+    local = commands.add_parser("local", help="Index PDF, Markdown, HTML and text files under a directory")
+    local.add_argument("directory", type=Path)
+    local.add_argument("--processes", type=int, help="Parser processes (default: LOCAL_INGEST_PROCESSES)")
+    local.add_argument("--batch-size", type=int, help="Chunks per encoder call (default: LOCAL_INGEST_BATCH_SIZE)")
+    local.set_defaults(func=ingest_local)
+    
+    history = commands.add_parser("backfill", help="Collect, embed and store arXiv papers from a past date range")
+    history.add_argument("--since", type=datetime.fromisoformat, required=True, help="First submission date")
+    history.add_argument("--until", type=datetime.fromisoformat, help="End date, exclusive (default: now)")
+    history.add_argument("--categories", help="Comma-separated arXiv categories (default: ARXIV_CATEGORIES)")
+    history.add_argument("--shard-days", type=int, help="Days per shard (default: BACKFILL_SHARD_DAYS)")
+    history.add_argument("--workers", type=int, help="Shards fetched concurrently (default: BACKFILL_COLLECT_WORKERS)")
+    history.add_argument("--processes", type=int, help="Encoder processes (default: one per CPU core)")
+    history.add_argument("--batch-size", type=int, help="Papers per encode and write (default: BACKFILL_WRITE_BATCH)")
+    history.add_argument("--fresh", action="store_true", help="Forget completed shards and start over")
+    history.set_defaults(func=backfill)
+    
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
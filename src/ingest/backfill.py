@@ -0,0 +1,215 @@
+"""
+Resumable historical backfill of arXiv papers
+
+The date range is split into shards of BACKFILL_SHARD_DAYS. Collector
+threads fetch shards concurrently, but every API request goes through one
+pacer that keeps them ARXIV_REQUEST_INTERVAL apart, so extra threads overlap
+network and parsing time without exceeding the request rate arXiv asks for.
+Collected shards are stored in completion order: papers already in the
+database are dropped, and the rest are encoded by an EncoderPool on every CPU
+core and written to the vector index, then the database, BACKFILL_WRITE_BATCH
+papers at a time. A shard is marked complete in BACKFILL_DIR/<job>/run.json
+once written, so an interrupted backfill resumes at the first incomplete
+shard; a shard cut off midway is collected again and its stored papers are
+skipped.
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from src.collectors.arxiv_collector import ArxivCollector
+from src.collectors.citations import base_id
+from src.collectors.records import PaperData
+from src.database.models import Paper, SessionLocal
+from src.models.embeddings import EmbeddingManager, EncoderPool, paper_document
+from src.pipeline.checkpoint import RunCheckpoint
+from src.utils.config import settings
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+Shard = Tuple[datetime, datetime]
+
+
+class RequestPacer:
+    """Spaces wait() returns from any number of threads at least interval seconds apart"""
+    
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+    
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def split_shards(since: datetime, until: datetime, days: int) -> List[Shard]:
+    """[start, end) windows of days covering [since, until), oldest first"""
+    shards = []
+    start = since
+    while start < until:
+        end = min(start + timedelta(days=days), until)
+        shards.append((start, end))
+        start = end
+    return shards
+
+
+def shard_key(shard: Shard) -> str:
+    return f"shard-{shard[0]:%Y%m%d}-{shard[1]:%Y%m%d}"
+
+
+class BackfillJob:
+    """
+    Collects, encodes and stores every paper submitted in [since, until)
+    
+    Args:
+        since: First submission date
+        until: End of the range, exclusive (default: now)
+        categories: arXiv categories (default ARXIV_CATEGORIES)
+        shard_days: Days per shard (default BACKFILL_SHARD_DAYS)
+        collect_workers: Shards fetched concurrently (default BACKFILL_COLLECT_WORKERS)
+        processes: Encoder processes (default BACKFILL_ENCODE_PROCESSES, 0 = one per core)
+        write_batch: Papers per encoder call and store write (default BACKFILL_WRITE_BATCH)
+        fetch: Callable (start, end, before_request) -> PaperData iterable
+            (default: ArxivCollector.iter_date_range)
+    """
+    
+    def __init__(self, since: datetime, until: Optional[datetime] = None, categories: Optional[List[str]] = None,
+                 shard_days: Optional[int] = None, collect_workers: Optional[int] = None,
+                 processes: Optional[int] = None, write_batch: Optional[int] = None,
+                 embedding_manager: Optional[EmbeddingManager] = None, session_factory: Callable = SessionLocal,
+                 fetch: Optional[Callable[[datetime, datetime, Callable], Iterable[PaperData]]] = None):
+        self.since = since
+        self.until = until or datetime.now()
+        self.categories = sorted(categories or settings.ARXIV_CATEGORIES)
+        self.shards = split_shards(self.since, self.until, shard_days or settings.BACKFILL_SHARD_DAYS)
+        self.collect_workers = collect_workers or settings.BACKFILL_COLLECT_WORKERS
+        self.processes = processes or settings.BACKFILL_ENCODE_PROCESSES or None
+        self.write_batch = write_batch or settings.BACKFILL_WRITE_BATCH
+        self.embedding_manager = embedding_manager or EmbeddingManager()
+        self.session_factory = session_factory
+        if fetch is None:
+            collector = ArxivCollector()
+            fetch = lambda start, end, before_request: collector.iter_date_range(
+                start, end, self.categories, before_request=before_request)
+        self.fetch = fetch
+        self.pacer = RequestPacer(settings.ARXIV_REQUEST_INTERVAL)
+        self.job_id = f"arxiv-{self.since:%Y%m%d}-{self.until:%Y%m%d}-{'+'.join(self.categories)}"
+        self.checkpoint = RunCheckpoint(self.job_id, root=settings.BACKFILL_DIR)
+    
+    def _collect(self, shard: Shard) -> List[PaperData]:
+        papers = list(self.fetch(shard[0], shard[1], self.pacer.wait))
+        logger.info(f"Collected {len(papers)} papers for {shard_key(shard)}")
+        return papers
+    
+    def _stored_ids(self, db, shard: Shard) -> Set[str]:
+        """Base IDs of stored papers published around the shard (any stored version)"""
+        margin = timedelta(days=1)
+        rows = db.query(Paper.arxiv_id).filter(Paper.published_date >= shard[0] - margin,
+                                               Paper.published_date < shard[1] + margin)
+        return {base_id(row[0]) for row in rows}
+    
+    def _store(self, shard: Shard, papers: List[PaperData], encoder: EncoderPool) -> int:
+        """Encode and write a shard's new papers in batches, then mark the shard complete"""
+        db = self.session_factory()
+        try:
+            seen = self._stored_ids(db, shard)
+            fresh = []
+            for paper in papers:
+                if base_id(paper.arxiv_id) not in seen:
+                    seen.add(base_id(paper.arxiv_id))
+                    fresh.append(paper)
+            now = datetime.now(timezone.utc)
+            for lo in range(0, len(fresh), self.write_batch):
+                batch = fresh[lo:lo + self.write_batch]
+                documents = [paper_document(paper.title, paper.abstract) for paper in batch]
+                embeddings = encoder.encode(documents)
+                # Vectors first: upserts are idempotent, while a committed row makes a rerun skip the paper
+                self.embedding_manager.add_items(
+                    "paper", [paper.arxiv_id for paper in batch], documents,
+                    [{"title": paper.title, "url": paper.arxiv_url, "authors": ", ".join(paper.authors[:5])}
+                     for paper in batch],
+                    [paper.published_date for paper in batch], embeddings=embeddings, batch_size=self.write_batch
+                )
+                db.bulk_insert_mappings(Paper, [{
+                    "arxiv_id": paper.arxiv_id,
+                    "title": paper.title,
+                    "authors": ", ".join(paper.authors),
+                    "abstract": paper.abstract,
+                    "categories": ", ".join(paper.categories),
+                    "published_date": paper.published_date,
+                    "arxiv_url": paper.arxiv_url,
+                    "pdf_url": paper.pdf_url,
+                    "citation_count": paper.citation_count,
+                    "collected_date": now,
+                } for paper in batch])
+                db.commit()
+        finally:
+            db.close()
+        self.checkpoint.mark_complete(shard_key(shard))
+        return len(fresh)
+    
+    def run(self, fresh: bool = False) -> Dict:
+        """
+        Backfill every incomplete shard
+        
+        Args:
+            fresh: Forget completed shards and start over
+        
+        Returns:
+            Shard counts (total, already complete, failed), papers collected
+            and stored, and papers stored per second
+        """
+        if fresh:
+            self.checkpoint.reset()
+        todo = [shard for shard in self.shards if not self.checkpoint.is_complete(shard_key(shard))]
+        report = {"job_id": self.job_id, "shards": len(self.shards), "already_complete": len(self.shards) - len(todo),
+                  "collected": 0, "stored": 0, "failed": []}
+        if not todo:
+            logger.info(f"Backfill {self.job_id} is already complete")
+            return report
+        logger.info(f"Backfill {self.job_id}: {len(todo)} of {len(self.shards)} shards to do")
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.collect_workers, thread_name_prefix="backfill") as pool, \
+                EncoderPool(self.embedding_manager, self.processes) as encoder:
+            pending = {}
+            shards = iter(todo)
+            done_shards = 0
+            while True:
+                # One collected shard can wait to be stored while the workers fetch the next ones
+                for shard in shards:
+                    pending[pool.submit(self._collect, shard)] = shard
+                    if len(pending) > self.collect_workers:
+                        break
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    shard = pending.pop(future)
+                    try:
+                        papers = future.result()
+                    except Exception as e:
+                        logger.warning(f"Could not collect {shard_key(shard)}, rerun to retry it: {e}")
+                        report["failed"].append(shard_key(shard))
+                        continue
+                    report["collected"] += len(papers)
+                    report["stored"] += self._store(shard, papers, encoder)
+                    done_shards += 1
+                    elapsed = time.perf_counter() - started
+                    remaining = len(todo) - done_shards - len(report["failed"])
+                    logger.info(f"Backfill {self.job_id}: {done_shards}/{len(todo)} shards, "
+                                f"{report['stored']} papers stored, "
+                                f"ETA {elapsed / done_shards * remaining:.0f}s")
+        elapsed = time.perf_counter() - started
+        report["seconds"] = round(elapsed, 2)
+        report["stored_per_sec"] = round(report["stored"] / elapsed, 2) if elapsed > 0 else 0.0
+        if not report["failed"]:
+            self.checkpoint.finish()
+        return report
@@ -0,0 +1,235 @@
+"""
+Incremental ingestion of local PDF, Markdown, HTML and text files
+
+Files are parsed in a process pool, chunked, and embedded in batches that span
+documents. The local_documents table is the manifest: a file whose mtime and
+size are unchanged is skipped without being read, a touched file whose hash is
+unchanged only has its manifest row refreshed, and files that disappeared have
+their vectors deleted.
+"""
+import hashlib
+import multiprocessing
+import os
+import re
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from src.database.models import LocalDocument, SessionLocal, init_db
+from src.ingest.pdf import extract_pdf_text
+from src.utils.config import settings
+from src.utils.preprocessing import chunk_text, clean_text, extract_text_from_html
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SUFFIXES = {".pdf", ".md", ".markdown", ".html", ".htm", ".txt"}
+
+_HTML_TITLE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+_MD_HEADING = re.compile(r"^#\s+(.+)$", re.MULTILINE)
+_MD_LINK = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+_MD_MARKUP = re.compile(r"^\s{0,3}(#{1,6}|>|[-*+]|\d+\.)\s+|[*_`~]+|<[^>]+>", re.MULTILINE)
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def parse_file(path: str, max_pages: int, max_chars: int) -> Tuple[str, str, str]:
+    """
+    (sha256, title, text) of a local file; runs in a worker process
+    
+    Text formats are read up to 4 * max_chars characters, which leaves room
+    for markup that is stripped before the max_chars cut.
+    """
+    sha = file_hash(path)
+    suffix = Path(path).suffix.lower()
+    title = Path(path).stem
+    if suffix == ".pdf":
+        return sha, title, extract_pdf_text(path, max_pages, max_chars)
+    
+    with open(path, encoding="utf-8", errors="replace") as f:
+        raw = f.read(4 * max_chars)
+    if suffix in (".html", ".htm"):
+        match = _HTML_TITLE.search(raw)
+        if match:
+            title = clean_text(match.group(1)) or title
+        text = extract_text_from_html(raw)
+    elif suffix in (".md", ".markdown"):
+        match = _MD_HEADING.search(raw)
+        if match:
+            title = match.group(1).strip()
+        text = clean_text(_MD_MARKUP.sub(" ", _MD_LINK.sub(r"\1", raw)))
+    else:
+        text = clean_text(raw)
+    return sha, title, text[:max_chars]
+
+
+def _doc_id(path: str) -> str:
+    return hashlib.sha1(path.encode("utf-8")).hexdigest()[:16]
+
+
+class LocalIngestor:
+    """Mirrors a directory tree into the vector store as "document" chunks"""
+    
+    def __init__(self, embedding_manager, processes: Optional[int] = None, batch_size: Optional[int] = None):
+        self.embedding_manager = embedding_manager
+        self.processes = processes or settings.LOCAL_INGEST_PROCESSES
+        self.batch_size = batch_size or settings.LOCAL_INGEST_BATCH_SIZE
+        self.stats: Counter = Counter()
+    
+    def scan(self, root: Path) -> Iterator[Tuple[str, os.stat_result]]:
+        """Supported files under root (hidden files and directories skipped)"""
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+            for name in sorted(filenames):
+                if name.startswith(".") or Path(name).suffix.lower() not in SUFFIXES:
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    yield path, os.stat(path)
+                except OSError:
+                    continue
+    
+    def ingest(self, root: Path) -> Dict:
+        """
+        Bring the vector store in line with the files under root
+        
+        Returns:
+            Counts of new, updated, unchanged, touched (hash unchanged), removed,
+            skipped and failed files, and chunks stored
+        """
+        root = Path(root).resolve()
+        if not root.is_dir():
+            raise ValueError(f"Not a directory: {root}")
+        self.stats = Counter()
+        init_db()
+        db = SessionLocal()
+        try:
+            prefix = str(root) + os.sep
+            manifest = {row.path: row for row in db.query(LocalDocument).all() if row.path.startswith(prefix)}
+            
+            todo = []
+            seen = set()
+            for path, stat in self.scan(root):
+                seen.add(path)
+                row = manifest.get(path)
+                if stat.st_size > settings.LOCAL_MAX_FILE_BYTES:
+                    logger.warning(f"Skipping {path}: larger than {settings.LOCAL_MAX_FILE_BYTES} bytes")
+                    self.stats["skipped"] += 1
+                elif row is not None and row.mtime_ns == stat.st_mtime_ns and row.size == stat.st_size:
+                    self.stats["unchanged"] += 1
+                else:
+                    todo.append((path, stat))
+            
+            for path in set(manifest) - seen:
+                self._remove(db, manifest.pop(path))
+            db.commit()
+            
+            self._process(db, todo, manifest)
+        finally:
+            db.close()
+        logger.info(f"Local ingestion of {root}: {dict(self.stats)}")
+        return dict(self.stats)
+    
+    def _remove(self, db, row: LocalDocument):
+        self.embedding_manager.delete_chunks("document", row.doc_id, row.published_date)
+        db.delete(row)
+        self.stats["removed"] += 1
+    
+    def _parsed(self, todo: List[Tuple[str, os.stat_result]]) -> Iterator[Tuple[str, os.stat_result, Optional[Tuple]]]:
+        """Parse results as they complete, with a bounded number of files in flight"""
+        # Spawned, not forked, so workers do not inherit the encoder or open database handles
+        with ProcessPoolExecutor(max_workers=self.processes,
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            pending = {}
+            files = iter(todo)
+            while True:
+                for path, stat in files:
+                    future = pool.submit(parse_file, path, settings.LOCAL_MAX_PAGES, settings.LOCAL_MAX_CHARS)
+                    pending[future] = (path, stat)
+                    if len(pending) >= self.processes * 4:
+                        break
+                if not pending:
+                    return
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path, stat = pending.pop(future)
+                    try:
+                        yield path, stat, future.result()
+                    except Exception as e:
+                        logger.warning(f"Could not parse {path}: {e}")
+                        yield path, stat, None
+    
+    def _process(self, db, todo: List[Tuple[str, os.stat_result]], manifest: Dict[str, LocalDocument]):
+        batch: List[Tuple[str, os.stat_result, str, str, List[str]]] = []
+        buffered = 0
+        for path, stat, parsed in self._parsed(todo):
+            if parsed is None:
+                # Recorded without a hash, so an unreadable file is retried only once it changes
+                self.stats["failed"] += 1
+                batch.append((path, stat, None, Path(path).stem, []))
+                continue
+            sha, title, text = parsed
+            row = manifest.get(path)
+            if row is not None and row.sha256 == sha:
+                # Touched but identical: refresh the manifest so the next run skips it unread
+                row.mtime_ns, row.size = stat.st_mtime_ns, stat.st_size
+                self.stats["touched"] += 1
+                continue
+            chunks = chunk_text(text)
+            if not chunks:
+                self.stats["empty"] += 1
+            batch.append((path, stat, sha, title, chunks))
+            buffered += len(chunks)
+            if buffered >= self.batch_size:
+                self._flush(db, batch, manifest)
+                batch, buffered = [], 0
+        self._flush(db, batch, manifest)
+    
+    def _flush(self, db, batch: List[Tuple[str, os.stat_result, str, str, List[str]]],
+               manifest: Dict[str, LocalDocument]):
+        """Encode every buffered chunk in one pass, store per document, commit the manifest"""
+        texts = [chunk for *_, chunks in batch for chunk in chunks]
+        embeddings = []
+        for lo in range(0, len(texts), self.batch_size):
+            embeddings.extend(self.embedding_manager.generate_embeddings(
+                texts[lo:lo + self.batch_size], show_progress_bar=False
+            ))
+        
+        offset = 0
+        # Dated by ingestion rather than mtime, so a tree of old files does not fan out over many partitions
+        published_date = datetime.now()
+        for path, stat, sha, title, chunks in batch:
+            row = manifest.get(path)
+            doc_id = row.doc_id if row is not None else _doc_id(path)
+            if row is not None:
+                # Old chunks may live in an earlier month's partition
+                self.embedding_manager.delete_chunks("document", doc_id, row.published_date)
+            if chunks:
+                self.embedding_manager.add_chunks(
+                    "document", doc_id, chunks,
+                    {"title": title, "path": path, "source": "local"},
+                    published_date=published_date,
+                    embeddings=embeddings[offset:offset + len(chunks)]
+                )
+            offset += len(chunks)
+            
+            if row is None:
+                row = LocalDocument(path=path, doc_id=doc_id)
+                db.add(row)
+                manifest[path] = row
+            if sha:
+                self.stats["updated" if row.sha256 else "new"] += 1
+            row.mtime_ns, row.size, row.sha256, row.title = stat.st_mtime_ns, stat.st_size, sha, title
+            row.chunks = len(chunks)
+            row.published_date = published_date
+            row.ingested_date = datetime.now(timezone.utc)
+            self.stats["chunks"] += len(chunks)
+        db.commit()
@@ -0,0 +1,253 @@
+"""
+ArXiv PDF full-text ingestion
+
+Download (threads, streamed to a capped on-disk cache) -> extract text (process
+pool) -> chunk -> batched embedding -> EmbeddingManager.add_chunks under the
+paper's ID. At most one capped PDF and one capped text per download worker is
+in flight, so memory stays bounded regardless of PDF size.
+"""
+import multiprocessing
+import os
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+import requests
+from src.utils import instrumentation
+from src.utils.config import settings
+from src.utils.preprocessing import chunk_text, clean_text
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9._-]")
+
+
+class PdfTooLarge(Exception):
+    """The download exceeded PDF_MAX_BYTES"""
+
+
+def extract_pdf_text(path: str, max_pages: int, max_chars: int) -> str:
+    """
+    Text of the first max_pages pages, stopping once max_chars is reached
+    
+    Runs in a worker process: pypdf is pure Python and CPU-bound, and a
+    pathological PDF that crashes its worker fails only that paper.
+    """
+    from pypdf import PdfReader
+    
+    reader = PdfReader(path)
+    parts, size = [], 0
+    for page in reader.pages[:max_pages]:
+        text = clean_text(page.extract_text() or "")
+        parts.append(text)
+        size += len(text) + 1
+        if size >= max_chars:
+            break
+    return " ".join(parts)[:max_chars]
+
+
+class PdfDownloader:
+    """Streams PDFs into an on-disk cache with a byte cap and retries"""
+    
+    def __init__(self, cache_dir: Optional[Path] = None, max_bytes: Optional[int] = None,
+                 retries: Optional[int] = None, timeout: Optional[float] = None,
+                 backoff: Optional[float] = None):
+        self.cache_dir = Path(cache_dir or settings.PDF_CACHE_DIR)
+        self.max_bytes = max_bytes or settings.PDF_MAX_BYTES
+        self.retries = settings.PDF_DOWNLOAD_RETRIES if retries is None else retries
+        self.timeout = timeout or settings.PDF_DOWNLOAD_TIMEOUT
+        self.backoff = settings.PDF_RETRY_BACKOFF if backoff is None else backoff
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._session = requests.Session()
+    
+    def path_for(self, key: str) -> Path:
+        # Old-style arXiv IDs contain "/" (e.g. cs/0112017v1)
+        return self.cache_dir / f"{_UNSAFE_CHARS.sub('_', key)}.pdf"
+    
+    def fetch(self, key: str, url: str) -> Optional[Path]:
+        """
+        Cached path of the PDF, downloading it if needed
+        
+        Returns:
+            Path to the PDF, or None if it is too large or could not be fetched
+        """
+        path = self.path_for(key)
+        if path.exists():
+            return path
+        
+        part = path.with_suffix(f".{os.getpid()}.{id(self)}.part")
+        for attempt in range(self.retries + 1):
+            try:
+                self._download(url, part)
+                os.replace(part, path)
+                return path
+            except PdfTooLarge:
+                logger.info(f"Skipping {key}: PDF larger than {self.max_bytes} bytes")
+                return None
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                # Client errors other than rate limiting will not go away on retry
+                if status is not None and status < 500 and status != 429:
+                    instrumentation.HTTP_ERRORS.inc(source="arxiv_pdf")
+                    logger.warning(f"Could not download {url}: HTTP {status}")
+                    return None
+                error = e
+            except (requests.RequestException, OSError) as e:
+                error = e
+            finally:
+                part.unlink(missing_ok=True)
+            instrumentation.HTTP_ERRORS.inc(source="arxiv_pdf")
+            if attempt < self.retries:
+                time.sleep(self.backoff * 2 ** attempt)
+        logger.warning(f"Could not download {url} after {self.retries + 1} attempts: {error}")
+        return None
+    
+    def _download(self, url: str, part: Path):
+        with instrumentation.HTTP_REQUEST_SECONDS.time(source="arxiv_pdf"):
+            with self._session.get(url, stream=True, timeout=self.timeout) as response:
+                response.raise_for_status()
+                declared = int(response.headers.get("Content-Length") or 0)
+                if declared > self.max_bytes:
+                    raise PdfTooLarge()
+                written = 0
+                with open(part, "wb") as f:
+                    for block in response.iter_content(chunk_size=64 * 1024):
+                        written += len(block)
+                        if written > self.max_bytes:
+                            raise PdfTooLarge()
+                        f.write(block)
+        instrumentation.HTTP_RESPONSE_BYTES.observe(written, source="arxiv_pdf")
+    
+    def prune(self, max_mb: Optional[int] = None) -> int:
+        """Delete the least recently downloaded PDFs beyond the cache budget; returns files removed"""
+        budget = (max_mb or settings.PDF_CACHE_MAX_MB) * 1024 * 1024
+        files = sorted(self.cache_dir.glob("*.pdf"), key=lambda p: p.stat().st_mtime, reverse=True)
+        total, removed = 0, 0
+        for path in files:
+            total += path.stat().st_size
+            if total > budget:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+
+class FullTextIngestor:
+    """
+    Adds full-text chunks of papers to the vector store
+    
+    Works with PaperData or Paper rows (anything with arxiv_id, pdf_url, title,
+    arxiv_url and published_date). Use as a context manager so the extraction
+    processes are started once and shut down afterwards.
+    """
+    
+    def __init__(self, embedding_manager, downloader: Optional[PdfDownloader] = None,
+                 download_workers: Optional[int] = None, extract_processes: Optional[int] = None):
+        self.embedding_manager = embedding_manager
+        self.downloader = downloader or PdfDownloader()
+        self.download_workers = download_workers or settings.PDF_DOWNLOAD_WORKERS
+        self.extract_processes = extract_processes or settings.PDF_EXTRACT_PROCESSES
+        self.stats: Counter = Counter()
+        self._stats_lock = threading.Lock()
+        self._pool_lock = threading.Lock()
+        self._extractors: Optional[ProcessPoolExecutor] = None
+    
+    def _start_extractors(self):
+        # Spawned, not forked: the parent has encoder and pipeline threads running
+        self._extractors = ProcessPoolExecutor(
+            max_workers=self.extract_processes,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    
+    def __enter__(self) -> "FullTextIngestor":
+        self._start_extractors()
+        return self
+    
+    def __exit__(self, *exc):
+        self._extractors.shutdown(wait=True, cancel_futures=True)
+        self._extractors = None
+        self.downloader.prune()
+        return False
+    
+    def _count(self, key: str, n: int = 1):
+        with self._stats_lock:
+            self.stats[key] += n
+    
+    def ingest_paper(self, paper, force: bool = False) -> int:
+        """
+        Download, extract, chunk and embed one paper (thread-safe)
+        
+        Returns:
+            Number of chunks stored (0 if skipped or failed)
+        """
+        if self._extractors is None:
+            raise RuntimeError("FullTextIngestor must be used as a context manager")
+        if not getattr(paper, "pdf_url", None):
+            self._count("no_pdf")
+            return 0
+        if not force and self.embedding_manager.has_chunks("paper", paper.arxiv_id, paper.published_date):
+            self._count("already_ingested")
+            return 0
+        
+        path = self.downloader.fetch(paper.arxiv_id, paper.pdf_url)
+        if path is None:
+            self._count("download_failed")
+            return 0
+        extractors = self._extractors
+        try:
+            text = extractors.submit(
+                extract_pdf_text, str(path), settings.PDF_MAX_PAGES, settings.PDF_MAX_CHARS
+            ).result()
+        except BrokenProcessPool:
+            logger.warning(f"Text extraction crashed on {paper.arxiv_id}; restarting extraction processes")
+            with self._pool_lock:
+                if self._extractors is extractors:
+                    extractors.shutdown(wait=False, cancel_futures=True)
+                    self._start_extractors()
+            self._count("extract_failed")
+            return 0
+        except Exception as e:
+            # Corrupt PDFs stay cached so they are not downloaded again on every run
+            logger.warning(f"Could not extract text from {paper.arxiv_id}: {e}")
+            self._count("extract_failed")
+            return 0
+        
+        chunks = chunk_text(text)
+        if not chunks:
+            self._count("empty")
+            return 0
+        stored = self.embedding_manager.add_chunks(
+            "paper", paper.arxiv_id, chunks,
+            {"title": paper.title, "url": paper.arxiv_url, "source": "pdf"},
+            published_date=paper.published_date,
+            batch_size=settings.PDF_EMBED_BATCH_SIZE
+        )
+        self._count("ingested")
+        self._count("chunks", stored)
+        return stored
+    
+    def ingest(self, papers: Iterable, force: bool = False) -> Dict:
+        """
+        Ingest many papers with download_workers in flight at a time
+        
+        Returns:
+            Counts of ingested, skipped and failed papers and stored chunks
+        """
+        with ThreadPoolExecutor(max_workers=self.download_workers, thread_name_prefix="pdf") as pool:
+            pending = set()
+            for paper in papers:
+                pending.add(pool.submit(self.ingest_paper, paper, force))
+                # Bounded window: papers are read lazily from the iterable
+                if len(pending) >= self.download_workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+            for future in pending:
+                future.result()
+        logger.info(f"Full-text ingestion: {dict(self.stats)}")
+        return dict(self.stats)
@@ -1,6 +1,12 @@
-from .embeddings import EmbeddingManager
+from .embeddings import EmbeddingManager, EncoderPool
 from .recommender import Recommender
 from .feature_extractor import FeatureExtractor
+from .feature_store import FeatureStore, FeatureMatrix
+from .dedup import NearDuplicateDetector
+from .profiles import ProfileStore, ProfileMatrix
+from .reembed import ReembedJob
+from .reconcile import Reconciler
 
-__all__ = ["EmbeddingManager", "Recommender", "FeatureExtractor"]
+__all__ = ["EmbeddingManager", "Recommender", "FeatureExtractor", "NearDuplicateDetector", "ProfileStore", "ProfileMatrix",
+           "ReembedJob", "FeatureStore", "FeatureMatrix", "Reconciler", "EncoderPool"]
 
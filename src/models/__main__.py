@@ -0,0 +1,97 @@
+"""
+Vector index and ranking model maintenance:
+    python -m src.models reembed [--model NAME] [--batch-size N]
+    python -m src.models reembed --drop-previous
+    python -m src.models status
+    python -m src.models reconcile [--dry-run] [--batch-size N]
+    python -m src.models features [--compact]
+    python -m src.models retrain [--user NAME]
+"""
+import argparse
+import json
+from src.database import SessionLocal, UserProfile, init_db
+from src.models.embeddings import EmbeddingManager
+from src.models.feature_store import FeatureStore, interaction_labels
+from src.models.profiles import DEFAULT_PROFILE
+from src.models.recommender import Recommender
+from src.models.reconcile import Reconciler
+from src.models.reembed import ReembedJob
+
+
+def reembed(args):
+    job = ReembedJob(model_name=args.model, batch_size=args.batch_size)
+    if args.drop_previous:
+        print(json.dumps({"dropped_collections": job.drop_previous()}, indent=2))
+    else:
+        print(json.dumps(job.run(), indent=2))
+
+
+def status(args):
+    print(json.dumps(EmbeddingManager().version_status(), indent=2))
+
+
+def reconcile(args):
+    init_db()
+    print(json.dumps(Reconciler(batch_size=args.batch_size, dry_run=args.dry_run).run(), indent=2))
+
+
+def _feature_store() -> FeatureStore:
+    # Follows the active index version, whose model produced the stored similarities
+    return FeatureStore.for_model(EmbeddingManager().model_name)
+
+
+def features(args):
+    store = _feature_store()
+    if args.compact:
+        for kind in ("paper", "article"):
+            store.compact(kind)
+    print(json.dumps(store.stats(), indent=2))
+
+
+def retrain(args):
+    init_db()
+    db = SessionLocal()
+    try:
+        labels = interaction_labels(db)
+        profile_id = db.query(UserProfile.id).filter(UserProfile.name == args.user).scalar()
+    finally:
+        db.close()
+    if profile_id is None:
+        raise SystemExit(f"Unknown user: {args.user}")
+    rows = Recommender().update_model_from_store(_feature_store(), labels, profile_id)
+    print(json.dumps({"training_rows": rows, "labelled": {kind: len(keys) for kind, keys in labels.items()}}, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vector index and ranking model maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    job = commands.add_parser("reembed", help="Re-embed the index with a new model, then cut over")
+    job.add_argument("--model", help="Target model (default: EMBEDDING_MODEL)")
+    job.add_argument("--batch-size", type=int, help="Items per page (default: REEMBED_BATCH_SIZE)")
+    job.add_argument("--drop-previous", action="store_true",
+                     help="Copy late writes from the previous version, then delete it")
+    job.set_defaults(func=reembed)
+    
+    show = commands.add_parser("status", help="Show index versions and migration progress")
+    show.set_defaults(func=status)
+    
+    check = commands.add_parser("reconcile", help="Index rows missing from the vector store, delete orphaned vectors")
+    check.add_argument("--dry-run", action="store_true", help="Only report what would change")
+    check.add_argument("--batch-size", type=int, help="Rows or vectors per page (default: RECONCILE_BATCH_SIZE)")
+    check.set_defaults(func=reconcile)
+    
+    store = commands.add_parser("features", help="Show feature store contents")
+    store.add_argument("--compact", action="store_true", help="Merge each kind's segments into one first")
+    store.set_defaults(func=features)
+    
+    train = commands.add_parser("retrain", help="Retrain the ranker on stored features of items with interactions")
+    train.add_argument("--user", default=DEFAULT_PROFILE, help="Profile whose similarity feature is used")
+    train.set_defaults(func=retrain)
+    
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Cross-source near-duplicate detection with MinHash/LSH
+"""
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Optional, Tuple, Iterable
+import numpy as np
+from src.database.models import ArticleSignature
+from src.utils.config import settings
+from src.utils.preprocessing import tokenize_words
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Largest prime below 2**32, so (a * x + b) fits in uint64 for 32-bit x
+_MERSENNE_PRIME = np.uint64(4294967291)
+_MAX_HASH = np.uint32(0xFFFFFFFF)
+
+
+class MinHasher:
+    """Computes MinHash signatures over word shingles"""
+    
+    def __init__(self, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # Fixed seed: signatures are persisted and must stay comparable across runs
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+    
+    def shingles(self, text: str) -> np.ndarray:
+        """Stable 32-bit hashes of the word shingles in text"""
+        words = tokenize_words(text)
+        k = self.shingle_size
+        if len(words) < k:
+            grams = [" ".join(words)] if words else []
+        else:
+            grams = {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+        return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64)
+    
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature (uint32 array of length num_perm)"""
+        hashes = self.shingles(text)
+        if hashes.size == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        # (num_perm, n_shingles) permuted hashes, min over shingles
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME
+        return permuted.min(axis=1).astype(np.uint32)
+    
+    @staticmethod
+    def jaccard(sig1: np.ndarray, sig2: np.ndarray) -> float:
+        """Estimated Jaccard similarity between two signatures"""
+        return float(np.count_nonzero(sig1 == sig2)) / len(sig1)
+
+
+class LSHIndex:
+    """Banded LSH index over MinHash signatures"""
+    
+    def __init__(self, num_perm: int = 128, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(bands)]
+        self._signatures: Dict[str, np.ndarray] = {}
+    
+    def __len__(self):
+        return len(self._signatures)
+    
+    def __contains__(self, key: str):
+        return key in self._signatures
+    
+    def _band_keys(self, signature: np.ndarray) -> Iterable[bytes]:
+        for band in range(self.bands):
+            yield signature[band * self.rows:(band + 1) * self.rows].tobytes()
+    
+    def insert(self, key: str, signature: np.ndarray):
+        """Add a signature under key"""
+        self._signatures[key] = signature
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            buckets.setdefault(band_key, []).append(key)
+    
+    def query(self, signature: np.ndarray) -> List[str]:
+        """Candidate keys sharing at least one band with signature"""
+        candidates = set()
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(buckets.get(band_key, ()))
+        return list(candidates)
+    
+    def get(self, key: str) -> Optional[np.ndarray]:
+        return self._signatures.get(key)
+
+
+class NearDuplicateDetector:
+    """Clusters incoming articles against each other and recent history"""
+    
+    def __init__(self, num_perm: Optional[int] = None, bands: Optional[int] = None,
+                 threshold: Optional[float] = None, shingle_size: Optional[int] = None):
+        num_perm = num_perm or settings.DEDUP_NUM_PERM
+        self.threshold = settings.DEDUP_THRESHOLD if threshold is None else threshold
+        self.hasher = MinHasher(num_perm, shingle_size or settings.DEDUP_SHINGLE_SIZE)
+        self.index = LSHIndex(num_perm, bands or settings.DEDUP_BANDS)
+        # key -> representative key of its cluster
+        self._cluster_of: Dict[str, str] = {}
+        self._pending: List[ArticleSignature] = []
+    
+    def load_history(self, db, days: Optional[int] = None) -> int:
+        """
+        Load recent signatures from the database into the LSH index
+        
+        Args:
+            db: SQLAlchemy session
+            days: Lookback window in days
+        
+        Returns:
+            Number of signatures loaded
+        """
+        days = days or settings.DEDUP_LOOKBACK_DAYS
+        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+        
+        count = 0
+        rows = (db.query(ArticleSignature.url, ArticleSignature.signature, ArticleSignature.cluster_url)
+                .filter(ArticleSignature.collected_date >= cutoff)
+                .yield_per(1000))
+        for url, blob, cluster_url in rows:
+            if url in self.index:
+                continue
+            signature = np.frombuffer(blob, dtype="<u4").astype(np.uint32)
+            if len(signature) != self.hasher.num_perm:
+                continue  # Written with different settings
+            self.index.insert(url, signature)
+            self._cluster_of[url] = cluster_url or url
+            count += 1
+        
+        logger.info(f"Loaded {count} article signatures into the dedup index")
+        return count
+    
+    def signature(self, article) -> np.ndarray:
+        """Signature over an article's title and content"""
+        return self.hasher.signature(f"{article.title} {getattr(article, 'content', '') or ''}")
+    
+    def find_duplicate(self, signature: np.ndarray) -> Optional[str]:
+        """Return the cluster representative for the best match above threshold"""
+        best_key, best_score = None, self.threshold
+        for key in self.index.query(signature):
+            score = MinHasher.jaccard(signature, self.index.get(key))
+            if score >= best_score:
+                best_key, best_score = key, score
+        if best_key is None:
+            return None
+        return self._cluster_of.get(best_key, best_key)
+    
+    def deduplicate(self, articles: List) -> Tuple[List, Dict[str, List]]:
+        """
+        Split articles into cluster representatives and duplicates
+        
+        Items are clustered against each other and against the loaded history.
+        Longer copies are preferred as representatives within a batch; items that
+        match history are treated as duplicates of the stored representative.
+        
+        Args:
+            articles: ArticleData objects (anything with url, title, content)
+        
+        Returns:
+            (representatives, duplicates) where duplicates maps a representative
+            URL to the list of articles folded into it
+        """
+        representatives = []
+        duplicates: Dict[str, List] = {}
+        
+        ordered = sorted(articles, key=lambda a: len(getattr(a, "content", "") or ""), reverse=True)
+        for article in ordered:
+            if article.url in self.index:
+                duplicates.setdefault(self._cluster_of[article.url], []).append(article)
+                continue
+            
+            signature = self.signature(article)
+            cluster = self.find_duplicate(signature)
+            if cluster is None:
+                cluster = article.url
+                representatives.append(article)
+            else:
+                duplicates.setdefault(cluster, []).append(article)
+            
+            self.index.insert(article.url, signature)
+            self._cluster_of[article.url] = cluster
+            self._pending.append(ArticleSignature(
+                url=article.url,
+                source=getattr(article, "source", None),
+                signature=signature.astype("<u4").tobytes(),
+                cluster_url=cluster
+            ))
+        
+        n_dupes = sum(len(v) for v in duplicates.values())
+        logger.info(f"Dedup: {len(representatives)} representatives, {n_dupes} duplicates")
+        return representatives, duplicates
+    
+    def save(self, db):
+        """Persist signatures computed since the last save"""
+        if not self._pending:
+            return
+        known = {url for (url,) in db.query(ArticleSignature.url)
+                 .filter(ArticleSignature.url.in_([s.url for s in self._pending]))}
+        db.add_all([s for s in self._pending if s.url not in known])
+        db.commit()
+        self._pending = []
@@ -1,56 +1,301 @@
 """
 Embedding utilities for vector search
 """
+import inspect
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 import chromadb
 from chromadb.config import Settings
 from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Optional
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+from src.models.flat_index import FlatClient
+from src.models.versioning import IndexVersion, VersionRegistry
 from src.utils.config import settings
+from src.utils import instrumentation
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+PARTITION_TYPES = ("paper", "article", "document")
+
+
+def _naive_utc(date: datetime) -> datetime:
+    if date.tzinfo is not None:
+        return date.astimezone(timezone.utc).replace(tzinfo=None)
+    return date
+
+
+def month_key(date: Optional[datetime] = None) -> str:
+    """Partition key (YYYYMM) for a publication date; undated items go to the current month"""
+    date = _naive_utc(date or datetime.now())
+    return f"{date.year:04d}{date.month:02d}"
+
+
+def _where(conditions: List[Dict]) -> Optional[Dict]:
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+def _months_between(older: str, newer: str) -> int:
+    return (int(newer[:4]) * 12 + int(newer[4:])) - (int(older[:4]) * 12 + int(older[4:]))
+
+
+def paper_document(title: str, abstract: str) -> str:
+    """Text a paper is embedded and stored as"""
+    return f"{title}\n\n{abstract}"
+
+
+def article_document(title: str, content: str) -> str:
+    """Text an article is embedded and stored as (title and the start of the content)"""
+    return f"{title}\n\n{(content or '')[:1000]}"
+
 
 class EmbeddingManager:
-    """Manages embeddings and vector database"""
+    """
+    Manages embeddings and vector database
+    
+    With VECTOR_DB_PARTITIONING="monthly", vectors live in one Chroma collection
+    per type and publication month (<collection>-<type>-<YYYYMM>). Searches only
+    query partitions overlapping the requested date range, and retention drops
+    whole partitions. A pre-partitioning collection is still searched until
+    migrate_legacy() moves its contents.
+    
+    VECTOR_DB_BACKEND="flat" swaps Chroma for the memory-mapped exact index in
+    flat_index.py behind the same client/collection calls.
+    
+    Collections are versioned by embedding model (see versioning.py). The
+    manager uses the registry's active version and its model, even when
+    EMBEDDING_MODEL names a newer one, until a re-embedding job cuts over;
+    searches then switch to the new version on their next call.
+    """
+    
+    def __init__(self, persist_dir: Optional[Path] = None, collection_name: Optional[str] = None,
+                 model=None, partitioning: Optional[str] = None, backend: Optional[str] = None,
+                 version: Optional[IndexVersion] = None):
+        self.backend = backend or settings.VECTOR_DB_BACKEND
+        persist_dir = Path(persist_dir or settings.VECTOR_DB_DIR)
+        index_dir = persist_dir / "flat" if self.backend == "flat" else persist_dir
+        self.base_name = collection_name or settings.VECTOR_DB_COLLECTION_NAME
+        self.versions = VersionRegistry(index_dir, self.base_name)
+        # A pinned version (a re-embedding job's shadow) does not follow the registry
+        self._pinned = version is not None
+        self.version = version or self.versions.active(settings.EMBEDDING_MODEL)
+        self._registry_stamp = self.versions.stamp()
+        self.model_name = self.version.model
+        if not self._pinned and self.model_name != settings.EMBEDDING_MODEL:
+            logger.warning(f"EMBEDDING_MODEL is {settings.EMBEDDING_MODEL} but the index was built with "
+                           f"{self.model_name}; serving the old model until `python -m src.models reembed` cuts over")
+        # Any object with SentenceTransformer's encode() works (benchmarks use an offline encoder)
+        self._owns_model = model is None
+        self.model = model if model is not None else SentenceTransformer(self.model_name)
+        
+        if self.backend == "flat":
+            # Same client/collection interface, backed by memory-mapped matrices
+            self.client = FlatClient(index_dir)
+        elif self.backend == "chroma":
+            # Initialize ChromaDB
+            self.client = chromadb.PersistentClient(
+                path=str(persist_dir),
+                settings=Settings(anonymized_telemetry=False)
+            )
+        else:
+            raise ValueError(f"Unknown VECTOR_DB_BACKEND: {self.backend}")
+        self.collection_name = self.version.name
+        self.partitioning = partitioning or settings.VECTOR_DB_PARTITIONING
+        if self.partitioning not in ("monthly", "none"):
+            raise ValueError(f"Unknown VECTOR_DB_PARTITIONING: {self.partitioning}")
+        
+        self._partition_lock = threading.Lock()
+        self._switch_lock = threading.Lock()
+        self._search_pool: Optional[ThreadPoolExecutor] = None
+        self._generation = 0
+        self._generation_lock = threading.Lock()
+        # Rewritten on every write so other processes (API vs pipeline) see the change
+        self._stamp_path = index_dir / f"{self.base_name}.generation"
+        self.collection, self._partitions = self._open_collections(self.version)
+    
+    def _open_collections(self, version: IndexVersion) -> Tuple[object, Dict[Tuple[str, str], object]]:
+        """A version's unpartitioned collection (None if absent when partitioned) and its partitions"""
+        if self.partitioning == "none":
+            # Get or create collection
+            collection = self.client.get_or_create_collection(
+                name=version.name,
+                metadata={"hnsw:space": "cosine", "embedding_model": version.model}
+            )
+            return collection, {}
+        return self._existing_collection(version.name), self._load_partitions(version.name)
     
-    def __init__(self):
-        self.model_name = settings.EMBEDDING_MODEL
-        self.model = SentenceTransformer(self.model_name)
+    def follow_registry(self):
+        """
+        Switch to the registry's active version if a re-embedding job cut over
+        
+        Called at the start of every search, at the cost of one stat() when
+        nothing changed. Writers keep the version they started with so a
+        pipeline run never mixes embeddings from two models in one collection.
+        The new version's model and collections are opened first and swapped
+        in together, so concurrent searches see either version, never a mix.
+        """
+        if self._pinned:
+            return
+        with self._switch_lock:
+            stamp = self.versions.stamp()
+            if stamp == self._registry_stamp:
+                return
+            version = self.versions.active(settings.EMBEDDING_MODEL)
+            if version.name == self.version.name:
+                self._registry_stamp = stamp
+                return
+            model = SentenceTransformer(version.model) if self._owns_model else self.model
+            collection, partitions = self._open_collections(version)
+            with self._partition_lock:
+                self.version = version
+                self.model_name = version.model
+                self.model = model
+                self.collection_name = version.name
+                self.collection = collection
+                self._partitions = partitions
+            self._registry_stamp = stamp
+        self.bump_generation()
+        logger.info(f"Switched to index version {version.name} ({version.model})")
+    
+    def version_status(self) -> Dict:
+        """Active and previous index versions, migration progress, and whether EMBEDDING_MODEL is pending"""
+        status = self.versions.status()
+        active = status.get("active") or {}
+        return {**status, "pending_model": settings.EMBEDDING_MODEL if active.get("model") != settings.EMBEDDING_MODEL else None}
+    
+    def _existing_collection(self, name: str):
+        try:
+            return self.client.get_collection(name)
+        except Exception:
+            return None
+    
+    def _load_partitions(self, name: str) -> Dict[Tuple[str, str], object]:
+        pattern = re.compile(rf"^{re.escape(name)}-({'|'.join(PARTITION_TYPES)})-(\d{{6}})$")
+        partitions = {}
+        for collection in self.client.list_collections():
+            match = pattern.match(collection.name)
+            if match:
+                partitions[(match.group(1), match.group(2))] = collection
+        return partitions
+    
+    def partitions(self, item_type: Optional[str] = None) -> List[Tuple[str, str]]:
+        """(type, YYYYMM) of existing partitions, oldest first"""
+        with self._partition_lock:
+            keys = list(self._partitions)
+        return sorted((k for k in keys if item_type in (None, k[0])), key=lambda k: (k[1], k[0]))
+    
+    def _partition(self, item_type: str, published_date: Optional[datetime]):
+        """Collection that stores an item of this type and date (created on first use)"""
+        if self.partitioning == "none":
+            return self.collection
+        key = (item_type, month_key(published_date))
+        with self._partition_lock:
+            collection = self._partitions.get(key)
+            if collection is None:
+                hnsw = settings.VECTOR_DB_HNSW.get(item_type, {})
+                collection = self.client.get_or_create_collection(
+                    name=f"{self.collection_name}-{key[0]}-{key[1]}",
+                    metadata={"hnsw:space": "cosine", "embedding_model": self.model_name,
+                              **{f"hnsw:{k}": v for k, v in hnsw.items()}}
+                )
+                self._partitions[key] = collection
+            return collection
+    
+    def _search_targets(self, filter_type: Optional[str], since: Optional[datetime],
+                        until: Optional[datetime]) -> List[Tuple[object, Optional[Dict]]]:
+        """(collection, where) pairs to query; filters are only applied where they can exclude anything"""
+        type_condition = [{"type": filter_type}] if filter_type else []
+        date_conditions = []
+        if since:
+            date_conditions.append({"published_ts": {"$gte": int(since.timestamp())}})
+        if until:
+            date_conditions.append({"published_ts": {"$lte": int(until.timestamp())}})
         
-        # Initialize ChromaDB
-        self.client = chromadb.PersistentClient(
-            path=str(settings.VECTOR_DB_DIR),
-            settings=Settings(anonymized_telemetry=False)
-        )
+        if self.partitioning == "none":
+            return [(self.collection, _where(type_condition + date_conditions))]
         
-        # Get or create collection
-        self.collection = self.client.get_or_create_collection(
-            name=settings.VECTOR_DB_COLLECTION_NAME,
-            metadata={"hnsw:space": "cosine"}
-        )
+        low = month_key(since) if since else None
+        high = month_key(until) if until else None
+        with self._partition_lock:
+            partitions = list(self._partitions.items())
+        targets = []
+        for (item_type, month), collection in partitions:
+            if filter_type not in (None, item_type):
+                continue
+            if (low and month < low) or (high and month > high):
+                continue
+            # Partitions hold a single type, and months strictly inside the range need no date filter
+            boundary = month in (low, high)
+            targets.append((collection, _where(date_conditions if boundary else [])))
+        # Legacy vectors carry no publication timestamp, so they only match undated searches
+        if self.collection is not None and since is None and until is None:
+            targets.append((self.collection, _where(type_condition)))
+        return targets
+    
+    @property
+    def generation(self) -> Tuple[int, str]:
+        """
+        Changes whenever vectors are added, updated or deleted
+        
+        Combines an in-process counter with a stamp file that writers in other
+        processes also rewrite, so results cached under one generation are
+        never served after a write. Read it before querying, not after.
+        """
+        try:
+            stamp = self._stamp_path.read_text()
+        except OSError:
+            stamp = ""
+        return self._generation, stamp
+    
+    def bump_generation(self):
+        """Invalidate results cached against the current generation (called after every write)"""
+        with self._generation_lock:
+            self._generation += 1
+            token = f"{os.getpid()}-{self._generation}-{time.time_ns()}"
+        tmp = self._stamp_path.with_name(f"{self._stamp_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp.write_text(token)
+            os.replace(tmp, self._stamp_path)
+        except OSError as e:
+            logger.debug(f"Could not write {self._stamp_path}: {e}")
     
     def generate_embedding(self, text: str) -> List[float]:
         """Generate embedding for a single text"""
-        return self.model.encode(text, show_progress_bar=False).tolist()
+        instrumentation.ENCODER_BATCH_SIZE.observe(1)
+        with instrumentation.ENCODER_SECONDS.time():
+            return self.model.encode(text, show_progress_bar=False).tolist()
     
-    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def generate_embeddings(self, texts: List[str], show_progress_bar: bool = True) -> List[List[float]]:
         """Generate embeddings for multiple texts"""
-        return self.model.encode(texts, show_progress_bar=True).tolist()
+        instrumentation.ENCODER_BATCH_SIZE.observe(len(texts))
+        with instrumentation.ENCODER_SECONDS.time():
+            return self.model.encode(texts, show_progress_bar=show_progress_bar).tolist()
     
-    def add_paper(self, paper_id: str, title: str, abstract: str, metadata: Dict):
-        """Add a paper to the vector database (updates if exists)"""
+    def add_paper(self, paper_id: str, title: str, abstract: str, metadata: Dict,
+                  embedding: Optional[List[float]] = None,
+                  published_date: Optional[datetime] = None):
+        """Add a paper to the vector database (updates if exists), reusing embedding if given"""
         paper_id_str = f"paper_{paper_id}"
+        collection = self._partition("paper", published_date)
+        metadata = {**metadata, "published_ts": int((published_date or datetime.now()).timestamp())}
         
         # Check if already exists
         try:
-            existing = self.collection.get(ids=[paper_id_str])
+            existing = collection.get(ids=[paper_id_str])
             if existing["ids"]:
                 # Update existing
-                text = f"{title}\n\n{abstract}"
-                embedding = self.generate_embedding(text)
-                self.collection.update(
+                text = paper_document(title, abstract)
+                if embedding is None:
+                    embedding = self.generate_embedding(text)
+                collection.update(
                     ids=[paper_id_str],
                     embeddings=[embedding],
                     documents=[text],
@@ -60,16 +305,18 @@ class EmbeddingManager:
                         "paper_id": paper_id
                     }]
                 )
+                self.bump_generation()
                 return
         except Exception:
             pass
         
         # Add new
-        text = f"{title}\n\n{abstract}"
-        embedding = self.generate_embedding(text)
+        text = paper_document(title, abstract)
+        if embedding is None:
+            embedding = self.generate_embedding(text)
         
         try:
-            self.collection.add(
+            collection.add(
                 embeddings=[embedding],
                 documents=[text],
                 metadatas=[{
@@ -80,20 +327,26 @@ class EmbeddingManager:
                 ids=[paper_id_str]
             )
         except Exception as e:
-            logger.debug(f"Error adding paper {paper_id}: {e}")
+            logger.warning(f"Error adding paper {paper_id}: {e}")
+        self.bump_generation()
     
-    def add_article(self, article_id: str, title: str, content: str, metadata: Dict):
-        """Add an article to the vector database (updates if exists)"""
+    def add_article(self, article_id: str, title: str, content: str, metadata: Dict,
+                    embedding: Optional[List[float]] = None,
+                    published_date: Optional[datetime] = None):
+        """Add an article to the vector database (updates if exists), reusing embedding if given"""
         article_id_str = f"article_{article_id}"
+        collection = self._partition("article", published_date)
+        metadata = {**metadata, "published_ts": int((published_date or datetime.now()).timestamp())}
         
         # Check if already exists
         try:
-            existing = self.collection.get(ids=[article_id_str])
+            existing = collection.get(ids=[article_id_str])
             if existing["ids"]:
                 # Update existing
-                text = f"{title}\n\n{content[:1000]}"
-                embedding = self.generate_embedding(text)
-                self.collection.update(
+                text = article_document(title, content)
+                if embedding is None:
+                    embedding = self.generate_embedding(text)
+                collection.update(
                     ids=[article_id_str],
                     embeddings=[embedding],
                     documents=[text],
@@ -103,16 +356,18 @@ class EmbeddingManager:
                         "article_id": article_id
                     }]
                 )
+                self.bump_generation()
                 return
         except Exception:
             pass
         
         # Add new
-        text = f"{title}\n\n{content[:1000]}"
-        embedding = self.generate_embedding(text)
+        text = article_document(title, content)
+        if embedding is None:
+            embedding = self.generate_embedding(text)
         
         try:
-            self.collection.add(
+            collection.add(
                 embeddings=[embedding],
                 documents=[text],
                 metadatas=[{
@@ -123,52 +378,315 @@ class EmbeddingManager:
                 ids=[article_id_str]
             )
         except Exception as e:
-            logger.debug(f"Error adding article {article_id}: {e}")
+            logger.warning(f"Error adding article {article_id}: {e}")
+        self.bump_generation()
+    
+    def add_items(self, item_type: str, item_ids: List[str], documents: List[str], metadatas: List[Dict],
+                  published_dates: List[Optional[datetime]], embeddings: Optional[List[List[float]]] = None,
+                  batch_size: int = 256) -> int:
+        """
+        Upsert many papers or articles at once, as add_paper/add_article would store them
+        
+        Items are grouped by partition and written with one upsert per
+        batch_size items, encoding each batch in one call unless embeddings
+        are given, and the generation is bumped once at the end.
+        
+        Returns:
+            Number of items written
+        """
+        groups: Dict[int, List[int]] = {}
+        collections = {}
+        for i, published_date in enumerate(published_dates):
+            collection = self._partition(item_type, published_date)
+            collections[id(collection)] = collection
+            groups.setdefault(id(collection), []).append(i)
+        for key, indices in groups.items():
+            for lo in range(0, len(indices), batch_size):
+                batch = indices[lo:lo + batch_size]
+                texts = [documents[i] for i in batch]
+                collections[key].upsert(
+                    ids=[f"{item_type}_{item_ids[i]}" for i in batch],
+                    embeddings=([embeddings[i] for i in batch] if embeddings is not None
+                                else self.generate_embeddings(texts, show_progress_bar=False)),
+                    documents=texts,
+                    metadatas=[{
+                        **metadatas[i],
+                        "type": item_type,
+                        f"{item_type}_id": item_ids[i],
+                        "published_ts": int((published_dates[i] or datetime.now()).timestamp()),
+                    } for i in batch]
+                )
+        if item_ids:
+            self.bump_generation()
+        return len(item_ids)
+    
+    def type_collections(self, item_type: str, month: Optional[str] = None) -> List[object]:
+        """
+        Existing collections that may hold items of a type
+        
+        With month (YYYYMM) only that month's partition, if it exists, and the
+        legacy collection are returned.
+        """
+        if self.partitioning == "none":
+            return [self.collection]
+        with self._partition_lock:
+            partitions = [(key, collection) for key, collection in self._partitions.items()
+                          if key[0] == item_type and month in (None, key[1])]
+        collections = [collection for _, collection in sorted(partitions, key=lambda pair: pair[0][1])]
+        if self.collection is not None:
+            collections.append(self.collection)
+        return collections
     
-    def search(self, query: str, n_results: int = 10, filter_type: Optional[str] = None) -> List[Dict]:
+    def add_chunks(self, item_type: str, item_id: str, chunks: List[str], metadata: Dict,
+                   published_date: Optional[datetime] = None, batch_size: int = 64,
+                   embeddings: Optional[List[List[float]]] = None) -> int:
+        """
+        Store an item's chunked full text next to its own entry, replacing earlier chunks
+        
+        Chunks get IDs <type>_<id>_chunk_<n> and the item's type, so type-filtered
+        searches and Q&A retrieve them alongside the item. Chunk 0 records the chunk
+        count, which lets a re-ingest delete leftovers by ID on every backend.
+        Precomputed embeddings (one per chunk) skip encoding.
+        
+        Returns:
+            Number of chunks stored
+        """
+        prefix = f"{item_type}_{item_id}_chunk_"
+        collection = self._partition(item_type, published_date)
+        metadata = {
+            **metadata,
+            "type": item_type,
+            f"{item_type}_id": item_id,
+            "published_ts": int((published_date or datetime.now()).timestamp()),
+        }
+        previous = collection.get(ids=[f"{prefix}0"], include=["metadatas"])
+        old_count = previous["metadatas"][0].get("chunks", 1) if previous["ids"] else 0
+        
+        for lo in range(0, len(chunks), batch_size):
+            batch = chunks[lo:lo + batch_size]
+            collection.upsert(
+                ids=[f"{prefix}{lo + i}" for i in range(len(batch))],
+                embeddings=(embeddings[lo:lo + batch_size] if embeddings is not None
+                            else self.generate_embeddings(batch, show_progress_bar=False)),
+                documents=batch,
+                metadatas=[{**metadata, "chunk": lo + i, **({"chunks": len(chunks)} if lo + i == 0 else {})}
+                           for i in range(len(batch))]
+            )
+        if old_count > len(chunks):
+            collection.delete(ids=[f"{prefix}{i}" for i in range(len(chunks), old_count)])
+        self.bump_generation()
+        return len(chunks)
+    
+    def delete_chunks(self, item_type: str, item_id: str, published_date: Optional[datetime] = None) -> int:
+        """Remove chunks stored by add_chunks; returns how many were deleted"""
+        prefix = f"{item_type}_{item_id}_chunk_"
+        collection = self._partition(item_type, published_date)
+        first = collection.get(ids=[f"{prefix}0"], include=["metadatas"])
+        if not first["ids"]:
+            return 0
+        count = first["metadatas"][0].get("chunks", 1)
+        collection.delete(ids=[f"{prefix}{i}" for i in range(count)])
+        self.bump_generation()
+        return count
+    
+    def has_chunks(self, item_type: str, item_id: str, published_date: Optional[datetime] = None) -> bool:
+        """Whether add_chunks already stored full text for the item"""
+        collection = self._partition(item_type, published_date)
+        return bool(collection.get(ids=[f"{item_type}_{item_id}_chunk_0"], include=[])["ids"])
+    
+    def search(self, query: str, n_results: int = 10, filter_type: Optional[str] = None,
+               since: Optional[datetime] = None, until: Optional[datetime] = None,
+               query_embedding: Optional[List[float]] = None) -> List[Dict]:
         """
         Search the vector database
         
         Args:
             query: Search query text
             n_results: Number of results to return
-            filter_type: Optional filter by "paper" or "article"
+            filter_type: Optional filter by "paper", "article" or "document"
+            since: Only items published at or after this date
+            until: Only items published at or before this date
+            query_embedding: Precomputed embedding of query (skips encoding)
+        
+        Returns:
+            List of search results with metadata, closest first
+        """
+        self.follow_registry()
+        if query_embedding is None:
+            query_embedding = self.generate_embedding(query)
+        targets = self._search_targets(filter_type, since, until)
+        
+        def query_one(target) -> List[Dict]:
+            collection, where = target
+            with instrumentation.VECTOR_QUERY_SECONDS.time():
+                results = collection.query(
+                    query_embeddings=[query_embedding],
+                    n_results=n_results,
+                    where=where
+                )
             
+            # Format results
+            formatted_results = []
+            if results["ids"] and len(results["ids"][0]) > 0:
+                for i in range(len(results["ids"][0])):
+                    formatted_results.append({
+                        "id": results["ids"][0][i],
+                        "document": results["documents"][0][i],
+                        "metadata": results["metadatas"][0][i],
+                        "distance": results["distances"][0][i] if "distances" in results else None
+                    })
+            return formatted_results
+        
+        if len(targets) <= 1:
+            return query_one(targets[0]) if targets else []
+        
+        # Fan out to the partitions and merge their top-k
+        if settings.VECTOR_DB_SEARCH_WORKERS > 1:
+            if self._search_pool is None:
+                self._search_pool = ThreadPoolExecutor(
+                    max_workers=settings.VECTOR_DB_SEARCH_WORKERS,
+                    thread_name_prefix="vector-search"
+                )
+            per_partition = self._search_pool.map(query_one, targets)
+        else:
+            per_partition = map(query_one, targets)
+        merged = [result for results in per_partition for result in results]
+        merged.sort(key=lambda result: result["distance"] if result["distance"] is not None else float("inf"))
+        return merged[:n_results]
+    
+    def apply_retention(self, now: Optional[datetime] = None) -> List[str]:
+        """
+        Drop partitions older than VECTOR_DB_RETENTION_MONTHS for their type
+        
+        Each expired month is removed as a whole collection, so the cost does not
+        depend on how many vectors it holds.
+        
         Returns:
-            List of search results with metadata
+            Names of dropped collections
         """
-        query_embedding = self.generate_embedding(query)
+        if self.partitioning == "none":
+            return []
+        current = month_key(now)
+        dropped = []
+        for item_type, month in self.partitions():
+            keep_months = settings.VECTOR_DB_RETENTION_MONTHS.get(item_type)
+            if keep_months is None or _months_between(month, current) < keep_months:
+                continue
+            name = f"{self.collection_name}-{item_type}-{month}"
+            with self._partition_lock:
+                self._partitions.pop((item_type, month), None)
+            self.client.delete_collection(name)
+            dropped.append(name)
         
-        where = None
-        if filter_type:
-            where = {"type": filter_type}
+        if dropped:
+            self.bump_generation()
+            logger.info(f"Dropped {len(dropped)} expired vector partitions")
+        return dropped
+    
+    def migrate_legacy(self, batch_size: int = 1000) -> int:
+        """
+        Move vectors from the unpartitioned collection into partitions, then drop it
         
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results,
-            where=where
-        )
+        Legacy metadata has no publication date, so items land in the current
+        month's partition.
         
-        # Format results
-        formatted_results = []
-        if results["ids"] and len(results["ids"][0]) > 0:
-            for i in range(len(results["ids"][0])):
-                formatted_results.append({
-                    "id": results["ids"][0][i],
-                    "document": results["documents"][0][i],
-                    "metadata": results["metadatas"][0][i],
-                    "distance": results["distances"][0][i] if "distances" in results else None
-                })
+        Returns:
+            Number of vectors moved
+        """
+        if self.partitioning == "none" or self.collection is None:
+            return 0
+        moved = 0
+        while True:
+            batch = self.collection.get(limit=batch_size, include=["embeddings", "documents", "metadatas"])
+            if not batch["ids"]:
+                break
+            groups: Dict[str, Dict[str, list]] = {}
+            for item_id, embedding, document, metadata in zip(
+                batch["ids"], batch["embeddings"], batch["documents"], batch["metadatas"]
+            ):
+                item_type = (metadata or {}).get("type", "article")
+                group = groups.setdefault(item_type, {"ids": [], "embeddings": [], "documents": [], "metadatas": []})
+                group["ids"].append(item_id)
+                group["embeddings"].append(embedding)
+                group["documents"].append(document)
+                group["metadatas"].append({**(metadata or {}), "published_ts": int(datetime.now().timestamp())})
+            for item_type, group in groups.items():
+                self._partition(item_type, None).upsert(**group)
+            self.collection.delete(ids=batch["ids"])
+            moved += len(batch["ids"])
         
-        return formatted_results
+        self.client.delete_collection(self.collection_name)
+        self.collection = None
+        self.bump_generation()
+        logger.info(f"Moved {moved} vectors from {self.collection_name} into partitions")
+        return moved
     
     def get_similarity_score(self, text1: str, text2: str) -> float:
         """Calculate cosine similarity between two texts"""
-        emb1 = self.model.encode(text1, show_progress_bar=False)
-        emb2 = self.model.encode(text2, show_progress_bar=False)
+        instrumentation.ENCODER_BATCH_SIZE.observe(2)
+        with instrumentation.ENCODER_SECONDS.time():
+            emb1, emb2 = self.model.encode([text1, text2], show_progress_bar=False)
         
         # Cosine similarity
         import numpy as np
         similarity = np.dot(emb1, emb2) / (np.linalg.norm(emb1) * np.linalg.norm(emb2))
         return float(similarity)
 
+
+class EncoderPool:
+    """
+    Context manager encoding with one worker process per CPU core
+    
+    Uses sentence-transformers' multi-process pool, which splits each call
+    into chunks encoded in parallel. Encoders without one (or processes <= 1)
+    fall back to the manager's single-process generate_embeddings.
+    
+    Args:
+        embedding_manager: Manager whose model encodes
+        processes: Worker processes (default: os.cpu_count())
+        batch_size: Texts per forward pass inside a worker
+    """
+    
+    def __init__(self, embedding_manager: EmbeddingManager, processes: Optional[int] = None, batch_size: int = 64):
+        self.embedding_manager = embedding_manager
+        self.processes = processes or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self._pool = None
+    
+    def __enter__(self) -> "EncoderPool":
+        model = self.embedding_manager.model
+        if self.processes > 1 and hasattr(model, "start_multi_process_pool"):
+            # Workers are spawned; give each a share of the cores instead of all of them
+            threads = str(max((os.cpu_count() or 1) // self.processes, 1))
+            saved = {name: os.environ.get(name) for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS")}
+            os.environ.update({name: threads for name in saved})
+            try:
+                self._pool = model.start_multi_process_pool(["cpu"] * self.processes)
+            finally:
+                for name, value in saved.items():
+                    if value is None:
+                        os.environ.pop(name, None)
+                    else:
+                        os.environ[name] = value
+            logger.info(f"Started {self.processes} encoder processes")
+        return self
+    
+    def __exit__(self, *exc):
+        if self._pool is not None:
+            self.embedding_manager.model.stop_multi_process_pool(self._pool)
+            self._pool = None
+        return False
+    
+    def encode(self, texts: List[str]) -> List[List[float]]:
+        if self._pool is None:
+            return self.embedding_manager.generate_embeddings(texts, show_progress_bar=False)
+        model = self.embedding_manager.model
+        chunk_size = max(len(texts) // (self.processes * 4), self.batch_size)
+        instrumentation.ENCODER_BATCH_SIZE.observe(len(texts))
+        with instrumentation.ENCODER_SECONDS.time():
+            if "pool" in inspect.signature(model.encode).parameters:
+                embeddings = model.encode(texts, pool=self._pool, batch_size=self.batch_size, chunk_size=chunk_size)
+            else:
+                embeddings = model.encode_multi_process(texts, self._pool, batch_size=self.batch_size,
+                                                        chunk_size=chunk_size)
+        return embeddings.tolist()
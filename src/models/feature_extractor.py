@@ -1,15 +1,84 @@
 """
 Feature extraction for ranking models
 """
-from typing import List, Dict
+from typing import List, Dict, Optional
 from datetime import datetime
+import time
+import numpy as np
+
+# Bump when a feature's definition changes, so stored features of the old definition are not mixed in
+FEATURE_SCHEMA_VERSION = 1
+FEATURES = {
+    "paper": ["similarity", "recency", "citations", "category", "title_length"],
+    "article": ["similarity", "recency", "engagement", "source", "content_length"],
+}
+# Features that depend on the user profile or on the current time, rather than on the item alone
+DYNAMIC_FEATURES = ("similarity", "recency")
+RECENCY_DECAY_DAYS = {"paper": 30.0, "article": 7.0}  # Articles decay faster
+
+
+def _days_since(date: datetime) -> int:
+    """Days between date and now; handles timezone-aware dates (e.g. from ArXiv)"""
+    if date.tzinfo is not None:
+        return (datetime.now(date.tzinfo) - date).days
+    return (datetime.now() - date).days
+
+
+def _cosine(a, b) -> float:
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+def _normalized(vectors) -> np.ndarray:
+    matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
 
 
 class FeatureExtractor:
     """Extracts features for ranking models"""
     
     @staticmethod
-    def extract_paper_features(paper, embedding_manager, user_interests: List[str]) -> Dict:
+    def recency_scores(published, kind: str, now: Optional[float] = None) -> np.ndarray:
+        """
+        Vectorized "recency" feature from publication times
+        
+        Args:
+            published: Epoch seconds per item, NaN where the date is unknown
+            kind: "paper" or "article" (sets the decay)
+            now: Epoch seconds to measure age against (default: current time)
+            
+        Returns:
+            float32 array matching extract_*_features for the same dates
+        """
+        published = np.asarray(published, dtype=np.float64)
+        now = time.time() if now is None else now
+        days_old = np.floor((now - published) / 86400.0)
+        scores = 1.0 / (1.0 + days_old / RECENCY_DECAY_DAYS[kind])
+        return np.where(np.isnan(published), 0.5, scores).astype(np.float32)
+    
+    @staticmethod
+    def similarity_matrix(item_embeddings, profile_embeddings) -> np.ndarray:
+        """
+        Cosine similarity of every item to every user profile in one matrix product
+        
+        Args:
+            item_embeddings: (n_items, dim) item embeddings
+            profile_embeddings: (n_users, dim) profile embeddings
+            
+        Returns:
+            (n_items, n_users) array; column u is the "similarity" feature for user u
+        """
+        if len(item_embeddings) == 0 or len(profile_embeddings) == 0:
+            return np.zeros((len(item_embeddings), len(profile_embeddings)), dtype=np.float32)
+        return _normalized(item_embeddings) @ _normalized(profile_embeddings).T
+    
+    @staticmethod
+    def extract_paper_features(paper, embedding_manager, user_interests: List[str],
+                               item_embedding: Optional[List[float]] = None,
+                               interests_embedding: Optional[List[float]] = None) -> Dict:
         """
         Extract features for a paper
         
@@ -17,20 +86,25 @@ class FeatureExtractor:
             paper: PaperData or Paper object
             embedding_manager: EmbeddingManager instance
             user_interests: List of user interest keywords
+            item_embedding: Precomputed paper embedding (skips encoding)
+            interests_embedding: Precomputed embedding of the joined interests
             
         Returns:
             Dict of feature values
         """
         # Text similarity to user interests
-        interests_text = " ".join(user_interests)
-        paper_text = f"{paper.title} {paper.abstract if hasattr(paper, 'abstract') else ''}"
-        
-        similarity = embedding_manager.get_similarity_score(interests_text, paper_text)
+        if item_embedding is not None and interests_embedding is not None:
+            similarity = _cosine(item_embedding, interests_embedding)
+        else:
+            interests_text = " ".join(user_interests)
+            paper_text = f"{paper.title} {paper.abstract if hasattr(paper, 'abstract') else ''}"
+            
+            similarity = embedding_manager.get_similarity_score(interests_text, paper_text)
         
         # Recency (days since publication)
         if hasattr(paper, 'published_date') and paper.published_date:
-            days_old = (datetime.now() - paper.published_date).days
-            recency_score = 1.0 / (1.0 + days_old / 30.0)  # Decay over 30 days
+            days_old = _days_since(paper.published_date)
+            recency_score = 1.0 / (1.0 + days_old / RECENCY_DECAY_DAYS["paper"])
         else:
             recency_score = 0.5
         
@@ -55,7 +129,9 @@ class FeatureExtractor:
         }
     
     @staticmethod
-    def extract_article_features(article, embedding_manager, user_interests: List[str]) -> Dict:
+    def extract_article_features(article, embedding_manager, user_interests: List[str],
+                                 item_embedding: Optional[List[float]] = None,
+                                 interests_embedding: Optional[List[float]] = None) -> Dict:
         """
         Extract features for an article
         
@@ -63,20 +139,25 @@ class FeatureExtractor:
             article: ArticleData or Article object
             embedding_manager: EmbeddingManager instance
             user_interests: List of user interest keywords
+            item_embedding: Precomputed article embedding (skips encoding)
+            interests_embedding: Precomputed embedding of the joined interests
             
         Returns:
             Dict of feature values
         """
         # Text similarity
-        interests_text = " ".join(user_interests)
-        article_text = f"{article.title} {article.content if hasattr(article, 'content') else ''}"
-        
-        similarity = embedding_manager.get_similarity_score(interests_text, article_text)
+        if item_embedding is not None and interests_embedding is not None:
+            similarity = _cosine(item_embedding, interests_embedding)
+        else:
+            interests_text = " ".join(user_interests)
+            article_text = f"{article.title} {article.content if hasattr(article, 'content') else ''}"
+            
+            similarity = embedding_manager.get_similarity_score(interests_text, article_text)
         
         # Recency
         if hasattr(article, 'published_date') and article.published_date:
-            days_old = (datetime.now() - article.published_date).days
-            recency_score = 1.0 / (1.0 + days_old / 7.0)  # Articles decay faster (7 days)
+            days_old = _days_since(article.published_date)
+            recency_score = 1.0 / (1.0 + days_old / RECENCY_DECAY_DAYS["article"])
         else:
             recency_score = 0.5
         
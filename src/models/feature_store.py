@@ -0,0 +1,285 @@
+"""
+Persistent ranking features per item and user profile
+
+Each daily run appends one segment per item kind under
+FEATURE_STORE_DIR/<version>/<kind>/, a directory of .npy arrays that are
+memory-mapped on read:
+
+    keys.npy         item keys (arxiv_id or URL), fixed-width unicode
+    static.npy       (rows, n_static) float32, features that depend on the item only
+    published.npy    (rows,) float64 epoch seconds, NaN when unknown
+    similarity.npy   (rows, n_profiles) float32, NaN where a profile was not scored
+    meta.json        static feature names and the profile ID of each similarity column
+
+Recency is not stored: it is recomputed from published.npy when a matrix is
+loaded. The version directory combines FEATURE_SCHEMA_VERSION with the
+embedding model, since similarities from different models are not
+comparable. The latest segment holding a key wins, and segments are merged
+once a kind has more than FEATURE_STORE_MAX_SEGMENTS of them.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from src.database.models import Article, Paper, UserInteraction
+from src.models.feature_extractor import DYNAMIC_FEATURES, FEATURE_SCHEMA_VERSION, FEATURES, FeatureExtractor
+from src.models.versioning import version_tag
+from src.utils.config import settings
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Label for an interaction without an explicit rating
+ACTION_LABELS = {"like": 1.0, "save": 1.0, "share": 1.0, "click": 0.6, "view": 0.4, "dismiss": 0.0}
+
+
+def feature_version(model_name: str) -> str:
+    return f"v{FEATURE_SCHEMA_VERSION}-{version_tag(model_name)}"
+
+
+def _timestamp(date: Optional[datetime]) -> float:
+    # Naive dates are local time, like FeatureExtractor's datetime.now() comparison
+    return date.timestamp() if date is not None else np.nan
+
+
+@dataclass
+class FeatureMatrix:
+    """Feature rows for one kind and profile, columns in feature_names order"""
+    keys: List[str]
+    X: np.ndarray
+    feature_names: List[str]
+    missing: List[str] = field(default_factory=list)  # Requested keys with no stored features for the profile
+    
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+class _Segment:
+    def __init__(self, path: Path):
+        self.path = path
+        meta = json.loads((path / "meta.json").read_text())
+        self.static_names: List[str] = meta["static"]
+        self.profiles: List[int] = meta["profiles"]
+        self.columns = {profile_id: j for j, profile_id in enumerate(self.profiles)}
+        self.keys = np.load(path / "keys.npy", mmap_mode="r")
+        self.static = np.load(path / "static.npy", mmap_mode="r")
+        self.published = np.load(path / "published.npy", mmap_mode="r")
+        self.similarity = np.load(path / "similarity.npy", mmap_mode="r")
+
+
+class FeatureStore:
+    """Append-only, memory-mapped feature segments for one feature version"""
+    
+    def __init__(self, root: Optional[Path] = None, version: Optional[str] = None):
+        self.version = version or feature_version(settings.EMBEDDING_MODEL)
+        self.root = Path(root or settings.FEATURE_STORE_DIR) / self.version
+        self._lock = threading.Lock()
+        # kind -> (segment names, segments, key -> (segment index, row))
+        self._open_segments: Dict[str, Tuple[Tuple[str, ...], List[_Segment], Dict[str, Tuple[int, int]]]] = {}
+    
+    @classmethod
+    def for_model(cls, model_name: str, root: Optional[Path] = None) -> "FeatureStore":
+        return cls(root, feature_version(model_name))
+    
+    def write(self, kind: str, keys: Sequence[str], features: Sequence[Dict], published: Sequence[Optional[datetime]],
+              similarity: np.ndarray, profile_ids: Sequence[int]) -> Optional[Path]:
+        """
+        Persist one ranking pass as a new segment
+        
+        Args:
+            kind: "paper" or "article"
+            keys: Item keys
+            features: Feature dicts from FeatureExtractor (dynamic features are ignored)
+            published: Publication date per item
+            similarity: (n_items, n_profiles) from FeatureExtractor.similarity_matrix
+            profile_ids: UserProfile IDs of the similarity columns
+        """
+        if not keys:
+            return None
+        static_names = [name for name in FEATURES[kind] if name not in DYNAMIC_FEATURES]
+        arrays = {
+            "keys": np.asarray(keys, dtype=str),
+            "static": np.asarray([[f.get(name, 0.0) for name in static_names] for f in features],
+                                 dtype=np.float32).reshape(len(keys), len(static_names)),
+            "published": np.asarray([_timestamp(date) for date in published], dtype=np.float64),
+            "similarity": np.asarray(similarity, dtype=np.float32).reshape(len(keys), len(profile_ids)),
+        }
+        path = self._write_segment(kind, arrays, {"static": static_names, "profiles": [int(p) for p in profile_ids]})
+        if len(self._segment_names(kind)) > settings.FEATURE_STORE_MAX_SEGMENTS:
+            self.compact(kind)
+        return path
+    
+    def _write_segment(self, kind: str, arrays: Dict[str, np.ndarray], meta: Dict) -> Path:
+        directory = self.root / kind
+        name = f"{time.time_ns():020d}-{os.getpid()}-{threading.get_ident() % 10000:04d}"
+        tmp = directory / f".{name}.tmp"
+        tmp.mkdir(parents=True)
+        for array_name, array in arrays.items():
+            np.save(tmp / f"{array_name}.npy", array)
+        (tmp / "meta.json").write_text(json.dumps({**meta, "rows": len(arrays["keys"]),
+                                                   "created": datetime.now().isoformat()}))
+        path = directory / name
+        os.replace(tmp, path)
+        return path
+    
+    def _segment_names(self, kind: str) -> Tuple[str, ...]:
+        directory = self.root / kind
+        if not directory.exists():
+            return ()
+        return tuple(sorted(p.name for p in directory.iterdir() if p.is_dir() and not p.name.startswith(".")))
+    
+    def _segments(self, kind: str) -> Tuple[List[_Segment], Dict[str, Tuple[int, int]]]:
+        """Open segments and the key index, rebuilt only when the segment list changed"""
+        names = self._segment_names(kind)
+        with self._lock:
+            cached = self._open_segments.get(kind)
+            if cached is not None and cached[0] == names:
+                return cached[1], cached[2]
+            segments, index = [], {}
+            for name in names:
+                try:
+                    segment = _Segment(self.root / kind / name)
+                except (OSError, ValueError) as e:
+                    # Removed by a concurrent compaction; the next call sees the merged segment
+                    logger.debug(f"Skipping feature segment {name}: {e}")
+                    continue
+                for row, key in enumerate(segment.keys.tolist()):
+                    index[key] = (len(segments), row)
+                segments.append(segment)
+            self._open_segments[kind] = (names, segments, index)
+            return segments, index
+    
+    def keys(self, kind: str) -> List[str]:
+        return list(self._segments(kind)[1])
+    
+    def load(self, kind: str, profile_id: int, keys: Optional[Sequence[str]] = None,
+             feature_names: Optional[Sequence[str]] = None, now: Optional[float] = None) -> FeatureMatrix:
+        """
+        Feature matrix of stored items for one profile
+        
+        Args:
+            kind: "paper" or "article"
+            profile_id: UserProfile ID whose similarity column is used
+            keys: Items to load (default: every stored item)
+            feature_names: Column order (default FEATURES[kind]); unknown names are 0
+            now: Epoch seconds recency is computed against (default: current time)
+        """
+        feature_names = list(feature_names or FEATURES[kind])
+        segments, index = self._segments(kind)
+        keys = list(index) if keys is None else list(keys)
+        
+        # Row positions per segment, so each segment is gathered with one fancy index
+        picks: Dict[int, Tuple[List[int], List[int]]] = defaultdict(lambda: ([], []))
+        found, missing = [], []
+        for key in keys:
+            location = index.get(key)
+            if location is None or profile_id not in segments[location[0]].columns:
+                missing.append(key)
+                continue
+            positions, rows = picks[location[0]]
+            positions.append(len(found))
+            rows.append(location[1])
+            found.append(key)
+        
+        X = np.zeros((len(found), len(feature_names)), dtype=np.float32)
+        published = np.full(len(found), np.nan)
+        for segment_index, (positions, rows) in picks.items():
+            segment = segments[segment_index]
+            positions, rows = np.asarray(positions), np.asarray(rows)
+            published[positions] = segment.published[rows]
+            for i, name in enumerate(feature_names):
+                if name == "similarity":
+                    X[positions, i] = segment.similarity[rows, segment.columns[profile_id]]
+                elif name in segment.static_names:
+                    X[positions, i] = segment.static[rows, segment.static_names.index(name)]
+        if "recency" in feature_names:
+            X[:, feature_names.index("recency")] = FeatureExtractor.recency_scores(published, kind, now)
+        
+        if "similarity" in feature_names and len(found):
+            # Profiles added after an item's segment was written have no similarity for it
+            unscored = np.isnan(X[:, feature_names.index("similarity")])
+            if unscored.any():
+                missing.extend(key for key, flag in zip(found, unscored) if flag)
+                keep = ~unscored
+                X = X[keep]
+                found = [key for key, flag in zip(found, keep) if flag]
+        return FeatureMatrix(found, X, feature_names, missing)
+    
+    def compact(self, kind: str) -> int:
+        """Merge a kind's segments into one, keeping the latest row per key; returns rows kept"""
+        names = self._segment_names(kind)
+        segments, index = self._segments(kind)
+        if len(segments) < 2:
+            return len(index)
+        static_names = [name for name in FEATURES[kind] if name not in DYNAMIC_FEATURES]
+        profiles = sorted({profile_id for segment in segments for profile_id in segment.profiles})
+        column = {profile_id: j for j, profile_id in enumerate(profiles)}
+        
+        keys = list(index)
+        static = np.zeros((len(keys), len(static_names)), dtype=np.float32)
+        published = np.full(len(keys), np.nan)
+        similarity = np.full((len(keys), len(profiles)), np.nan, dtype=np.float32)
+        by_segment: Dict[int, Tuple[List[int], List[int]]] = defaultdict(lambda: ([], []))
+        for position, key in enumerate(keys):
+            segment_index, row = index[key]
+            by_segment[segment_index][0].append(position)
+            by_segment[segment_index][1].append(row)
+        for segment_index, (positions, rows) in by_segment.items():
+            segment = segments[segment_index]
+            positions, rows = np.asarray(positions), np.asarray(rows)
+            published[positions] = segment.published[rows]
+            for i, name in enumerate(static_names):
+                if name in segment.static_names:
+                    static[positions, i] = segment.static[rows, segment.static_names.index(name)]
+            for profile_id, j in segment.columns.items():
+                similarity[positions, column[profile_id]] = segment.similarity[rows, j]
+        
+        self._write_segment(kind, {"keys": np.asarray(keys, dtype=str), "static": static,
+                                   "published": published, "similarity": similarity},
+                            {"static": static_names, "profiles": profiles})
+        for name in names:
+            shutil.rmtree(self.root / kind / name, ignore_errors=True)
+        logger.info(f"Compacted {len(names)} {kind} feature segments into one ({len(keys)} items)")
+        return len(keys)
+    
+    def stats(self) -> Dict:
+        result = {"version": self.version}
+        for kind in FEATURES:
+            segments, index = self._segments(kind)
+            result[kind] = {
+                "items": len(index),
+                "segments": len(segments),
+                "profiles": sorted({profile_id for segment in segments for profile_id in segment.profiles}),
+            }
+        return result
+
+
+def interaction_labels(db) -> Dict[str, Dict[str, float]]:
+    """
+    Training targets from user_interactions, as {kind: {item key: label}}
+    
+    An explicit rating is used as is, otherwise the action maps through
+    ACTION_LABELS; several interactions with one item are averaged.
+    """
+    values: Dict[Tuple[str, int], List[float]] = defaultdict(list)
+    for item_type, item_id, action, rating in db.query(UserInteraction.item_type, UserInteraction.item_id,
+                                                       UserInteraction.action, UserInteraction.rating):
+        label = rating if rating is not None else ACTION_LABELS.get((action or "").lower())
+        if label is not None:
+            values[(item_type, item_id)].append(float(label))
+    
+    labels: Dict[str, Dict[str, float]] = {"paper": {}, "article": {}}
+    for kind, model, key_column in (("paper", Paper, Paper.arxiv_id), ("article", Article, Article.url)):
+        ids = [item_id for item_type, item_id in values if item_type == kind]
+        for lo in range(0, len(ids), 500):
+            for item_id, key in db.query(model.id, key_column).filter(model.id.in_(ids[lo:lo + 500])):
+                labels[kind][key] = float(np.mean(values[(kind, item_id)]))
+    return labels
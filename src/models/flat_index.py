@@ -0,0 +1,595 @@
+"""
+Memory-mapped exact vector index (alternative to Chroma)
+
+Each collection is a directory:
+
+    <root>/<name>/collection.json       name, metadata, embedding dimension and type codes
+    <root>/<name>/CURRENT               active generation number
+    <root>/<name>/gen-<N>/vectors.f32   contiguous float32 rows, L2-normalized
+    <root>/<name>/gen-<N>/live.u8       1 byte per row, 0 once deleted or replaced
+    <root>/<name>/gen-<N>/types.u8      "type" metadata as a small code per row
+    <root>/<name>/gen-<N>/published.i64 "published_ts" metadata per row
+    <root>/<name>/gen-<N>/codes.f16|i8  optional compressed copy of the vectors
+    <root>/<name>/gen-<N>/items.db      SQLite sidecar: row -> id, document, metadata
+
+Everything a query scans is memory-mapped, so opening a collection only maps
+files and forked workers share the pages through the page cache. Writes
+append rows (the live byte is written last, which is what makes a row
+visible); updates and deletes clear the old row's live byte. compact()
+rewrites the live rows into a new generation and switches CURRENT
+atomically; readers keep their mapping until they notice the switch. There
+is a single writer per collection.
+
+With quantization ("float16", or "int8" scalar quantization with a
+per-dimension scale), queries scan only the compressed codes (2x / 4x less
+memory than float32) to pick rescore_factor * k candidates, then rescore
+those exactly from the float32 rows, which stay on disk and are only paged
+in for the candidates.
+
+FlatClient and FlatCollection mirror the subset of the Chroma client and
+collection API used by EmbeddingManager. Queries are exact cosine
+similarity computed blockwise with NumPy.
+"""
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from src.utils.config import settings
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BLOCK_ROWS = 65536  # Rows scored per matrix product; bounds temporary memory
+QUANTIZED_BLOCK_ROWS = 4096  # Smaller blocks for quantized scans, whose widened copy should stay in cache
+_NO_TIMESTAMP = np.iinfo(np.int64).min
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS items (
+        row INTEGER PRIMARY KEY,
+        id TEXT NOT NULL,
+        document TEXT,
+        metadata TEXT,
+        live INTEGER NOT NULL DEFAULT 1
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS items_live_id ON items(id) WHERE live = 1;
+"""
+# Per-row column files: name -> dtype
+_COLUMNS = {"live.u8": np.uint8, "types.u8": np.uint8, "published.i64": np.int64}
+# Compressed code files per quantization mode
+QUANTIZATIONS = {"float16": ("codes.f16", np.float16), "int8": ("codes.i8", np.int8)}
+
+
+def _map(path: Path, dtype, shape) -> np.ndarray:
+    if not shape[0]:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+
+
+def _int8_scale(matrix: np.ndarray) -> np.ndarray:
+    """
+    Per-dimension max magnitude, so each dimension uses the full int8 range
+    
+    Floored at 4 standard deviations of a random unit vector's component, so a
+    small first batch does not clip everything that follows.
+    """
+    floor = 4.0 / np.sqrt(matrix.shape[1])
+    return np.maximum(np.abs(matrix).max(axis=0), floor).astype(np.float32)
+
+
+def _encode(matrix: np.ndarray, quantization: str, scale: Optional[np.ndarray]) -> np.ndarray:
+    if quantization == "float16":
+        return matrix.astype(np.float16)
+    return np.clip(np.rint(matrix / scale * 127.0), -127, 127).astype(np.int8)
+
+
+class FlatCollection:
+    """One memory-mapped collection with a Chroma-like interface"""
+    
+    def __init__(self, path: Path, name: str, metadata: Optional[Dict] = None,
+                 quantization: Optional[str] = None, rescore_factor: Optional[int] = None):
+        self.path = path
+        self.name = name
+        self.rescore_factor = rescore_factor or settings.VECTOR_DB_FLAT_RESCORE_FACTOR
+        self._lock = threading.RLock()
+        if not (path / "collection.json").exists():
+            quantization = quantization or settings.VECTOR_DB_FLAT_QUANTIZATION
+            if quantization != "none" and quantization not in QUANTIZATIONS:
+                raise ValueError(f"Unknown quantization: {quantization}")
+            path.mkdir(parents=True, exist_ok=True)
+            self._info = {"name": name, "metadata": metadata or {}, "dim": None, "types": [],
+                          "quantization": quantization, "int8_scale": None}
+            self._save_info()
+            (path / "CURRENT").write_text("0")
+        self._load_info()
+        self.metadata = self._info["metadata"]
+        self._open()
+    
+    # Storage
+    
+    def _load_info(self):
+        self._info = json.loads((self.path / "collection.json").read_text())
+    
+    def _save_info(self):
+        tmp = self.path / "collection.json.tmp"
+        tmp.write_text(json.dumps(self._info))
+        os.replace(tmp, self.path / "collection.json")
+    
+    @property
+    def dim(self) -> Optional[int]:
+        return self._info["dim"]
+    
+    @property
+    def quantization(self) -> str:
+        """Fixed when the collection is created; compact(quantization=...) converts it"""
+        return self._info.get("quantization", "none")
+    
+    def _scale(self) -> Optional[np.ndarray]:
+        scale = self._info.get("int8_scale")
+        return None if scale is None else np.asarray(scale, dtype=np.float32)
+    
+    def _current_generation(self) -> int:
+        return int((self.path / "CURRENT").read_text().strip() or 0)
+    
+    def _open(self):
+        """(Re)open the active generation"""
+        self._generation = self._current_generation()
+        self._dir = self.path / f"gen-{self._generation}"
+        self._dir.mkdir(exist_ok=True)
+        for name in ("vectors.f32", *_COLUMNS, *(f for f, _ in QUANTIZATIONS.values())):
+            (self._dir / name).touch()
+        self._db = sqlite3.connect(str(self._dir / "items.db"), check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._n_rows = -1
+        self._refresh()
+    
+    def _refresh(self):
+        """Remap files if rows were appended here or by another process, or after compaction"""
+        if self._current_generation() != self._generation:
+            self._db.close()
+            self._load_info()
+            self._open()
+            return
+        n = os.path.getsize(self._dir / "live.u8")
+        if n == self._n_rows:
+            return
+        if n and self.dim is None:
+            self._load_info()
+        self._vectors = _map(self._dir / "vectors.f32", np.float32, (n, self.dim or 0))
+        self._live = _map(self._dir / "live.u8", np.uint8, (n,))
+        self._types = _map(self._dir / "types.u8", np.uint8, (n,))
+        self._published = _map(self._dir / "published.i64", np.int64, (n,))
+        self._codes = None
+        if self.quantization != "none":
+            code_file, code_dtype = QUANTIZATIONS[self.quantization]
+            self._codes = _map(self._dir / code_file, code_dtype, (n, self.dim or 0))
+        self._n_rows = n
+    
+    def _type_code(self, item_type: Optional[str], create: bool = False) -> Optional[int]:
+        """Small integer for a type value (0 = no type); None if unknown and not created"""
+        if item_type is None:
+            return 0
+        types = self._info["types"]
+        if item_type not in types:
+            self._load_info()
+            types = self._info["types"]
+        if item_type not in types:
+            if not create:
+                return None
+            types.append(item_type)
+            if len(types) > 255:
+                raise ValueError(f"Too many distinct types in {self.name}")
+            self._save_info()
+        return types.index(item_type) + 1
+    
+    @staticmethod
+    def _normalize(embeddings) -> np.ndarray:
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix[None, :]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+    
+    def _write_at(self, name: str, offset: int, data: bytes):
+        with open(self._dir / name, "r+b") as f:
+            f.seek(offset)
+            f.write(data)
+    
+    def _append(self, ids: List[str], matrix: np.ndarray, documents: List, metadatas: List[Dict]):
+        """Write vectors, columns and sidecar rows, then the live bytes that make them visible"""
+        if self.dim is None:
+            self._info["dim"] = int(matrix.shape[1])
+            if self.quantization == "int8":
+                # Fitted on the first batch; compact() refits on the whole collection
+                self._info["int8_scale"] = _int8_scale(matrix).tolist()
+            self._save_info()
+        elif matrix.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match collection dimension {self.dim}")
+        
+        start = self._n_rows
+        count = len(ids)
+        metadatas = [meta or {} for meta in metadatas]
+        types = np.array([self._type_code(m.get("type"), create=True) for m in metadatas], dtype=np.uint8)
+        published = np.array(
+            [_NO_TIMESTAMP if m.get("published_ts") is None else m["published_ts"] for m in metadatas],
+            dtype=np.int64
+        )
+        # A crash before the live bytes leaves trailing garbage that the next append overwrites
+        self._write_at("vectors.f32", start * self.dim * 4, np.ascontiguousarray(matrix, dtype=np.float32).tobytes())
+        if self.quantization != "none":
+            code_file, code_dtype = QUANTIZATIONS[self.quantization]
+            codes = _encode(matrix, self.quantization, self._scale())
+            self._write_at(code_file, start * self.dim * np.dtype(code_dtype).itemsize, codes.tobytes())
+        self._write_at("types.u8", start, types.tobytes())
+        self._write_at("published.i64", start * 8, published.tobytes())
+        self._db.execute("DELETE FROM items WHERE row >= ?", (start,))
+        self._db.executemany(
+            "INSERT INTO items(row, id, document, metadata) VALUES (?, ?, ?, ?)",
+            [(start + i, item_id, document, json.dumps(meta))
+             for i, (item_id, document, meta) in enumerate(zip(ids, documents, metadatas))]
+        )
+        self._db.commit()
+        self._write_at("live.u8", start, b"\x01" * count)
+        self._refresh()
+    
+    def _tombstone(self, rows: List[int]):
+        if not rows:
+            return
+        self._db.executemany("UPDATE items SET live = 0 WHERE row = ?", [(row,) for row in rows])
+        self._db.commit()
+        with open(self._dir / "live.u8", "r+b") as f:
+            for row in rows:
+                f.seek(row)
+                f.write(b"\x00")
+    
+    def _live_rows(self, ids: List[str]) -> Dict[str, Tuple]:
+        found = {}
+        for lo in range(0, len(ids), 500):
+            chunk = list(ids[lo:lo + 500])
+            placeholders = ",".join("?" * len(chunk))
+            # Rows past the live file were never made visible (interrupted append)
+            for row in self._db.execute(
+                f"SELECT id, row, document, metadata FROM items WHERE live = 1 AND row < ? AND id IN ({placeholders})",
+                [self._n_rows, *chunk]
+            ):
+                found[row[0]] = row[1:]
+        return found
+    
+    def _maybe_compact(self):
+        dead = self._n_rows - int(np.count_nonzero(self._live))
+        if dead > settings.VECTOR_DB_FLAT_COMPACT_MIN_DEAD and dead > self._n_rows * settings.VECTOR_DB_FLAT_COMPACT_RATIO:
+            self.compact()
+    
+    # Chroma-compatible API
+    
+    def count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return int(np.count_nonzero(self._live))
+    
+    def add(self, ids: List[str], embeddings, documents: Optional[List[str]] = None,
+            metadatas: Optional[List[Dict]] = None):
+        """Add new items; raises ValueError if an ID already exists"""
+        with self._lock:
+            self._refresh()
+            existing = self._live_rows(ids)
+            if existing:
+                raise ValueError(f"IDs already exist: {', '.join(list(existing)[:5])}")
+            self._append(list(ids), self._normalize(embeddings), documents or [None] * len(ids),
+                         metadatas or [{}] * len(ids))
+    
+    def upsert(self, ids: List[str], embeddings, documents: Optional[List[str]] = None,
+               metadatas: Optional[List[Dict]] = None):
+        with self._lock:
+            self._refresh()
+            self._tombstone([row for row, _, _ in self._live_rows(ids).values()])
+            self._append(list(ids), self._normalize(embeddings), documents or [None] * len(ids),
+                         metadatas or [{}] * len(ids))
+            self._maybe_compact()
+    
+    def update(self, ids: List[str], embeddings=None, documents: Optional[List[str]] = None,
+               metadatas: Optional[List[Dict]] = None):
+        """Replace the given fields of existing items (missing IDs are ignored)"""
+        with self._lock:
+            self._refresh()
+            existing = self._live_rows(ids)
+            keep = [i for i, item_id in enumerate(ids) if item_id in existing]
+            if not keep:
+                return
+            rows = [existing[ids[i]][0] for i in keep]
+            if embeddings is not None:
+                matrix = self._normalize(embeddings)[keep]
+            else:
+                matrix = np.array(self._vectors[rows])
+            new_documents = [documents[i] if documents else existing[ids[i]][1] for i in keep]
+            new_metadatas = [metadatas[i] if metadatas else json.loads(existing[ids[i]][2]) for i in keep]
+            self._tombstone(rows)
+            self._append([ids[i] for i in keep], matrix, new_documents, new_metadatas)
+            self._maybe_compact()
+    
+    def delete(self, ids: List[str]):
+        with self._lock:
+            self._refresh()
+            self._tombstone([row for row, _, _ in self._live_rows(ids).values()])
+            self._maybe_compact()
+    
+    def get(self, ids: Optional[List[str]] = None, limit: Optional[int] = None, offset: int = 0,
+            include: Optional[List[str]] = None) -> Dict:
+        include = include if include is not None else ["documents", "metadatas"]
+        with self._lock:
+            self._refresh()
+            if ids is not None:
+                found = self._live_rows(ids)
+                records = [(item_id, *found[item_id]) for item_id in ids if item_id in found]
+            else:
+                records = self._db.execute(
+                    "SELECT id, row, document, metadata FROM items WHERE live = 1 ORDER BY row LIMIT ? OFFSET ?",
+                    (-1 if limit is None else limit, offset)
+                ).fetchall()
+            return {
+                "ids": [r[0] for r in records],
+                "embeddings": [np.array(self._vectors[r[1]]) for r in records] if "embeddings" in include else None,
+                "documents": [r[2] for r in records] if "documents" in include else None,
+                "metadatas": [json.loads(r[3]) for r in records] if "metadatas" in include else None,
+            }
+    
+    def query(self, query_embeddings, n_results: int = 10, where: Optional[Dict] = None,
+              include: Optional[List[str]] = None) -> Dict:
+        """Exact top-k by cosine distance (1 - cosine similarity), like a cosine-space Chroma collection"""
+        queries = self._normalize(query_embeddings)
+        with self._lock:
+            self._refresh()
+            vectors, codes, generation = self._vectors, self._codes, self._generation
+            scale = self._scale()
+            mask = self._live.astype(bool)
+            if where:
+                mask &= self._where_mask(where)
+        # Scoring runs outside the lock; NumPy releases the GIL so concurrent queries overlap
+        if codes is None:
+            candidates = self._top_k(vectors, mask, queries, n_results)
+        else:
+            # int8 codes are x / scale * 127, so fold the scale into the query instead of decoding
+            coarse_queries = queries * (scale / 127.0) if scale is not None else queries
+            coarse = self._top_k(codes, mask, coarse_queries, n_results * self.rescore_factor)
+            candidates = self._rescore(vectors, queries, coarse, n_results)
+        
+        with self._lock:
+            if generation != self._generation:
+                # Compacted meanwhile: row numbers changed, so score against the new generation
+                return self.query(query_embeddings, n_results, where, include)
+            result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+            for rows, scores in candidates:
+                records = {}
+                if len(rows):
+                    placeholders = ",".join("?" * len(rows))
+                    records = {
+                        row: (item_id, document, metadata) for row, item_id, document, metadata in self._db.execute(
+                            f"SELECT row, id, document, metadata FROM items WHERE row IN ({placeholders})",
+                            [int(r) for r in rows]
+                        )
+                    }
+                result["ids"].append([records[int(r)][0] for r in rows])
+                result["documents"].append([records[int(r)][1] for r in rows])
+                result["metadatas"].append([json.loads(records[int(r)][2]) for r in rows])
+                result["distances"].append([float(1.0 - s) for s in scores])
+        return result
+    
+    @staticmethod
+    def _top_k(matrix: np.ndarray, mask: np.ndarray, queries: np.ndarray, k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Blocked matrix products, keeping k candidates per query per block"""
+        best_rows = [[] for _ in range(len(queries))]
+        best_scores = [[] for _ in range(len(queries))]
+        # Quantized codes are widened into a reused buffer small enough to stay in cache
+        quantized = matrix.dtype != np.float32
+        block_rows = QUANTIZED_BLOCK_ROWS if quantized else BLOCK_ROWS
+        buffer = np.empty((min(block_rows, len(matrix)), matrix.shape[1]), dtype=np.float32) if quantized else None
+        for lo in range(0, len(matrix), block_rows):
+            hi = min(lo + block_rows, len(matrix))
+            block_mask = mask[lo:hi]
+            if not block_mask.any():
+                continue
+            block = matrix[lo:hi]
+            if quantized:
+                np.copyto(buffer[:hi - lo], block, casting="unsafe")
+                block = buffer[:hi - lo]
+            scores = queries @ block.T  # (n_queries, block)
+            scores[:, ~block_mask] = -np.inf
+            take = min(k, hi - lo)
+            part = np.argpartition(-scores, take - 1, axis=1)[:, :take]
+            for q in range(len(queries)):
+                rows = part[q][np.isfinite(scores[q, part[q]])]
+                best_rows[q].append(rows + lo)
+                best_scores[q].append(scores[q, rows])
+        results = []
+        for rows, scores in zip(best_rows, best_scores):
+            if not rows:
+                results.append((np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)))
+                continue
+            rows, scores = np.concatenate(rows), np.concatenate(scores)
+            order = np.argsort(-scores, kind="stable")[:k]
+            results.append((rows[order], scores[order]))
+        return results
+    
+    @staticmethod
+    def _rescore(vectors: np.ndarray, queries: np.ndarray, coarse: List[Tuple[np.ndarray, np.ndarray]],
+                 k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Exact scores for the coarse candidates from the full-precision rows"""
+        results = []
+        for query, (rows, _) in zip(queries, coarse):
+            rows = np.sort(rows)  # Sequential reads from the memmap
+            scores = vectors[rows] @ query
+            order = np.argsort(-scores, kind="stable")[:k]
+            results.append((rows[order], scores[order]))
+        return results
+    
+    def _where_mask(self, where: Dict) -> np.ndarray:
+        """Evaluate a Chroma-style where clause; type/published_ts are vectorized, other keys read metadata JSON"""
+        if "$and" in where:
+            mask = np.ones(self._n_rows, dtype=bool)
+            for clause in where["$and"]:
+                mask &= self._where_mask(clause)
+            return mask
+        if "$or" in where:
+            mask = np.zeros(self._n_rows, dtype=bool)
+            for clause in where["$or"]:
+                mask |= self._where_mask(clause)
+            return mask
+        mask = np.ones(self._n_rows, dtype=bool)
+        for key, condition in where.items():
+            if key == "type":
+                mask &= self._type_mask(condition)
+            elif key == "published_ts":
+                mask &= _compare(np.asarray(self._published), condition, self._published != _NO_TIMESTAMP)
+            else:
+                values = np.empty(self._n_rows, dtype=object)
+                for row, metadata in self._db.execute("SELECT row, metadata FROM items WHERE live = 1 AND row < ?",
+                                                      (self._n_rows,)):
+                    values[row] = json.loads(metadata).get(key)
+                mask &= _compare(values, condition, np.array([v is not None for v in values], dtype=bool))
+        return mask
+    
+    def _type_mask(self, condition) -> np.ndarray:
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        mask = np.ones(self._n_rows, dtype=bool)
+        for op, operand in condition.items():
+            values = [operand] if op in ("$eq", "$ne") else list(operand)
+            codes = [code for code in (self._type_code(v) for v in values) if code is not None]
+            hit = np.isin(self._types, codes)
+            if op in ("$eq", "$in"):
+                mask &= hit
+            elif op in ("$ne", "$nin"):
+                mask &= ~hit
+            else:
+                raise ValueError(f"Unsupported where operator for type: {op}")
+        return mask
+    
+    def compact(self, quantization: Optional[str] = None):
+        """
+        Rewrite live rows into a new generation and switch to it
+        
+        Args:
+            quantization: Convert the collection to "none", "float16" or "int8"
+                (default: keep the current setting). int8 scales are refitted.
+        """
+        quantization = quantization or self.quantization
+        if quantization != "none" and quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {quantization}")
+        with self._lock:
+            self._refresh()
+            live_rows = np.flatnonzero(self._live)
+            old_dir = self._dir
+            generation = self._generation + 1
+            new_dir = self.path / f"gen-{generation}"
+            shutil.rmtree(new_dir, ignore_errors=True)
+            new_dir.mkdir()
+            
+            columns = {"vectors.f32": self._vectors, "types.u8": self._types, "published.i64": self._published}
+            for name, source in columns.items():
+                with open(new_dir / name, "wb") as f:
+                    for lo in range(0, len(live_rows), BLOCK_ROWS):
+                        f.write(np.ascontiguousarray(source[live_rows[lo:lo + BLOCK_ROWS]]).tobytes())
+            scale = None
+            if quantization == "int8" and len(live_rows):
+                scale = np.max([_int8_scale(self._vectors[live_rows[lo:lo + BLOCK_ROWS]])
+                                for lo in range(0, len(live_rows), BLOCK_ROWS)], axis=0)
+            if quantization != "none":
+                with open(new_dir / QUANTIZATIONS[quantization][0], "wb") as f:
+                    for lo in range(0, len(live_rows), BLOCK_ROWS):
+                        block = np.asarray(self._vectors[live_rows[lo:lo + BLOCK_ROWS]])
+                        f.write(_encode(block, quantization, scale).tobytes())
+            new_db = sqlite3.connect(str(new_dir / "items.db"))
+            new_db.executescript(_SCHEMA)
+            new_db.execute("ATTACH DATABASE ? AS old", (str(old_dir / "items.db"),))
+            new_db.execute(
+                "INSERT INTO items(row, id, document, metadata) "
+                "SELECT ROW_NUMBER() OVER (ORDER BY row) - 1, id, document, metadata FROM old.items WHERE live = 1"
+            )
+            new_db.commit()
+            new_db.execute("DETACH DATABASE old")
+            new_db.close()
+            (new_dir / "live.u8").write_bytes(b"\x01" * len(live_rows))
+            
+            # Collection info and CURRENT switch together from the reader's point of view:
+            # readers reload the info whenever they see a new generation
+            self._info["quantization"] = quantization
+            self._info["int8_scale"] = None if scale is None else scale.tolist()
+            self._save_info()
+            tmp = self.path / "CURRENT.tmp"
+            tmp.write_text(str(generation))
+            os.replace(tmp, self.path / "CURRENT")
+            self._db.close()
+            self._open()
+            # Readers that still map the old files keep them alive until they reopen
+            shutil.rmtree(old_dir, ignore_errors=True)
+            logger.info(f"Compacted {self.name}: {len(live_rows)} live rows (generation {generation})")
+
+
+def _compare(values: np.ndarray, condition, present: np.ndarray) -> np.ndarray:
+    """Vectorized Chroma comparison operators; rows without a value never match"""
+    if not isinstance(condition, dict):
+        condition = {"$eq": condition}
+    mask = present.copy()
+    for op, operand in condition.items():
+        if op == "$eq":
+            mask &= values == operand
+        elif op == "$ne":
+            mask &= values != operand
+        elif op == "$in":
+            mask &= np.isin(values, list(operand))
+        elif op == "$nin":
+            mask &= ~np.isin(values, list(operand))
+        elif op in ("$gt", "$gte", "$lt", "$lte"):
+            cmp = {"$gt": np.greater, "$gte": np.greater_equal, "$lt": np.less, "$lte": np.less_equal}[op]
+            result = np.zeros(len(values), dtype=bool)
+            result[present] = cmp(values[present].astype(float), operand)
+            mask &= result
+        else:
+            raise ValueError(f"Unsupported where operator: {op}")
+    return mask
+
+
+class FlatClient:
+    """Directory of FlatCollections with the Chroma client methods EmbeddingManager uses"""
+    
+    def __init__(self, path: Path, quantization: Optional[str] = None, rescore_factor: Optional[int] = None):
+        self.path = Path(path)
+        # Applies to collections created by this client; existing ones keep their format
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._collections: Dict[str, FlatCollection] = {}
+    
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict] = None) -> FlatCollection:
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is None:
+                collection = self._collections[name] = FlatCollection(
+                    self.path / name, name, metadata, self.quantization, self.rescore_factor
+                )
+            return collection
+    
+    def get_collection(self, name: str) -> FlatCollection:
+        if not (self.path / name / "collection.json").exists():
+            raise ValueError(f"Collection {name} does not exist")
+        return self.get_or_create_collection(name)
+    
+    def list_collections(self) -> List[FlatCollection]:
+        return [self.get_collection(p.name) for p in sorted(self.path.iterdir())
+                if (p / "collection.json").exists()]
+    
+    def delete_collection(self, name: str):
+        with self._lock:
+            collection = self._collections.pop(name, None)
+            if collection is not None:
+                collection._db.close()
+            shutil.rmtree(self.path / name, ignore_errors=True)
+    
+    @staticmethod
+    def get_max_batch_size() -> int:
+        return BLOCK_ROWS
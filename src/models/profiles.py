@@ -0,0 +1,95 @@
+"""
+Per-user interest profiles with cached embeddings
+"""
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Optional
+import numpy as np
+from src.database.models import UserProfile
+from src.utils.config import settings
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE = "default"
+
+
+def parse_interests(interests: str) -> List[str]:
+    return [item.strip() for item in (interests or "").split(",") if item.strip()]
+
+
+@dataclass
+class ProfileMatrix:
+    """Active profiles and their embeddings, one row per user"""
+    ids: List[int]
+    names: List[str]
+    interests: List[List[str]]
+    embeddings: np.ndarray  # (n_users, dim) float32, L2-normalized
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def index(self, name: str) -> int:
+        return self.names.index(name)
+
+
+class ProfileStore:
+    """Reads and writes UserProfile rows, encoding interests only when they change"""
+    
+    def __init__(self, embedding_manager):
+        self.embedding_manager = embedding_manager
+    
+    @staticmethod
+    def upsert(db, name: str, interests: List[str], active: bool = True) -> UserProfile:
+        """Create or update a profile; changed interests invalidate the cached embedding"""
+        joined = ", ".join(interests)
+        profile = db.query(UserProfile).filter(UserProfile.name == name).first()
+        if profile is None:
+            profile = UserProfile(name=name, interests=joined, active=active)
+            db.add(profile)
+        elif profile.interests != joined or profile.active != active:
+            if profile.interests != joined:
+                profile.embedding = None
+            profile.interests = joined
+            profile.active = active
+            profile.updated_date = datetime.now(timezone.utc)
+        db.commit()
+        return profile
+    
+    def ensure_default(self, db, interests: Optional[List[str]] = None) -> UserProfile:
+        """Keep the default profile in sync with USER_INTERESTS (or an explicit list)"""
+        return self.upsert(db, DEFAULT_PROFILE, interests or settings.USER_INTERESTS)
+    
+    def load(self, db) -> ProfileMatrix:
+        """
+        Active profiles as a matrix
+        
+        Profiles without a cached embedding, or cached under a different model,
+        are encoded in one batch and written back.
+        """
+        profiles = db.query(UserProfile).filter(UserProfile.active.is_(True)).order_by(UserProfile.id).all()
+        model_name = self.embedding_manager.model_name
+        stale = [p for p in profiles if p.embedding is None or p.embedding_model != model_name]
+        if stale:
+            texts = [" ".join(parse_interests(p.interests)) for p in stale]
+            embeddings = self.embedding_manager.generate_embeddings(texts, show_progress_bar=False)
+            for profile, embedding in zip(stale, embeddings):
+                profile.embedding = np.asarray(embedding, dtype="<f4").tobytes()
+                profile.embedding_model = model_name
+            db.commit()
+            logger.info(f"Encoded {len(stale)} user profiles")
+        
+        if profiles:
+            matrix = np.stack([np.frombuffer(p.embedding, dtype="<f4") for p in profiles]).astype(np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix /= norms
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        return ProfileMatrix(
+            ids=[p.id for p in profiles],
+            names=[p.name for p in profiles],
+            interests=[parse_interests(p.interests) for p in profiles],
+            embeddings=matrix,
+        )
@@ -7,6 +7,7 @@ from typing import List, Dict
 import numpy as np
 from sklearn.ensemble import GradientBoostingRegressor
 from src.utils.config import settings
+from src.utils import instrumentation
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -73,6 +74,7 @@ class Recommender:
         except Exception as e:
             logger.error(f"Error saving model: {e}")
     
+    @instrumentation.timed(instrumentation.RANK_SECONDS)
     def rank_items(self, items: List, features: List[Dict]) -> List[tuple]:
         """
         Rank items by their features
@@ -86,16 +88,72 @@ class Recommender:
         """
         if len(items) != len(features):
             raise ValueError("Items and features must have same length")
+        instrumentation.RANK_ITEMS.observe(len(items))
         
         # Convert features to array
         X = np.array([[f.get(name, 0.0) for name in self.feature_names] for f in features])
+        return self.rank_matrix(items, X)
+    
+    def rank_matrix(self, items: List, X: np.ndarray) -> List[tuple]:
+        """
+        Rank items from a feature matrix whose columns follow feature_names
         
-        # Predict scores
+        Returns:
+            List of (item, score) tuples sorted by score (descending)
+        """
+        if len(items) == 0:
+            return []
         scores = self.model.predict(X)
+        return sorted(zip(items, scores), key=lambda x: x[1], reverse=True)
+    
+    def rank_stored(self, feature_store, kind: str, profile_id: int, keys: List[str] = None) -> List[tuple]:
+        """
+        Re-rank stored items for a profile from persisted features, without re-encoding
+        
+        Returns:
+            List of (item key, score) tuples sorted by score (descending);
+            keys without stored features for the profile are left out
+        """
+        matrix = feature_store.load(kind, profile_id, keys=keys, feature_names=self.feature_names)
+        return self.rank_matrix(matrix.keys, matrix.X)
+    
+    @instrumentation.timed(instrumentation.RANK_SECONDS)
+    def rank_items_for_users(self, items: List, features: List[Dict], similarity: np.ndarray) -> List[List[tuple]]:
+        """
+        Rank items separately for each user
+        
+        Only the "similarity" feature depends on the user, so the item feature
+        matrix is built once and scored for every user in batched predict calls.
         
-        # Sort by score (descending)
-        ranked = sorted(zip(items, scores), key=lambda x: x[1], reverse=True)
+        Args:
+            items: List of items to rank
+            features: List of feature dicts (one per item); "similarity" is ignored
+            similarity: (n_items, n_users) array from FeatureExtractor.similarity_matrix
+            
+        Returns:
+            One list of (item, score) tuples per user, sorted by score (descending)
+        """
+        if len(items) != len(features) or len(items) != len(similarity):
+            raise ValueError("Items, features and similarity rows must have same length")
+        n_items, n_users = similarity.shape
+        if n_items == 0:
+            return [[] for _ in range(n_users)]
+        instrumentation.RANK_ITEMS.observe(n_items * n_users)
         
+        X = np.array([[f.get(name, 0.0) for name in self.feature_names] for f in features])
+        column = self.feature_names.index("similarity") if "similarity" in self.feature_names else None
+        # Users per predict call, so the stacked feature matrix stays around RANK_BATCH_ROWS rows
+        users_per_batch = max(1, settings.RANK_BATCH_ROWS // n_items)
+        ranked = []
+        for lo in range(0, n_users, users_per_batch):
+            hi = min(lo + users_per_batch, n_users)
+            stacked = np.tile(X, (hi - lo, 1))
+            if column is not None:
+                stacked[:, column] = similarity[:, lo:hi].T.ravel()
+            scores = self.model.predict(stacked).reshape(hi - lo, n_items)
+            for user_scores in scores:
+                order = np.argsort(-user_scores, kind="stable")
+                ranked.append([(items[i], user_scores[i]) for i in order])
         return ranked
     
     def update_model(self, X: np.ndarray, y: np.ndarray):
@@ -109,4 +167,30 @@ class Recommender:
         self.model.fit(X, y)
         self._save_model()
         logger.info("Updated ranking model with new data")
+    
+    def update_model_from_store(self, feature_store, labels: Dict[str, Dict[str, float]], profile_id: int) -> int:
+        """
+        Retrain on persisted features of labelled items
+        
+        Args:
+            feature_store: FeatureStore holding the items' features
+            labels: {kind: {item key: target}}, e.g. from feature_store.interaction_labels
+            profile_id: Profile whose similarity feature is used
+            
+        Returns:
+            Number of training rows (0 if nothing labelled had stored features)
+        """
+        blocks, targets = [], []
+        for kind, by_key in labels.items():
+            if not by_key:
+                continue
+            matrix = feature_store.load(kind, profile_id, keys=list(by_key), feature_names=self.feature_names)
+            if matrix.missing:
+                logger.info(f"{len(matrix.missing)} labelled {kind}s have no stored features")
+            blocks.append(matrix.X)
+            targets.extend(by_key[key] for key in matrix.keys)
+        if not targets:
+            return 0
+        self.update_model(np.vstack(blocks), np.asarray(targets))
+        return len(targets)
 
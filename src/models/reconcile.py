@@ -0,0 +1,182 @@
+"""
+Reconciliation of the papers/articles tables with the vector index
+
+Rows and vectors are written separately, so a failed write on either side
+leaves the stores out of step. The job repairs them in two passes that read
+both stores in pages of RECONCILE_BATCH_SIZE, so time is linear in corpus
+size and memory stays constant:
+
+- vectors: pages through every paper and article collection of the active
+  index version and deletes vectors (full-text chunks included) whose row no
+  longer exists, with one IN query per page
+- rows: pages through each table by primary key, diffs the page's vector IDs
+  against one get per candidate collection, and indexes the missing rows
+  with one encode and upsert per page
+
+Vector IDs follow add_paper/add_article: paper_<arxiv_id>, article_<row id>.
+"""
+import re
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+from src.database.models import Article, Paper, SessionLocal
+from src.models.embeddings import EmbeddingManager, article_document, month_key, paper_document
+from src.utils.config import settings
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+KINDS = ("paper", "article")
+
+_VECTOR_ID = re.compile(r"^(paper|article)_(.+?)(?:_chunk_\d+)?$")
+
+
+class Reconciler:
+    """
+    Diffs the SQL tables against the vector index and repairs the index
+    
+    Args:
+        embedding_manager: Index to repair (default: the active version)
+        session_factory: SQLAlchemy session factory for the item tables
+        batch_size: Rows or vectors per page (default RECONCILE_BATCH_SIZE)
+        dry_run: Only count missing rows and orphaned vectors
+    """
+    
+    def __init__(self, embedding_manager: Optional[EmbeddingManager] = None,
+                 session_factory: Callable = SessionLocal, batch_size: Optional[int] = None,
+                 dry_run: bool = False):
+        self.embedding_manager = embedding_manager or EmbeddingManager()
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.RECONCILE_BATCH_SIZE
+        self.dry_run = dry_run
+    
+    # SQL side
+    
+    def _row_pages(self, db, kind: str) -> Iterator[List[Tuple[str, object]]]:
+        """(vector key, published date) of every row, one keyset-paginated page at a time"""
+        table = Paper if kind == "paper" else Article
+        key = Paper.arxiv_id if kind == "paper" else Article.id
+        last = 0
+        while True:
+            rows = (db.query(table.id, key, table.published_date)
+                    .filter(table.id > last).order_by(table.id).limit(self.batch_size).all())
+            if not rows:
+                return
+            last = rows[-1][0]
+            yield [(str(item_key), published_date) for _, item_key, published_date in rows]
+    
+    @staticmethod
+    def _existing_keys(db, kind: str, keys: Set[str]) -> Set[str]:
+        if not keys:
+            return set()
+        if kind == "paper":
+            return {row[0] for row in db.query(Paper.arxiv_id).filter(Paper.arxiv_id.in_(keys))}
+        ids = [int(key) for key in keys if key.isdigit()]
+        return {str(row[0]) for row in db.query(Article.id).filter(Article.id.in_(ids))}
+    
+    # Vector side
+    
+    def _missing(self, kind: str, page: List[Tuple[str, object]]) -> List[str]:
+        """Keys of a page of rows that no collection holds a vector for"""
+        by_month: Dict[Optional[str], List[str]] = {}
+        for key, published_date in page:
+            by_month.setdefault(month_key(published_date) if published_date else None, []).append(key)
+        missing = []
+        for month, keys in by_month.items():
+            absent = {f"{kind}_{key}" for key in keys}
+            # The item's own month first; anything left is looked up in the other partitions
+            for collections in (self.embedding_manager.type_collections(kind, month),
+                                self.embedding_manager.type_collections(kind)):
+                for collection in collections:
+                    if not absent:
+                        break
+                    if collection is not None:
+                        absent -= set(collection.get(ids=sorted(absent), include=[])["ids"])
+            missing.extend(key for key in keys if f"{kind}_{key}" in absent)
+        return missing
+    
+    def _index(self, db, kind: str, keys: List[str]) -> int:
+        """Encode and upsert missing rows in one batch, stored the way the daily feed stores them"""
+        if kind == "paper":
+            rows = db.query(Paper).filter(Paper.arxiv_id.in_(keys)).all()
+            item_ids = [row.arxiv_id for row in rows]
+            documents = [paper_document(row.title, row.abstract) for row in rows]
+            metadatas = [{"title": row.title, "url": row.arxiv_url,
+                          "authors": ", ".join((row.authors or "").split(", ")[:5])} for row in rows]
+        else:
+            rows = db.query(Article).filter(Article.id.in_([int(key) for key in keys])).all()
+            item_ids = [str(row.id) for row in rows]
+            documents = [article_document(row.title, row.content) for row in rows]
+            metadatas = [{"title": row.title, "url": row.url, "source": row.source} for row in rows]
+        return self.embedding_manager.add_items(kind, item_ids, documents, metadatas,
+                                                [row.published_date for row in rows], batch_size=self.batch_size)
+    
+    def _collections(self) -> List[object]:
+        unique = {}
+        for kind in KINDS:
+            for collection in self.embedding_manager.type_collections(kind):
+                if collection is not None:
+                    unique.setdefault(collection.name, collection)
+        return [unique[name] for name in sorted(unique)]
+    
+    def _drop_orphans(self, db, collection) -> Tuple[int, int]:
+        """Delete a collection's paper/article vectors without a row; returns (scanned, orphaned)"""
+        scanned = orphaned = offset = 0
+        while True:
+            page = collection.get(limit=self.batch_size, offset=offset, include=[])["ids"]
+            if not page:
+                return scanned, orphaned
+            scanned += len(page)
+            keys: Dict[str, Dict[str, str]] = {kind: {} for kind in KINDS}
+            for vector_id in page:
+                match = _VECTOR_ID.match(vector_id)
+                if match:
+                    keys[match.group(1)][vector_id] = match.group(2)
+            orphans = []
+            for kind, by_id in keys.items():
+                present = self._existing_keys(db, kind, set(by_id.values()))
+                orphans.extend(vector_id for vector_id, key in by_id.items() if key not in present)
+            orphaned += len(orphans)
+            if orphans and not self.dry_run:
+                collection.delete(ids=orphans)
+                # Deleted vectors no longer take up offsets
+                offset += len(page) - len(orphans)
+            else:
+                offset += len(page)
+    
+    def run(self) -> Dict:
+        """
+        Delete orphaned vectors, then index rows without a vector
+        
+        Returns:
+            Per-kind row and indexed counts, vectors scanned and orphans
+            found (deleted unless dry_run), and the elapsed time
+        """
+        started = time.perf_counter()
+        report: Dict = {"dry_run": self.dry_run, "vectors_scanned": 0, "orphaned_vectors": 0}
+        db = self.session_factory()
+        try:
+            for collection in self._collections():
+                scanned, orphaned = self._drop_orphans(db, collection)
+                report["vectors_scanned"] += scanned
+                report["orphaned_vectors"] += orphaned
+            logger.info(f"Scanned {report['vectors_scanned']} vectors; "
+                        f"{'found' if self.dry_run else 'deleted'} {report['orphaned_vectors']} without a row")
+            
+            for kind in KINDS:
+                rows = missing = 0
+                for page in self._row_pages(db, kind):
+                    rows += len(page)
+                    keys = self._missing(kind, page)
+                    missing += len(keys)
+                    if keys and not self.dry_run:
+                        self._index(db, kind, keys)
+                report[kind] = {"rows": rows, "missing_vectors": missing}
+                logger.info(f"Checked {rows} {kind} rows; "
+                            f"{'found' if self.dry_run else 'indexed'} {missing} without a vector")
+        finally:
+            db.close()
+        if report["orphaned_vectors"] and not self.dry_run:
+            self.embedding_manager.bump_generation()
+        report["seconds"] = round(time.perf_counter() - started, 2)
+        return report
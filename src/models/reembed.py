@@ -0,0 +1,238 @@
+"""
+Resumable re-embedding of the vector index into a new model's version
+
+The job pages through every collection of the active version and writes
+re-embedded copies into a shadow version (<collection>_<tag>), while
+searches keep using the active one. Progress is saved in the version
+registry after every batch, so an interrupted job resumes from its cursor;
+items the shadow already holds with the same document are never re-encoded.
+Catch-up passes then copy writes that landed during the copy and drop
+vectors deleted meanwhile, and the registry is switched to the shadow in
+one atomic replace.
+"""
+import re
+import time
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from src.models.embeddings import PARTITION_TYPES, EmbeddingManager
+from src.models.versioning import IndexVersion
+from src.utils.config import settings
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ReembedJob:
+    """Builds the index version for model_name (default EMBEDDING_MODEL) and cuts over to it"""
+    
+    def __init__(self, model_name: Optional[str] = None, model=None, persist_dir: Optional[Path] = None,
+                 collection_name: Optional[str] = None, partitioning: Optional[str] = None,
+                 backend: Optional[str] = None, batch_size: Optional[int] = None):
+        model_name = model_name or settings.EMBEDDING_MODEL
+        base_name = collection_name or settings.VECTOR_DB_COLLECTION_NAME
+        # Pinned to the shadow version; only used to encode, write and reach the registry
+        self.target = EmbeddingManager(persist_dir, base_name, model=model, partitioning=partitioning,
+                                       backend=backend, version=IndexVersion.for_model(base_name, model_name))
+        self.version = self.target.version
+        self.registry = self.target.versions
+        self.client = self.target.client
+        self.batch_size = batch_size or settings.REEMBED_BATCH_SIZE
+        self._started = time.perf_counter()
+        self._last_report = 0.0
+        self._embedded_this_run = 0
+    
+    def _pairs(self, source: IndexVersion, target: IndexVersion) -> List[Tuple[object, str]]:
+        """(source collection, target collection name) for every collection of the source version"""
+        pattern = re.compile(rf"^{re.escape(source.name)}(-(?:{'|'.join(PARTITION_TYPES)})-\d{{6}})?$")
+        pairs = []
+        for collection in self.client.list_collections():
+            match = pattern.match(collection.name)
+            if match:
+                pairs.append((collection, f"{target.name}{match.group(1) or ''}"))
+        return sorted(pairs, key=lambda pair: pair[0].name)
+    
+    def _target_collection(self, source, name: str, target: IndexVersion):
+        metadata = {**(source.metadata or {}), "embedding_model": target.model}
+        return self.client.get_or_create_collection(name=name, metadata=metadata)
+    
+    def _copy(self, page: Dict, target, since: Optional[int] = None) -> int:
+        """
+        Re-embed the items of a page the target lacks or holds with another document
+        
+        With since (a published_ts), only items published from then on that
+        the target lacks are copied, and nothing the target holds is replaced.
+        """
+        ids, documents, metadatas = page["ids"], page["documents"], page["metadatas"]
+        existing = target.get(ids=ids, include=["documents"])
+        held = dict(zip(existing["ids"], existing["documents"]))
+        if since is None:
+            todo = [i for i, item_id in enumerate(ids)
+                    if documents[i] is not None and (item_id not in held or held[item_id] != documents[i])]
+        else:
+            todo = [i for i, item_id in enumerate(ids)
+                    if documents[i] is not None and item_id not in held
+                    and (metadatas[i] or {}).get("published_ts", 0) >= since]
+        if not todo:
+            return 0
+        target.upsert(
+            ids=[ids[i] for i in todo],
+            embeddings=self.target.generate_embeddings([documents[i] for i in todo], show_progress_bar=False),
+            documents=[documents[i] for i in todo],
+            metadatas=[metadatas[i] for i in todo]
+        )
+        self._embedded_this_run += len(todo)
+        return len(todo)
+    
+    def _report(self, progress: Dict, force: bool = False):
+        now = time.perf_counter()
+        elapsed = now - self._started
+        rate = self._embedded_this_run / elapsed if elapsed > 0 else 0.0
+        remaining = max(progress["total"] - progress["scanned"], 0)
+        progress.update({
+            "updated": datetime.now().isoformat(),
+            "items_per_sec": round(rate, 2),
+            "eta_seconds": round(remaining / rate) if rate > 0 and progress["phase"] == "copy" else None,
+        })
+        self.registry.save_migration(progress)
+        if force or now - self._last_report >= settings.REEMBED_PROGRESS_SECONDS:
+            self._last_report = now
+            logger.info(f"Re-embedding into {self.version.name} ({progress['phase']}): "
+                        f"{progress['scanned']}/{progress['total']} scanned, {progress['embedded']} embedded, "
+                        f"{progress['items_per_sec']}/s")
+    
+    def _scan(self, source, target, progress: Dict, offset: int = 0, since: Optional[int] = None) -> int:
+        """Copy one source collection from offset, saving the cursor after each batch (since: see _copy)"""
+        changed = 0
+        while True:
+            page = source.get(limit=self.batch_size, offset=offset, include=["documents", "metadatas"])
+            if not page["ids"]:
+                return changed
+            copied = self._copy(page, target, since)
+            changed += copied
+            offset += len(page["ids"])
+            progress["cursor"][source.name] = offset
+            progress["scanned"] += len(page["ids"])
+            progress["embedded"] += copied
+            self._report(progress)
+    
+    def _drop_orphans(self, source, target) -> int:
+        """Delete target vectors whose source item no longer exists"""
+        orphans = []
+        offset = 0
+        while True:
+            page = target.get(limit=self.batch_size * 4, offset=offset, include=[])
+            if not page["ids"]:
+                break
+            present = set(source.get(ids=page["ids"], include=[])["ids"])
+            orphans.extend(item_id for item_id in page["ids"] if item_id not in present)
+            offset += len(page["ids"])
+        for lo in range(0, len(orphans), self.batch_size):
+            target.delete(ids=orphans[lo:lo + self.batch_size])
+        return len(orphans)
+    
+    def _catch_up(self, source_version: IndexVersion, target_version: IndexVersion, progress: Dict) -> int:
+        """One full pass copying changes made since the copy, plus deletions; returns items changed"""
+        pairs = self._pairs(source_version, target_version)
+        changed = 0
+        for source, name in pairs:
+            target = self._target_collection(source, name, target_version)
+            changed += self._scan(source, target, progress)
+            changed += self._drop_orphans(source, target)
+        # Partitions dropped by retention during the copy
+        wanted = {name for _, name in pairs}
+        for collection, name in self._pairs(target_version, target_version):
+            if name not in wanted:
+                self.client.delete_collection(name)
+                changed += 1
+        return changed
+    
+    def run(self) -> Dict:
+        """
+        Copy, catch up and cut over
+        
+        Returns:
+            Final progress (scanned and embedded counts, items/sec), or the
+            registry status if the index already uses this model
+        """
+        active = self.registry.active(settings.EMBEDDING_MODEL)
+        if active.name == self.version.name:
+            logger.info(f"Index already uses {self.version.model}")
+            return self.registry.status()
+        
+        pairs = self._pairs(active, self.version)
+        progress = self.registry.migration()
+        if not progress or progress.get("name") != self.version.name or progress.get("source") != active.name:
+            progress = {
+                "name": self.version.name,
+                "model": self.version.model,
+                "version": asdict(self.version),
+                "source": active.name,
+                "started": datetime.now().isoformat(),
+                "phase": "copy",
+                "cursor": {},
+                "scanned": 0,
+                "embedded": 0,
+            }
+        else:
+            # Resuming: keep the original version record (its creation time)
+            self.version = IndexVersion(**progress["version"])
+            logger.info(f"Resuming re-embedding into {self.version.name} at {progress['scanned']} items")
+        progress["total"] = sum(source.count() for source, _ in pairs)
+        
+        if progress["phase"] == "copy":
+            for source, name in pairs:
+                target = self._target_collection(source, name, self.version)
+                self._scan(source, target, progress, offset=progress["cursor"].get(source.name, 0))
+            progress["phase"] = "catch-up"
+            self._report(progress, force=True)
+        
+        for attempt in range(settings.REEMBED_CATCHUP_PASSES):
+            progress["total"] = progress["scanned"] + sum(source.count() for source, _ in self._pairs(active, self.version))
+            changed = self._catch_up(active, self.version, progress)
+            self._report(progress, force=True)
+            if changed == 0:
+                break
+        
+        self.registry.cut_over(self.version)
+        self.target.bump_generation()
+        logger.info(f"Cut over to {self.version.name} ({self.version.model}); "
+                    f"{progress['embedded']} items embedded")
+        return progress
+    
+    def drop_previous(self) -> int:
+        """
+        Delete the version that was active before the last cutover
+        
+        Writers started before the cutover keep writing to the old version,
+        so its late additions are copied over first: items published since
+        the active version was created that it does not hold. Older items and
+        items the active version already holds are left alone, so deletions
+        and updates made after the cutover stick; a late write of an older
+        item is left for the reconciler to index.
+        
+        Returns:
+            Number of collections deleted
+        """
+        active = self.registry.active(settings.EMBEDDING_MODEL)
+        previous = self.registry.previous()
+        if previous is None:
+            return 0
+        if active.name != self.version.name:
+            raise ValueError(f"Active version is {active.name}, not {self.version.name}; run the migration first")
+        progress = {"name": active.name, "model": active.model, "source": previous.name, "phase": "catch-up",
+                    "cursor": {}, "scanned": 0, "embedded": 0, "total": 0}
+        since = int(datetime.fromisoformat(active.created).timestamp())
+        pairs = self._pairs(previous, active)
+        for source, name in pairs:
+            target = self._target_collection(source, name, active)
+            self._scan(source, target, progress, since=since)
+        for source, _ in pairs:
+            self.client.delete_collection(source.name)
+        self.registry.save_migration(None)
+        self.registry.forget_previous()
+        self.target.bump_generation()
+        logger.info(f"Dropped {len(pairs)} collections of {previous.name} ({progress['embedded']} late items copied)")
+        return len(pairs)
@@ -0,0 +1,126 @@
+"""
+Embedding-model versions of the vector index
+
+Each embedding model gets its own set of collections, named
+<collection>_<tag> where tag is derived from the model name (the index that
+predates versioning keeps the bare <collection> name). A small JSON registry
+next to the collections records which version is active, the previous one,
+and the progress of a re-embedding migration. Readers follow the active
+version; a migration only ever writes the registry with an atomic replace,
+which is what makes the cutover atomic.
+"""
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def version_tag(model_name: str) -> str:
+    return hashlib.sha1(model_name.encode("utf-8")).hexdigest()[:8]
+
+
+@dataclass(frozen=True)
+class IndexVersion:
+    """One embedding space: the model and the collection base name that holds its vectors"""
+    model: str
+    name: str
+    created: str = ""
+    
+    @classmethod
+    def for_model(cls, base_name: str, model_name: str) -> "IndexVersion":
+        return cls(model=model_name, name=f"{base_name}_{version_tag(model_name)}",
+                   created=datetime.now().isoformat())
+
+
+class VersionRegistry:
+    """
+    <collection>.versions.json in the vector DB directory
+    
+    {"active": IndexVersion, "previous": IndexVersion | null, "migration": progress | null}
+    """
+    
+    def __init__(self, root: Path, base_name: str):
+        self.path = Path(root) / f"{base_name}.versions.json"
+        self.base_name = base_name
+        self._lock = threading.Lock()
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        self._state: Dict = {}
+    
+    def stamp(self) -> Optional[Tuple[int, int, int]]:
+        """Cheap change marker: every write replaces the file (new inode, mtime and usually size)"""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+    
+    def _read(self) -> Dict:
+        stamp = self.stamp()
+        if stamp is None:
+            return {}
+        with self._lock:
+            if stamp != self._stamp:
+                try:
+                    self._state = json.loads(self.path.read_text())
+                    self._stamp = stamp
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Could not read {self.path}: {e}")
+            return self._state
+    
+    def _write(self, state: Dict):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(state, indent=2))
+        os.replace(tmp, self.path)
+    
+    def active(self, default_model: str) -> IndexVersion:
+        """
+        Version queries and writes should use
+        
+        The first call on an index records the existing bare-named collections
+        as built with default_model, so a later model change is detected
+        instead of silently mixing embedding spaces.
+        """
+        state = self._read()
+        if not state.get("active"):
+            state = {"active": asdict(IndexVersion(model=default_model, name=self.base_name,
+                                                   created=datetime.now().isoformat())),
+                     "previous": None, "migration": None}
+            self._write(state)
+        return IndexVersion(**state["active"])
+    
+    def previous(self) -> Optional[IndexVersion]:
+        previous = self._read().get("previous")
+        return IndexVersion(**previous) if previous else None
+    
+    def migration(self) -> Optional[Dict]:
+        return self._read().get("migration")
+    
+    def status(self) -> Dict:
+        return dict(self._read())
+    
+    def save_migration(self, progress: Optional[Dict]):
+        state = dict(self._read())
+        state["migration"] = progress
+        self._write(state)
+    
+    def cut_over(self, version: IndexVersion):
+        """Make version active in one atomic registry replace"""
+        state = dict(self._read())
+        state["previous"] = state.get("active")
+        state["active"] = asdict(version)
+        state["migration"] = None
+        self._write(state)
+    
+    def forget_previous(self):
+        state = dict(self._read())
+        state["previous"] = None
+        self._write(state)
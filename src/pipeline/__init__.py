@@ -0,0 +1,5 @@
+"""Daily feed pipeline"""
+from .runner import Stage, StagedPipeline, StageStats
+from .daily_feed import DailyFeedPipeline, FeedItem
+
+__all__ = ["Stage", "StagedPipeline", "StageStats", "DailyFeedPipeline", "FeedItem"]
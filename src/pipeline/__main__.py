@@ -0,0 +1,42 @@
+"""
+Run the daily feed: python -m src.pipeline
+"""
+import argparse
+import json
+from src.pipeline.daily_feed import DailyFeedPipeline, format_feed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the daily feed pipeline")
+    parser.add_argument("--collect-workers", type=int)
+    parser.add_argument("--embed-workers", type=int)
+    parser.add_argument("--summarize-workers", type=int)
+    parser.add_argument("--run-id", help="Checkpoint ID to create or resume (default: today's date)")
+    parser.add_argument("--replay", metavar="RUN_ID",
+                        help="Feed the archived collection of an earlier run instead of fetching")
+    parser.add_argument("--fresh", action="store_true", help="Discard existing checkpoints for the run ID")
+    parser.add_argument("--report", action="store_true", help="Print per-stage throughput as JSON")
+    parser.add_argument("--profile", action="store_true", default=None,
+                        help="Write a stack-sample and allocation profile of the run (default: PROFILING_ENABLED)")
+    args = parser.parse_args()
+    
+    workers = {
+        stage: count for stage, count in (
+            ("collect", args.collect_workers),
+            ("embed", args.embed_workers),
+            ("summarize", args.summarize_workers),
+        ) if count
+    }
+    pipeline = DailyFeedPipeline(workers=workers, replay=args.replay)
+    items = pipeline.run(run_id=args.run_id, resume=not args.fresh, profile=args.profile)
+    
+    print(format_feed(items))
+    if args.report:
+        print(json.dumps(pipeline.pipeline.report(), indent=2))
+    if not pipeline.checkpoint.finished:
+        # Non-zero exit so a scheduler notices; the same run ID resumes the failed items
+        raise SystemExit(f"Run {pipeline.checkpoint.run_id} had failed stages, run it again to resume")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Per-run checkpoints so an interrupted daily feed can resume where it stopped
+"""
+import json
+import os
+import pickle
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from src.utils.config import settings
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class StageLog:
+    """Append-only log of (key, value) records for one stage of one run"""
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._records: Dict[str, Any] = dict(self._read())
+    
+    def _read(self) -> Iterator[Tuple[str, Any]]:
+        if not self.path.exists():
+            return
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            good = 0
+            while good < size:
+                try:
+                    record = pickle.load(f)
+                except (EOFError, pickle.UnpicklingError) as e:
+                    # A crash mid-write leaves a truncated final record; keep the rest
+                    logger.warning(f"Dropping truncated checkpoint tail in {self.path}: {e}")
+                    break
+                except (ValueError, AttributeError) as e:
+                    logger.warning(f"Ignoring unreadable checkpoint tail in {self.path}: {e}")
+                    return
+                good = f.tell()
+                yield record
+        if good < size:
+            # Cut it off, or records appended after it would never be read back
+            os.truncate(self.path, good)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._records
+    
+    def __len__(self) -> int:
+        return len(self._records)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._records.get(key, default)
+    
+    def items(self) -> List[Tuple[str, Any]]:
+        with self._lock:
+            return list(self._records.items())
+    
+    def append(self, records: List[Tuple[str, Any]]):
+        """Durably append records (one write, flush and fsync per call)"""
+        if not records:
+            return
+        payload = b"".join(pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL) for record in records)
+        with self._lock:
+            with open(self.path, "ab") as f:
+                f.write(payload)
+                f.flush()
+                # Records count as checkpointed once this returns, so they must survive an OS crash too
+                os.fsync(f.fileno())
+            self._records.update(records)
+
+
+class RunCheckpoint:
+    """
+    Checkpoint directory for one pipeline run
+    
+    Layout under PROCESSED_DATA_DIR/runs/<run_id>/:
+        run.json           status, completed and failed stages, and the final report
+        <stage>.log        append-only pickled (key, value) records
+    """
+    
+    STAGES = ("raw", "filtered", "embeddings", "features", "scores", "summaries", "stored")
+    
+    def __init__(self, run_id: Optional[str] = None, root: Optional[Path] = None):
+        self.root = Path(root or settings.CHECKPOINT_DIR)
+        self.run_id = run_id or datetime.now().strftime("%Y%m%d")
+        self.path = self.root / self.run_id
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._meta = self._load_meta()
+        self._open_logs()
+    
+    def _open_logs(self):
+        self.logs = {stage: StageLog(self.path / f"{stage}.log") for stage in self.STAGES}
+        self.raw = self.logs["raw"]
+        self.filtered = self.logs["filtered"]
+        self.embeddings = self.logs["embeddings"]
+        self.features = self.logs["features"]
+        self.scores = self.logs["scores"]
+        self.summaries = self.logs["summaries"]
+        self.stored = self.logs["stored"]
+    
+    @property
+    def resumed(self) -> bool:
+        """True if this run already has progress on disk"""
+        return bool(self._meta.get("completed")) or any(len(log) for log in self.logs.values())
+    
+    @property
+    def finished(self) -> bool:
+        """True once the run has ended without failed stages"""
+        return self._meta.get("status") == "finished"
+    
+    def _load_meta(self) -> Dict:
+        meta_path = self.path / "run.json"
+        if meta_path.exists():
+            try:
+                return json.loads(meta_path.read_text())
+            except ValueError:
+                logger.warning(f"Corrupt run metadata in {meta_path}, starting fresh metadata")
+        return {"run_id": self.run_id, "started": datetime.now().isoformat(), "status": "running", "completed": []}
+    
+    def _save_meta(self):
+        tmp = self.path / "run.json.tmp"
+        tmp.write_text(json.dumps(self._meta, indent=2, default=str))
+        tmp.replace(self.path / "run.json")
+    
+    def is_complete(self, step: str) -> bool:
+        return step in self._meta["completed"]
+    
+    def mark_complete(self, step: str):
+        with self._lock:
+            if step not in self._meta["completed"]:
+                self._meta["completed"].append(step)
+                self._save_meta()
+    
+    def finish(self, report: Optional[List[Dict]] = None, failed_stages: Optional[List[str]] = None):
+        """
+        Record the end of the run; with failed_stages it is marked failed, not finished
+        
+        A failed run keeps its checkpoints, so running its ID again resumes it
+        and retries the items that failed.
+        """
+        with self._lock:
+            self._meta["status"] = "failed" if failed_stages else "finished"
+            self._meta["failed_stages"] = list(failed_stages or [])
+            self._meta["ended"] = datetime.now().isoformat()
+            if report is not None:
+                self._meta["report"] = report
+            self._save_meta()
+    
+    def reset(self):
+        """Discard all progress for this run ID"""
+        shutil.rmtree(self.path, ignore_errors=True)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._meta = self._load_meta()
+        self._open_logs()
+
+
+def gc_runs(root: Optional[Path] = None, keep_last: Optional[int] = None,
+            max_age_days: Optional[float] = None, exclude: Tuple[str, ...] = ()) -> List[str]:
+    """
+    Delete old run directories
+    
+    The newest `keep_last` runs are always kept; older ones are removed once
+    they are more than `max_age_days` old.
+    
+    Returns:
+        IDs of deleted runs
+    """
+    root = Path(root or settings.CHECKPOINT_DIR)
+    keep_last = settings.CHECKPOINT_KEEP_RUNS if keep_last is None else keep_last
+    max_age_days = settings.CHECKPOINT_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    if not root.exists():
+        return []
+    
+    runs = sorted((p for p in root.iterdir() if p.is_dir()), key=lambda p: p.stat().st_mtime, reverse=True)
+    cutoff = time.time() - max_age_days * 86400
+    deleted = []
+    for run_dir in runs[keep_last:]:
+        if run_dir.name in exclude or run_dir.stat().st_mtime >= cutoff:
+            continue
+        shutil.rmtree(run_dir, ignore_errors=True)
+        deleted.append(run_dir.name)
+    
+    if deleted:
+        logger.info(f"Removed {len(deleted)} old runs from {root}")
+    return deleted
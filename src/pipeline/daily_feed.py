@@ -0,0 +1,504 @@
+"""
+Daily feed pipeline: Collect -> Filter -> Embed -> Rank -> Summarize -> Store
+"""
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Any, Callable, Iterable, Iterator, Tuple
+import numpy as np
+from pathlib import Path
+from src.collectors import ArxivCollector, HNCollector, MediumCollector, DevToCollector, RecordBatch
+from src.collectors.citations import CitationEnricher
+from src.database import Paper, Article, UserRecommendation, SessionLocal, init_db
+from src.ingest import FullTextIngestor
+from src.models import EmbeddingManager, Recommender, FeatureExtractor, NearDuplicateDetector, ProfileStore, ProfileMatrix
+from src.models.embeddings import article_document, paper_document
+from src.models.feature_store import FeatureStore
+from src.models.profiles import DEFAULT_PROFILE
+from src.pipeline.checkpoint import RunCheckpoint, gc_runs
+from src.pipeline.runner import Stage, StagedPipeline
+from src.rag import Generator
+from src.utils import instrumentation
+from src.utils.config import settings
+from src.utils.profiling import Profiler
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FeedItem:
+    """A paper or article moving through the pipeline"""
+    kind: str  # "paper" or "article"
+    data: Any  # PaperData or ArticleData
+    embedding: Optional[List[float]] = None
+    features: Dict = field(default_factory=dict)
+    score: float = 0.0
+    recommended: bool = False
+    user_scores: Dict[int, float] = field(default_factory=dict)  # UserProfile.id -> score, for users it was picked for
+    summary: Optional[str] = None
+    
+    @property
+    def key(self) -> str:
+        return self.data.arxiv_id if self.kind == "paper" else self.data.url
+    
+    @property
+    def text(self) -> str:
+        """Text indexed in the vector database (matches EmbeddingManager.add_*)"""
+        if self.kind == "paper":
+            return paper_document(self.data.title, self.data.abstract)
+        return article_document(self.data.title, self.data.content)
+    
+    @property
+    def summary_source(self) -> str:
+        return self.data.abstract if self.kind == "paper" else self.data.content or ""
+
+
+class DailyFeedPipeline:
+    """Wires collectors, ranking, summarization and storage into a streaming pipeline"""
+    
+    def __init__(self, embedding_manager: Optional[EmbeddingManager] = None,
+                 recommender: Optional[Recommender] = None,
+                 generator: Optional[Generator] = None,
+                 workers: Optional[Dict[str, int]] = None,
+                 user_interests: Optional[List[str]] = None,
+                 replay: Optional[str] = None,
+                 citations: Optional[CitationEnricher] = None):
+        self.embedding_manager = embedding_manager or EmbeddingManager()
+        self.recommender = recommender or Recommender()
+        if generator is None:
+            try:
+                generator = Generator()
+            except ValueError as e:
+                logger.warning(f"LLM generator unavailable, summaries will be skipped: {e}")
+        self.generator = generator
+        self.user_interests = user_interests or settings.USER_INTERESTS
+        self.replay = replay  # Run ID whose archived collection replaces the live collectors
+        if citations is None and settings.CITATION_PROVIDER != "none":
+            citations = CitationEnricher()
+        self.citations = citations
+        self.feature_store = (FeatureStore.for_model(self.embedding_manager.model_name)
+                              if settings.FEATURE_STORE_ENABLED else None)
+        self.detector = NearDuplicateDetector()
+        self.profile_store = ProfileStore(self.embedding_manager)
+        self.profiles: Optional[ProfileMatrix] = None
+        
+        self.workers = {
+            "collect": settings.PIPELINE_COLLECT_WORKERS,
+            "embed": settings.PIPELINE_EMBED_WORKERS,
+            "summarize": settings.PIPELINE_SUMMARIZE_WORKERS,
+            "store": settings.PIPELINE_STORE_WORKERS,
+            **(workers or {})
+        }
+        self.pipeline: Optional[StagedPipeline] = None
+        self.fulltext: Optional[FullTextIngestor] = None
+        self.checkpoint: Optional[RunCheckpoint] = None
+        self._interests_embedding = None
+        self._seen = set()
+    
+    def sources(self) -> List[Tuple[str, str, Callable[[], Iterable]]]:
+        """One (name, kind, fetch) task per configured source; fetch returns an iterator"""
+        if self.replay:
+            return self._archived_sources(self.replay)
+        tasks = [("arxiv", "paper", lambda: ArxivCollector().iter_recent_papers())]
+        article_collectors = {
+            "hackernews": HNCollector,
+            "medium": MediumCollector,
+            "devto": DevToCollector,
+        }
+        for source in settings.TECH_SOURCES:
+            collector_cls = article_collectors.get(source)
+            if collector_cls is not None:
+                tasks.append((source, "article", lambda cls=collector_cls: cls().iter_articles()))
+        return tasks
+    
+    def _archived_sources(self, run_id: str) -> List[Tuple[str, str, Callable[[], Iterable]]]:
+        archive = Path(settings.RAW_ARCHIVE_DIR) / run_id
+        paths = sorted(archive.glob("*.rec"))
+        if not paths:
+            raise FileNotFoundError(f"No archived collection for run {run_id} in {archive}")
+        tasks = []
+        for path in paths:
+            with RecordBatch.open(path) as batch:
+                kind = batch.kind
+            tasks.append((path.stem, kind, lambda path=path: self._replay_batch(path)))
+        return tasks
+    
+    @staticmethod
+    def _replay_batch(path: Path) -> Iterator:
+        with RecordBatch.open(path) as batch:
+            yield from batch
+    
+    def _archive(self, name: str, records: List):
+        """Keep a source's records so the run can be replayed without refetching"""
+        if not settings.RAW_ARCHIVE_ENABLED or self.replay or not records:
+            return
+        try:
+            RecordBatch.from_records(records).write(
+                Path(settings.RAW_ARCHIVE_DIR) / self.checkpoint.run_id / f"{name}.rec"
+            )
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Could not archive {name} records: {e}")
+    
+    def build(self) -> StagedPipeline:
+        stages = [
+            Stage("collect", self._collect, workers=self.workers["collect"]),
+            Stage("filter", self._filter, batch_size=settings.PIPELINE_EMBED_BATCH_SIZE),
+        ]
+        if self.citations is not None:
+            stages.append(Stage("enrich", self._enrich, batch_size=settings.CITATION_BATCH_SIZE))
+        stages += [
+            Stage("embed", self._embed, workers=self.workers["embed"],
+                  batch_size=settings.PIPELINE_EMBED_BATCH_SIZE),
+            Stage("rank", self._rank, barrier=True),
+            Stage("summarize", self._summarize, workers=self.workers["summarize"]),
+            Stage("store", self._store, workers=self.workers["store"], batch_size=64),
+        ]
+        if self.fulltext is not None:
+            stages.append(Stage("fulltext", self._fulltext, workers=settings.PDF_DOWNLOAD_WORKERS))
+        return StagedPipeline(stages, queue_size=settings.PIPELINE_QUEUE_SIZE)
+    
+    def run(self, run_id: Optional[str] = None, resume: bool = True,
+            profile: Optional[bool] = None) -> List[FeedItem]:
+        """
+        Run the daily feed end to end
+        
+        Args:
+            run_id: Checkpoint ID (defaults to today's date, so a rerun on the
+                same day resumes the interrupted run)
+            resume: If False, discard existing progress for run_id first
+            profile: Profile the run into PROFILE_DIR/<run_id> (default PROFILING_ENABLED)
+            
+        Returns:
+            Recommended items sorted by score (descending). If a stage had
+            errors the run is left unfinished (checkpoint.finished is False).
+        """
+        self.checkpoint = RunCheckpoint(run_id)
+        if not resume:
+            self.checkpoint.reset()
+        elif self.checkpoint.resumed:
+            logger.info(f"Resuming run {self.checkpoint.run_id} "
+                        f"({len(self.checkpoint.stored)} items already stored)")
+        gc_runs(exclude=(self.checkpoint.run_id,))
+        gc_runs(settings.RAW_ARCHIVE_DIR, keep_last=settings.RAW_ARCHIVE_KEEP_RUNS,
+                max_age_days=settings.RAW_ARCHIVE_MAX_AGE_DAYS, exclude=(self.checkpoint.run_id, self.replay or ""))
+        gc_runs(settings.PROFILE_DIR, keep_last=settings.PROFILE_KEEP_RUNS,
+                max_age_days=settings.PROFILE_MAX_AGE_DAYS, exclude=(self.checkpoint.run_id,))
+        
+        if settings.PROFILING_ENABLED if profile is None else profile:
+            # Timestamped label: a resumed run keeps the profiles of its earlier attempts. Always
+            # sampled: the stages run in their own threads, which cProfile would not see
+            with Profiler(self.checkpoint.run_id, f"feed-{datetime.now():%H%M%S}", mode="sampling"):
+                return self._execute()
+        return self._execute()
+    
+    def _execute(self) -> List[FeedItem]:
+        init_db()
+        db = SessionLocal()
+        try:
+            self.detector.load_history(db)
+            # The default profile follows user_interests; other profiles are managed through the API
+            self.profile_store.ensure_default(db, self.user_interests)
+            self.profiles = self.profile_store.load(db)
+        finally:
+            db.close()
+        
+        self._interests_embedding = self.profiles.embeddings[self.profiles.index(DEFAULT_PROFILE)]
+        self._seen = set()
+        with ExitStack() as stack:
+            if settings.PDF_FULLTEXT_ENABLED:
+                self.fulltext = stack.enter_context(FullTextIngestor(self.embedding_manager))
+            self.pipeline = self.build()
+            items = self.pipeline.run(self.sources())
+        self.fulltext = None
+        if self.citations is not None:
+            # Stale counts served this run finish refreshing in the background, up to a bound
+            self.citations.close(timeout=settings.CITATION_REFRESH_WAIT_SECONDS)
+        
+        db = SessionLocal()
+        try:
+            self.detector.save(db)
+        finally:
+            db.close()
+        
+        self.embedding_manager.apply_retention()
+        self.pipeline.log_report()
+        report = self.pipeline.report()
+        failed = [row["stage"] for row in report if row["errors"]]
+        self.checkpoint.finish(report, failed_stages=failed)
+        if failed:
+            logger.warning(f"Run {self.checkpoint.run_id} had errors in {', '.join(failed)}; "
+                           f"run it again to resume")
+        self._write_metrics()
+        recommended = [item for item in items if item.recommended]
+        return sorted(recommended, key=lambda item: item.score, reverse=True)
+    
+    def _write_metrics(self):
+        """Dump this run's instrumentation next to its checkpoints"""
+        if not instrumentation.is_enabled():
+            return
+        instrumentation.REGISTRY.write_json(
+            self.checkpoint.path / "metrics.json",
+            run_id=self.checkpoint.run_id,
+            stages=self.pipeline.report()
+        )
+        if settings.METRICS_PROM_FILE:
+            instrumentation.REGISTRY.write_prometheus(settings.METRICS_PROM_FILE)
+    
+    # Stage functions: each takes a batch and returns outputs for the next stage
+    
+    def _collect(self, tasks: List) -> Iterator[FeedItem]:
+        """Stream items downstream as collectors yield them"""
+        for name, kind, fetch in tasks:
+            if name in self.checkpoint.raw:
+                for data in self.checkpoint.raw.get(name):
+                    yield FeedItem(kind, data)
+                continue
+            fetched = []
+            for data in fetch():
+                fetched.append(data)
+                yield FeedItem(kind, data)
+            # Checkpointed only once complete: a source interrupted part-way is fetched again on resume
+            self.checkpoint.raw.append([(name, fetched)])
+            self._archive(name, fetched)
+    
+    def _filter(self, items: List[FeedItem]) -> List[FeedItem]:
+        """Drop items already stored and near-duplicate articles"""
+        # Replay earlier decisions of this run so a resumed run ranks the same item set
+        decided = [i for i in items if i.key in self.checkpoint.filtered]
+        items = [i for i in items if i.key not in self.checkpoint.filtered]
+        replayed = []
+        for item in decided:
+            if self.checkpoint.filtered.get(item.key) and item.key not in self._seen:
+                self._seen.add(item.key)
+                replayed.append(item)
+        if not items:
+            return replayed
+        
+        db = SessionLocal()
+        try:
+            paper_ids = [i.key for i in items if i.kind == "paper"]
+            article_urls = [i.key for i in items if i.kind == "article"]
+            known = set()
+            if paper_ids:
+                known.update(r for (r,) in db.query(Paper.arxiv_id).filter(Paper.arxiv_id.in_(paper_ids)))
+            if article_urls:
+                known.update(r for (r,) in db.query(Article.url).filter(Article.url.in_(article_urls)))
+        finally:
+            db.close()
+        
+        fresh = []
+        for item in items:
+            if item.key not in known and item.key not in self._seen:
+                self._seen.add(item.key)
+                fresh.append(item)
+        papers = [i for i in fresh if i.kind == "paper"]
+        articles = [i for i in fresh if i.kind == "article"]
+        if articles:
+            by_url = {i.key: i for i in articles}
+            representatives, _ = self.detector.deduplicate([i.data for i in articles])
+            articles = [by_url[a.url] for a in representatives]
+        
+        kept = papers + articles
+        kept_keys = {i.key for i in kept}
+        self.checkpoint.filtered.append([(i.key, i.key in kept_keys) for i in items])
+        return replayed + kept
+    
+    def _enrich(self, items: List[FeedItem]) -> List[FeedItem]:
+        """Fill in paper citation counts (cached, one bulk request for the unknown ones)"""
+        papers = [i.data for i in items if i.kind == "paper"]
+        if papers:
+            self.citations.enrich(papers)
+        return items
+    
+    def _embed(self, items: List[FeedItem]) -> List[FeedItem]:
+        """Batch-encode items and compute ranking features from the embeddings"""
+        todo = [i for i in items if i.key not in self.checkpoint.embeddings]
+        if todo:
+            embeddings = self.embedding_manager.generate_embeddings([i.text for i in todo], show_progress_bar=False)
+            self.checkpoint.embeddings.append([(i.key, e) for i, e in zip(todo, embeddings)])
+        
+        new_features = []
+        for item in items:
+            item.embedding = self.checkpoint.embeddings.get(item.key)
+            if item.key in self.checkpoint.features:
+                item.features = self.checkpoint.features.get(item.key)
+                continue
+            extract = (FeatureExtractor.extract_paper_features if item.kind == "paper"
+                       else FeatureExtractor.extract_article_features)
+            item.features = extract(item.data, self.embedding_manager, self.user_interests,
+                                    item_embedding=item.embedding,
+                                    interests_embedding=self._interests_embedding)
+            new_features.append((item.key, item.features))
+        self.checkpoint.features.append(new_features)
+        return items
+    
+    def _rank(self, items: List[FeedItem]) -> List[FeedItem]:
+        """Score everything per user profile, recommend each user's top relevant papers and articles"""
+        if self.checkpoint.is_complete("rank") and all(i.key in self.checkpoint.scores for i in items):
+            for item in items:
+                item.score, item.recommended, item.user_scores = self.checkpoint.scores.get(item.key)
+            return sorted(items, key=lambda i: (not i.recommended, -i.score))
+        
+        for kind, top_n in (("paper", settings.TOP_PAPERS_COUNT), ("article", settings.TOP_ARTICLES_COUNT)):
+            group = [i for i in items if i.kind == kind]
+            if not group:
+                continue
+            # All users x all candidates in one product; each user only adds a column
+            similarity = FeatureExtractor.similarity_matrix(
+                np.array([i.embedding for i in group], dtype=np.float32), self.profiles.embeddings
+            )
+            column = {item.key: row for row, item in enumerate(group)}
+            per_user = self.recommender.rank_items_for_users(group, [i.features for i in group], similarity)
+            for u, (user_id, ranked) in enumerate(zip(self.profiles.ids, per_user)):
+                selected = 0
+                for item, score in ranked:
+                    if selected >= top_n:
+                        break
+                    if similarity[column[item.key], u] >= settings.MIN_SIMILARITY_THRESHOLD:
+                        item.user_scores[user_id] = float(score)
+                        selected += 1
+            if self.feature_store is not None:
+                self.feature_store.write(kind, [i.key for i in group], [i.features for i in group],
+                                         [i.data.published_date for i in group], similarity, self.profiles.ids)
+            default_scores = {item.key: float(score) for item, score in per_user[self.profiles.index(DEFAULT_PROFILE)]}
+            for item in group:
+                # Stored relevance: best score among the users it was picked for, else the default user's
+                item.recommended = bool(item.user_scores)
+                item.score = max(item.user_scores.values(), default=default_scores[item.key])
+        self.checkpoint.scores.append([(i.key, (i.score, i.recommended, i.user_scores)) for i in items])
+        self.checkpoint.mark_complete("rank")
+        # Recommended first so summaries start as early as possible
+        return sorted(items, key=lambda i: (not i.recommended, -i.score))
+    
+    def _summarize(self, items: List[FeedItem]) -> List[FeedItem]:
+        for item in items:
+            if not item.recommended:
+                continue
+            if item.key in self.checkpoint.summaries:
+                item.summary = self.checkpoint.summaries.get(item.key)
+            elif self.generator is not None:
+                # A failed call fails the batch: nothing is checkpointed or stored, so a rerun retries it
+                item.summary = self.generator.generate_summary(
+                    item.data.title, item.summary_source, self.user_interests, raise_errors=True
+                )
+                self.checkpoint.summaries.append([(item.key, item.summary)])
+        return items
+    
+    def _store(self, items: List[FeedItem]) -> List[FeedItem]:
+        """Persist rows to SQLite and vectors to the vector database"""
+        done = [i for i in items if i.key in self.checkpoint.stored]
+        items = [i for i in items if i.key not in self.checkpoint.stored]
+        if not items:
+            return done
+        
+        now = datetime.now(timezone.utc)
+        db = SessionLocal()
+        rows = []
+        try:
+            # Rows committed just before a crash are reused rather than inserted twice
+            existing = dict(db.query(Paper.arxiv_id, Paper.id).filter(
+                Paper.arxiv_id.in_([i.key for i in items if i.kind == "paper"])))
+            existing.update(db.query(Article.url, Article.id).filter(
+                Article.url.in_([i.key for i in items if i.kind == "article"])))
+            
+            for item in items:
+                data = item.data
+                if item.key in existing:
+                    rows.append(None)
+                    continue
+                if item.kind == "paper":
+                    row = Paper(
+                        arxiv_id=data.arxiv_id,
+                        title=data.title,
+                        authors=", ".join(data.authors),
+                        abstract=data.abstract,
+                        categories=", ".join(data.categories),
+                        published_date=data.published_date,
+                        arxiv_url=data.arxiv_url,
+                        pdf_url=data.pdf_url,
+                        citation_count=data.citation_count,
+                        relevance_score=item.score,
+                        personalized_summary=item.summary,
+                        collected_date=now,
+                        recommended=item.recommended,
+                        recommended_date=now if item.recommended else None
+                    )
+                else:
+                    row = Article(
+                        source=data.source,
+                        source_id=data.source_id,
+                        title=data.title,
+                        url=data.url,
+                        content=data.content,
+                        author=data.author,
+                        published_date=data.published_date,
+                        upvotes=data.upvotes,
+                        engagement_score=item.features.get("engagement", 0.0),
+                        relevance_score=item.score,
+                        personalized_summary=item.summary,
+                        collected_date=now,
+                        recommended=item.recommended,
+                        recommended_date=now if item.recommended else None
+                    )
+                db.add(row)
+                rows.append(row)
+            db.flush()
+            # Per-user picks commit together with their item rows, so a resumed run never repeats them
+            for item, row in zip(items, rows):
+                if row is not None:
+                    db.add_all(UserRecommendation(user_id=user_id, item_type=item.kind, item_id=row.id,
+                                                  score=score, recommended_date=now)
+                               for user_id, score in item.user_scores.items())
+            db.commit()
+            # Articles are keyed in the vector database by their row id
+            row_ids = [existing[i.key] if row is None else row.id for i, row in zip(items, rows)]
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        
+        for item, row_id in zip(items, row_ids):
+            data = item.data
+            if item.kind == "paper":
+                self.embedding_manager.add_paper(
+                    data.arxiv_id, data.title, data.abstract,
+                    {"title": data.title, "url": data.arxiv_url, "authors": ", ".join(data.authors[:5])},
+                    embedding=item.embedding,
+                    published_date=data.published_date
+                )
+            else:
+                self.embedding_manager.add_article(
+                    str(row_id), data.title, data.content,
+                    {"title": data.title, "url": data.url, "source": data.source},
+                    embedding=item.embedding,
+                    published_date=data.published_date
+                )
+        self.checkpoint.stored.append([(item.key, row_id) for item, row_id in zip(items, row_ids)])
+        return done + items
+    
+    def _fulltext(self, items: List[FeedItem]) -> List[FeedItem]:
+        """Index PDF full text of stored papers (skips papers already ingested, so resumes are cheap)"""
+        for item in items:
+            if item.kind == "paper":
+                self.fulltext.ingest_paper(item.data)
+        return items
+
+
+def format_feed(items: List[FeedItem]) -> str:
+    """Plain-text rendering of recommended items"""
+    lines = []
+    for kind, heading in (("paper", "Papers"), ("article", "Articles")):
+        group = [i for i in items if i.kind == kind]
+        if not group:
+            continue
+        lines.append(f"== {heading} ==")
+        for item in group:
+            url = item.data.arxiv_url if kind == "paper" else item.data.url
+            lines.append(f"[{item.score:.2f}] {item.data.title}\n    {url}")
+            if item.summary:
+                lines.append(f"    {item.summary}")
+        lines.append("")
+    return "\n".join(lines)
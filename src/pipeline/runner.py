@@ -0,0 +1,205 @@
+"""
+Generic staged pipeline runner with bounded queues between stages
+"""
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+from src.utils import instrumentation
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+
+@dataclass
+class StageStats:
+    """Per-stage counters collected while the pipeline runs"""
+    name: str
+    workers: int
+    items_in: int = 0
+    items_out: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    
+    def record(self, n_in: int, n_out: int, seconds: float, failed: bool = False):
+        with self._lock:
+            now = time.perf_counter()
+            if self.started_at is None:
+                self.started_at = now - seconds
+            self.items_in += n_in
+            self.items_out += n_out
+            self.busy_seconds += seconds
+            if failed:
+                self.errors += n_in
+    
+    def as_dict(self) -> Dict:
+        wall = (self.finished_at or time.perf_counter()) - (self.started_at or time.perf_counter())
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "wall_seconds": round(max(wall, 0.0), 3),
+            "throughput_per_sec": round(self.items_in / wall, 2) if wall > 0 else 0.0,
+            # How much of the stage's worker capacity was used while it was active
+            "utilization": round(self.busy_seconds / (wall * self.workers), 2) if wall > 0 else 0.0,
+        }
+
+
+class Stage:
+    """
+    A pipeline stage
+    
+    `func` receives a list of items and returns an iterable of outputs. Regular
+    stages get up to `batch_size` items per call; a `barrier` stage is called
+    once with every item after its input is exhausted (e.g. global ranking).
+    Outputs are forwarded as they are produced, so a generator `func` lets the
+    next stage start on its first outputs while later ones are still pending.
+    """
+    
+    def __init__(self, name: str, func: Callable[[List], Iterable], workers: int = 1,
+                 batch_size: int = 1, barrier: bool = False):
+        self.name = name
+        self.func = func
+        self.workers = 1 if barrier else max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.barrier = barrier
+
+
+class StagedPipeline:
+    """Runs stages concurrently, connected by bounded queues"""
+    
+    def __init__(self, stages: List[Stage], queue_size: int = 256):
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        self.stages = stages
+        self.queue_size = queue_size
+        self.stats = [StageStats(stage.name, stage.workers) for stage in stages]
+    
+    def run(self, inputs: Iterable) -> List:
+        """
+        Feed inputs through all stages
+        
+        Args:
+            inputs: Items for the first stage
+        
+        Returns:
+            Outputs of the last stage
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        threads = []
+        for i, (stage, stats) in enumerate(zip(self.stages, self.stats)):
+            remaining = [stage.workers]
+            lock = threading.Lock()
+            for w in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._worker,
+                    args=(stage, stats, queues[i], queues[i + 1], remaining, lock),
+                    name=f"{stage.name}-{w}",
+                    daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+        
+        # Drain the final queue concurrently so back-pressure never deadlocks
+        results = []
+        collector = threading.Thread(target=self._drain, args=(queues[-1], results), daemon=True)
+        collector.start()
+        
+        for item in inputs:
+            queues[0].put(item)
+        queues[0].put(_END)
+        
+        for thread in threads:
+            thread.join()
+        collector.join()
+        return results
+    
+    def report(self) -> List[Dict]:
+        """Per-stage throughput summary"""
+        return [stats.as_dict() for stats in self.stats]
+    
+    def log_report(self):
+        for row in self.report():
+            logger.info(
+                f"[{row['stage']}] in={row['items_in']} out={row['items_out']} "
+                f"errors={row['errors']} workers={row['workers']} "
+                f"wall={row['wall_seconds']}s busy={row['busy_seconds']}s "
+                f"{row['throughput_per_sec']}/s util={row['utilization']}"
+            )
+    
+    @staticmethod
+    def _drain(q: queue.Queue, results: List):
+        while True:
+            item = q.get()
+            if item is _END:
+                return
+            results.append(item)
+    
+    def _worker(self, stage: Stage, stats: StageStats, inq: queue.Queue, outq: queue.Queue,
+                remaining: List[int], lock: threading.Lock):
+        if stage.barrier:
+            items = []
+            while True:
+                item = inq.get()
+                if item is _END:
+                    break
+                items.append(item)
+            if items:
+                self._process(stage, stats, items, outq)
+        else:
+            done = False
+            while not done:
+                item = inq.get()
+                if item is _END:
+                    break
+                batch = [item]
+                # Opportunistically fill the batch with whatever is already queued
+                while len(batch) < stage.batch_size:
+                    try:
+                        item = inq.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _END:
+                        done = True
+                        break
+                    batch.append(item)
+                self._process(stage, stats, batch, outq)
+            # Let sibling workers see the end marker too
+            inq.put(_END)
+        
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            stats.finished_at = time.perf_counter()
+            outq.put(_END)
+    
+    @staticmethod
+    def _process(stage: Stage, stats: StageStats, batch: List, outq: queue.Queue):
+        start = time.perf_counter()
+        blocked = 0.0
+        produced = 0
+        try:
+            with instrumentation.span(f"stage.{stage.name}", batch=len(batch)):
+                for output in stage.func(batch) or []:
+                    # Time spent waiting on a full downstream queue is not busy time
+                    put_start = time.perf_counter()
+                    outq.put(output)
+                    blocked += time.perf_counter() - put_start
+                    produced += 1
+        except Exception as e:
+            # Outputs already forwarded by a generator stage stay forwarded
+            logger.error(f"Stage {stage.name} failed on a batch of {len(batch)}: {e}")
+            stats.record(len(batch), produced, time.perf_counter() - start - blocked, failed=True)
+            return
+        stats.record(len(batch), produced, time.perf_counter() - start - blocked)
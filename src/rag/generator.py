@@ -1,8 +1,9 @@
 """
 LLM answer generation for RAG
 """
-from typing import List, Dict
+from typing import List, Dict, Iterator
 from src.utils.config import settings
+from src.utils import instrumentation
 import openai
 import logging
 
@@ -20,7 +21,10 @@ class Generator:
         if self.provider == "openai":
             if not settings.OPENAI_API_KEY:
                 raise ValueError("OPENAI_API_KEY not set in environment")
-            self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+            self.client = openai.OpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                base_url=settings.OPENAI_BASE_URL
+            )
         else:
             raise ValueError(f"Unsupported LLM provider: {self.provider}")
     
@@ -37,6 +41,33 @@ class Generator:
         Returns:
             Dict with 'answer' and 'citations' keys
         """
+        prompt = self._build_answer_prompt(question, context, user_interests)
+        answer = self._generate(prompt)
+        
+        return {
+            "answer": answer,
+            "citations": self.extract_citations(context)
+        }
+    
+    def stream_answer(self, question: str, context: List[Dict],
+                      user_interests: List[str] = None) -> Iterator[str]:
+        """
+        Stream an answer token-chunk by token-chunk
+        
+        Args:
+            question: User's question
+            context: List of relevant documents with metadata
+            user_interests: User's interests for context
+            
+        Yields:
+            Text fragments of the answer as they arrive from the LLM
+        """
+        prompt = self._build_answer_prompt(question, context, user_interests)
+        yield from self._generate_stream(prompt)
+    
+    def _build_answer_prompt(self, question: str, context: List[Dict],
+                             user_interests: List[str] = None) -> str:
+        """Build the RAG prompt for a question and its retrieved context"""
         if user_interests is None:
             user_interests = settings.USER_INTERESTS
         
@@ -49,7 +80,7 @@ class Generator:
         
         interests_str = ", ".join(user_interests)
         
-        prompt = f"""You are a helpful AI teaching assistant. Answer the following question using the provided context.
+        return f"""You are a helpful AI teaching assistant. Answer the following question using the provided context.
 
 User interests: {interests_str}
 
@@ -66,10 +97,10 @@ Instructions:
 5. Relate the answer to the user's interests when relevant
 
 Answer:"""
-        
-        answer = self._generate(prompt)
-        
-        # Extract citations
+    
+    @staticmethod
+    def extract_citations(context: List[Dict]) -> List[Dict]:
+        """Build citation entries from retrieved documents"""
         citations = []
         for doc in context:
             metadata = doc.get("metadata", {})
@@ -87,32 +118,74 @@ Answer:"""
                     "url": metadata.get("url", ""),
                     "source": metadata.get("source", "")
                 })
-        
-        return {
-            "answer": answer,
-            "citations": citations
-        }
+            elif metadata.get("type") == "document":
+                citations.append({
+                    "type": "document",
+                    "title": metadata.get("title", "Unknown"),
+                    "path": metadata.get("path", "")
+                })
+        return citations
     
-    def _generate(self, prompt: str, max_tokens: int = 1000) -> str:
-        """Generate text using the configured LLM"""
+    def _generate(self, prompt: str, max_tokens: int = 1000, kind: str = "answer",
+                  raise_errors: bool = False) -> str:
+        """Generate text using the configured LLM (failures become an error message unless raise_errors)"""
         try:
             if self.provider == "openai":
-                response = self.client.chat.completions.create(
+                with instrumentation.LLM_SECONDS.time(kind=kind):
+                    response = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=[
+                            {"role": "system", "content": "You are a helpful AI assistant specialized in machine learning and research."},
+                            {"role": "user", "content": prompt}
+                        ],
+                        max_tokens=max_tokens,
+                        temperature=0.7
+                    )
+                self._record_usage(response.usage, kind)
+                return response.choices[0].message.content.strip()
+            
+        except Exception as e:
+            logger.error(f"Error generating LLM response: {e}")
+            if raise_errors:
+                raise
+            return f"Error generating response: {str(e)}"
+    
+    def _generate_stream(self, prompt: str, max_tokens: int = 1000) -> Iterator[str]:
+        """Stream text from the configured LLM"""
+        try:
+            if self.provider == "openai":
+                stream = self.client.chat.completions.create(
                     model=self.model,
                     messages=[
                         {"role": "system", "content": "You are a helpful AI assistant specialized in machine learning and research."},
                         {"role": "user", "content": prompt}
                     ],
                     max_tokens=max_tokens,
-                    temperature=0.7
+                    temperature=0.7,
+                    stream=True,
+                    stream_options={"include_usage": True}
                 )
-                return response.choices[0].message.content.strip()
+                with instrumentation.LLM_SECONDS.time(kind="answer_stream"):
+                    for chunk in stream:
+                        if getattr(chunk, "usage", None):
+                            self._record_usage(chunk.usage, "answer_stream")
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            yield chunk.choices[0].delta.content
             
         except Exception as e:
-            logger.error(f"Error generating LLM response: {e}")
-            return f"Error generating response: {str(e)}"
+            logger.error(f"Error streaming LLM response: {e}")
+            yield f"Error generating response: {str(e)}"
+    
+    @staticmethod
+    def _record_usage(usage, kind: str):
+        """Count prompt/completion tokens reported by the API"""
+        if usage is None:
+            return
+        instrumentation.LLM_TOKENS.inc(usage.prompt_tokens or 0, kind=kind, direction="prompt")
+        instrumentation.LLM_TOKENS.inc(usage.completion_tokens or 0, kind=kind, direction="completion")
     
-    def generate_summary(self, title: str, content: str, user_interests: List[str] = None) -> str:
+    def generate_summary(self, title: str, content: str, user_interests: List[str] = None,
+                         raise_errors: bool = False) -> str:
         """
         Generate personalized summary for a paper/article
         
@@ -120,6 +193,7 @@ Answer:"""
             title: Title of the paper/article
             content: Abstract or content snippet
             user_interests: List of user interests for personalization
+            raise_errors: Re-raise LLM failures instead of returning the error message
             
         Returns:
             Personalized summary string
@@ -141,5 +215,5 @@ Provide:
 
 Keep under 100 words. Be concise and actionable."""
         
-        return self._generate(prompt, max_tokens=200)
+        return self._generate(prompt, max_tokens=200, kind="summary", raise_errors=raise_errors)
 
@@ -1,20 +1,114 @@
 """
 Vector search retriever for RAG
 """
-from typing import List, Dict, Optional
+import copy
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Dict, Optional
 from src.models.embeddings import EmbeddingManager
 from src.utils.config import settings
+from src.utils import instrumentation
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def normalize_query(query: str, lowercase: bool = False) -> str:
+    """Query with whitespace collapsed, lowercased only for encoders that ignore case anyway"""
+    query = " ".join(query.split())
+    return query.lower() if lowercase else query
+
+
+def is_uncased(model) -> bool:
+    """Whether an encoder's tokenizer lowercases its input (False when it has no tokenizer)"""
+    return bool(getattr(getattr(model, "tokenizer", None), "do_lower_case", False))
+
+
+class LRUCache:
+    """Thread-safe LRU map with hit/miss counts"""
+    
+    def __init__(self, name: str, max_size: int):
+        self.name = name
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable, is_fresh: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Cached value, or None on a miss; entries failing is_fresh are dropped and count as misses"""
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None and is_fresh is not None and not is_fresh(value):
+                del self._items[key]
+                value = None
+            if value is None:
+                self.misses += 1
+            else:
+                self._items.move_to_end(key)
+                self.hits += 1
+        instrumentation.RETRIEVER_CACHE.inc(tier=self.name, outcome="miss" if value is None else "hit")
+        return value
+    
+    def put(self, key: Hashable, value: Any):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._items),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
 class Retriever:
-    """Retrieves relevant documents using vector search"""
+    """
+    Retrieves relevant documents using vector search
     
-    def __init__(self, embedding_manager: Optional[EmbeddingManager] = None):
+    Two caches sit in front of the vector store: query embeddings by
+    normalized query text (whitespace collapsed, and lowercased when the
+    encoder is uncased, so the cache never conflates queries the encoder
+    tells apart), and results by (query, n_results, filter_type).
+    Results are tagged with the EmbeddingManager generation read before the
+    query, and an entry from an older generation counts as a miss, so a
+    write to the store is never followed by a stale answer.
+    """
+    
+    def __init__(self, embedding_manager: Optional[EmbeddingManager] = None,
+                 embedding_cache_size: Optional[int] = None, result_cache_size: Optional[int] = None):
         self.embedding_manager = embedding_manager or EmbeddingManager()
+        self.embedding_cache = LRUCache("embedding", settings.RETRIEVER_EMBEDDING_CACHE_SIZE
+                                        if embedding_cache_size is None else embedding_cache_size)
+        self.result_cache = LRUCache("result", settings.RETRIEVER_RESULT_CACHE_SIZE
+                                     if result_cache_size is None else result_cache_size)
+    
+    def cache_stats(self) -> Dict:
+        """Size and hit rate of both caches, for sizing RETRIEVER_*_CACHE_SIZE"""
+        return {"embedding": self.embedding_cache.stats(), "result": self.result_cache.stats()}
+    
+    def _query_embedding(self, query: str) -> List[float]:
+        # Keyed by model too: a re-embedding cutover changes the embedding space
+        key = (self.embedding_manager.model_name, query)
+        embedding = self.embedding_cache.get(key)
+        if embedding is None:
+            embedding = self.embedding_manager.generate_embedding(query)
+            self.embedding_cache.put(key, embedding)
+        return embedding
     
     def retrieve(self, query: str, n_results: int = 5, filter_type: Optional[str] = None) -> List[Dict]:
         """
@@ -23,19 +117,31 @@ class Retriever:
         Args:
             query: Search query
             n_results: Number of results to return
-            filter_type: Optional filter by "paper" or "article"
+            filter_type: Optional filter by "paper", "article" or "document"
             
         Returns:
             List of relevant documents with metadata
         """
-        results = self.embedding_manager.search(
-            query=query,
-            n_results=n_results,
-            filter_type=filter_type
-        )
+        normalized = normalize_query(query, lowercase=is_uncased(self.embedding_manager.model))
+        key = (normalized, n_results, filter_type)
+        self.embedding_manager.follow_registry()
+        generation = self.embedding_manager.generation
+        cached = self.result_cache.get(key, is_fresh=lambda entry: entry[0] == generation)
+        if cached is not None:
+            results = cached[1]
+        else:
+            with instrumentation.span("retriever.retrieve", n_results=n_results):
+                results = self.embedding_manager.search(
+                    query=normalized,
+                    n_results=n_results,
+                    filter_type=filter_type,
+                    query_embedding=self._query_embedding(normalized)
+                )
+            self.result_cache.put(key, (generation, results))
+            logger.info(f"Retrieved {len(results)} documents for query: {query[:50]}...")
         
-        logger.info(f"Retrieved {len(results)} documents for query: {query[:50]}...")
-        return results
+        # Callers annotate results and their metadata (e.g. retrieve_with_scores), so never hand out cached dicts
+        return copy.deepcopy(results)
     
     def retrieve_with_scores(self, query: str, n_results: int = 5, 
                             min_score: float = 0.0) -> List[Dict]:
@@ -5,7 +5,7 @@ import os
 from pathlib import Path
 from pydantic_settings import BaseSettings
 from pydantic import field_validator
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Union
 
 
 class Settings(BaseSettings):
@@ -21,6 +21,7 @@ class Settings(BaseSettings):
     
     # API Keys
     OPENAI_API_KEY: Optional[str] = None
+    OPENAI_BASE_URL: Optional[str] = None  # Point at a local OpenAI-compatible server (e.g. mock LLM)
     
     # LLM Settings
     LLM_PROVIDER: str = "openai"  # "openai" or "anthropic"
@@ -30,26 +31,140 @@ class Settings(BaseSettings):
     # ArXiv settings
     ARXIV_CATEGORIES: List[str] = ["cs.LG", "cs.AI", "cs.CV", "cs.CL", "cs.NE"]
     MAX_PAPERS_PER_DAY: int = 50
+    ARXIV_PAGE_SIZE: int = 1000  # Results per API request when paging a date range (the API allows 2000)
+    ARXIV_REQUEST_INTERVAL: float = 3.0  # Seconds between API requests, shared by all backfill threads
+    ARXIV_RETRIES: int = 3
     
     # Tech article sources
     TECH_SOURCES: List[str] = ["hackernews", "devto", "medium"]
+    HN_API_BASE_URL: str = "https://hacker-news.firebaseio.com/v0"
+    MEDIUM_FEED_URL: str = "https://medium.com/feed/tag/machine-learning"
+    DEVTO_FEED_URL: str = "https://dev.to/feed"
+    PAGE_MAX_CHARS: int = 5000  # Article text kept per page; the download stops once it is collected
+    PAGE_MAX_BYTES: int = 2_000_000  # Article pages are cut off after this many bytes
+    PAGE_CHUNK_BYTES: int = 16 * 1024  # Read size while streaming a page into the parser
+    
+    # Citation counts (enrich stage, cached in the citation_counts table)
+    CITATION_PROVIDER: str = "semanticscholar"  # "semanticscholar" or "none"
+    CITATION_API_URL: str = "https://api.semanticscholar.org/graph/v1"
+    CITATION_API_KEY: Optional[str] = None
+    CITATION_BATCH_SIZE: int = 100  # arXiv IDs per bulk request (Semantic Scholar accepts up to 500)
+    CITATION_TTL_HOURS: float = 72.0  # Older cached counts are served, then refreshed in the background
+    CITATION_TIMEOUT: float = 15.0
+    CITATION_RETRIES: int = 2  # Extra attempts on 429/5xx, backing off PDF_RETRY_BACKOFF seconds doubled each time
+    CITATION_REFRESH_WAIT_SECONDS: float = 10.0  # Max wait for background refreshes when a run finishes
     
     # Recommendation settings
     TOP_PAPERS_COUNT: int = 5
     TOP_ARTICLES_COUNT: int = 3
     MIN_SIMILARITY_THRESHOLD: float = 0.3  # Lowered to be more inclusive
     
+    # Instrumentation (near-zero overhead when disabled)
+    METRICS_ENABLED: bool = False
+    METRICS_TRACE_BUFFER: int = 10000  # Max spans kept in memory
+    METRICS_PROM_FILE: Optional[Path] = None  # Prometheus textfile written after each pipeline run
+    
+    # Daily feed pipeline (workers per stage, queue bound between stages)
+    PIPELINE_COLLECT_WORKERS: int = 4
+    PIPELINE_EMBED_WORKERS: int = 1
+    PIPELINE_EMBED_BATCH_SIZE: int = 32
+    PIPELINE_SUMMARIZE_WORKERS: int = 4
+    PIPELINE_STORE_WORKERS: int = 1  # SQLite has a single writer
+    PIPELINE_QUEUE_SIZE: int = 256
+    CHECKPOINT_DIR: Path = PROCESSED_DATA_DIR / "runs"
+    CHECKPOINT_KEEP_RUNS: int = 7  # Always keep the newest N run directories
+    CHECKPOINT_MAX_AGE_DAYS: int = 14
+    RAW_ARCHIVE_ENABLED: bool = True  # Write each run's collected records as columnar batch files
+    RAW_ARCHIVE_DIR: Path = RAW_DATA_DIR / "collections"  # <run_id>/<source>.rec
+    RAW_ARCHIVE_KEEP_RUNS: int = 30
+    RAW_ARCHIVE_MAX_AGE_DAYS: int = 60
+    
+    # Profiling (python -m src.pipeline --profile, POST /ask?profile=true)
+    PROFILING_ENABLED: bool = False  # Profile every feed run
+    PROFILE_DIR: Path = PROCESSED_DATA_DIR / "profiles"  # <run_id>/<label>.collapsed, .top.txt, .alloc.txt, .pstats
+    PROFILE_MODE: str = "sampling"  # "sampling" or "deterministic" (adds cProfile of the calling thread; Q&A only, feed runs always sample)
+    PROFILE_INTERVAL: float = 0.005  # Seconds between stack samples
+    PROFILE_TRACEMALLOC_FRAMES: int = 5  # Traceback depth per traced allocation (0 disables tracemalloc)
+    PROFILE_TOP: int = 30  # Rows per table in the reports
+    PROFILE_KEEP_RUNS: int = 20
+    PROFILE_MAX_AGE_DAYS: int = 14
+    
+    # Full-text PDF ingestion (optional stage after store)
+    PDF_FULLTEXT_ENABLED: bool = False
+    PDF_CACHE_DIR: Path = RAW_DATA_DIR / "pdf"
+    PDF_CACHE_MAX_MB: int = 2000  # Oldest cached PDFs are evicted beyond this
+    PDF_MAX_BYTES: int = 25_000_000  # Larger downloads are abandoned mid-stream
+    PDF_MAX_PAGES: int = 60
+    PDF_MAX_CHARS: int = 300_000  # Extracted text kept per paper
+    PDF_DOWNLOAD_WORKERS: int = 4
+    PDF_DOWNLOAD_RETRIES: int = 3
+    PDF_DOWNLOAD_TIMEOUT: float = 30.0
+    PDF_RETRY_BACKOFF: float = 1.0  # Seconds before the first retry, doubled each time
+    PDF_EXTRACT_PROCESSES: int = 2
+    PDF_EMBED_BATCH_SIZE: int = 64
+    
+    # Local document ingestion (python -m src.ingest local <dir>)
+    LOCAL_INGEST_PROCESSES: int = 4
+    LOCAL_INGEST_BATCH_SIZE: int = 256  # Chunks per encoder call, across documents
+    LOCAL_MAX_FILE_BYTES: int = 50_000_000  # Larger files are skipped
+    LOCAL_MAX_PAGES: int = 500
+    LOCAL_MAX_CHARS: int = 1_000_000  # Text kept per document
+    
+    # Historical arXiv backfill (python -m src.ingest backfill --since <date>)
+    BACKFILL_DIR: Path = PROCESSED_DATA_DIR / "backfill"  # Shard checkpoints, one directory per backfill
+    BACKFILL_SHARD_DAYS: int = 7  # Date range collected, stored and checkpointed as one unit
+    BACKFILL_COLLECT_WORKERS: int = 2  # Shards fetched concurrently (requests are still paced)
+    BACKFILL_ENCODE_PROCESSES: int = 0  # Encoder processes; 0 = one per CPU core
+    BACKFILL_WRITE_BATCH: int = 2000  # Papers per encoder call and per database/vector store write
+    
+    # Near-duplicate detection (MinHash/LSH)
+    DEDUP_NUM_PERM: int = 128
+    DEDUP_BANDS: int = 16  # 16 bands x 8 rows -> LSH threshold around 0.7 Jaccard
+    DEDUP_THRESHOLD: float = 0.7  # Min estimated Jaccard to call two items duplicates
+    DEDUP_SHINGLE_SIZE: int = 3  # Words per shingle
+    DEDUP_LOOKBACK_DAYS: int = 14  # History window loaded into the LSH index
+    
     # Vector database
+    VECTOR_DB_BACKEND: str = "chroma"  # "chroma" or "flat" (memory-mapped exact index)
     VECTOR_DB_COLLECTION_NAME: str = "ml_knowledge_base"
+    VECTOR_DB_PARTITIONING: str = "monthly"  # "monthly" (one collection per type and month) or "none"
+    VECTOR_DB_RETENTION_MONTHS: Dict[str, int] = {"article": 6}  # Types not listed are kept forever
+    VECTOR_DB_HNSW: Dict[str, Dict[str, int]] = {  # Per-type HNSW params for new partitions
+        "paper": {"M": 16, "construction_ef": 200, "search_ef": 100},
+        "article": {"M": 16, "construction_ef": 100, "search_ef": 50},
+        "document": {"M": 16, "construction_ef": 200, "search_ef": 100},
+    }
+    VECTOR_DB_SEARCH_WORKERS: int = 1  # >1 queries partitions in parallel (pays off for large partitions)
+    VECTOR_DB_FLAT_COMPACT_RATIO: float = 0.25  # Compact a flat collection once this share of rows is dead
+    VECTOR_DB_FLAT_COMPACT_MIN_DEAD: int = 1000
+    VECTOR_DB_FLAT_QUANTIZATION: str = "none"  # none, float16 or int8; applies to newly created flat collections
+    VECTOR_DB_FLAT_RESCORE_FACTOR: int = 4  # Quantized scan keeps factor * k candidates for exact rescoring
+    REEMBED_BATCH_SIZE: int = 256  # Items per page when re-embedding into a new model's index version
+    REEMBED_CATCHUP_PASSES: int = 3  # Passes copying writes made during the copy, before cutover
+    REEMBED_PROGRESS_SECONDS: float = 10.0  # Progress log interval
+    RECONCILE_BATCH_SIZE: int = 500  # Rows or vectors per page when reconciling SQLite with the vector index
+    RETRIEVER_EMBEDDING_CACHE_SIZE: int = 2048  # Query embeddings kept by Retriever (0 disables)
+    RETRIEVER_RESULT_CACHE_SIZE: int = 512  # (query, n_results, filter) results kept by Retriever (0 disables)
     CHUNK_SIZE: int = 500
     CHUNK_OVERLAP: int = 50
     
     # User preferences - read as string from .env, parsed to list via property
+    # USER_INTERESTS seeds the "default" profile; more users live in the user_profiles table
     USER_INTERESTS_STR: Optional[str] = None
+    RANK_BATCH_ROWS: int = 200000  # Max (item, user) rows scored per predict call
+    FEATURE_STORE_ENABLED: bool = True  # Persist ranking features per item and profile
+    FEATURE_STORE_DIR: Path = PROCESSED_DATA_DIR / "features"  # <version>/<kind>/<segment>/*.npy
+    FEATURE_STORE_MAX_SEGMENTS: int = 32  # A kind's segments are merged into one beyond this
     
     # Database
     DATABASE_URL: str = "sqlite:///./data/learning_assistant.db"
     
+    # API service
+    API_HOST: str = "127.0.0.1"
+    API_PORT: int = 8000
+    API_EXECUTOR_WORKERS: int = 4  # Threads for blocking encoder/Chroma/LLM calls
+    API_MAX_PENDING: int = 64  # Max blocking calls queued or running at once
+    
 
     @property
     def USER_INTERESTS(self) -> List[str]:
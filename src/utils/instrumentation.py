@@ -0,0 +1,329 @@
+"""
+Lightweight metrics and tracing for hot paths
+
+Metrics are declared once at module level and updated at call sites:
+
+    HTTP_REQUEST_SECONDS = histogram("http_fetch_seconds", "Outbound HTTP request latency by source")
+    
+    with instrumentation.HTTP_REQUEST_SECONDS.time(source="hackernews"):
+        response = requests.get(url)
+
+When instrumentation is disabled (the default, see METRICS_ENABLED) every
+update is a single flag check and `time()`/`span()` return a shared no-op
+context manager.
+"""
+import functools
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Dict, List, Tuple
+from src.utils.config import settings
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+_NOOP = nullcontext()
+
+
+class _State:
+    enabled = settings.METRICS_ENABLED
+
+
+def enable(flag: bool = True):
+    """Turn instrumentation on or off at runtime"""
+    _State.enabled = flag
+
+
+def is_enabled() -> bool:
+    return _State.enabled
+
+
+def _label_key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """Monotonic counter, optionally labelled"""
+    
+    kind = "counter"
+    
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, float] = {}
+    
+    def inc(self, amount: float = 1, **labels):
+        if not _State.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+    
+    def snapshot(self) -> List[Dict]:
+        with self._lock:
+            return [{"labels": dict(key), "value": value} for key, value in self._values.items()]
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+    
+    def __init__(self, histogram: "Histogram", labels: Dict):
+        self.histogram = histogram
+        self.labels = labels
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Histogram:
+    """Bucketed distribution (count, sum, cumulative buckets), optionally labelled"""
+    
+    kind = "histogram"
+    
+    def __init__(self, name: str, description: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, Dict] = {}
+    
+    def observe(self, value: float, **labels):
+        if not _State.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+                self._values[key] = series
+            series["counts"][bisect_left(self.buckets, value)] += 1
+            series["sum"] += value
+            series["count"] += 1
+    
+    def time(self, **labels):
+        """Context manager that observes the elapsed seconds"""
+        if not _State.enabled:
+            return _NOOP
+        return _Timer(self, labels)
+    
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+    
+    def snapshot(self) -> List[Dict]:
+        with self._lock:
+            return [{
+                "labels": dict(key),
+                "count": series["count"],
+                "sum": series["sum"],
+                "mean": series["sum"] / series["count"] if series["count"] else 0.0,
+                "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], series["counts"])),
+            } for key, series in self._values.items()]
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series["counts"]):
+                    cumulative += count
+                    bucket_labels = _format_labels(key, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                inf_labels = _format_labels(key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{inf_labels} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series['sum']}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "attrs", "start", "parent")
+    
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+    
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.parent = stack[-1] if stack else None
+        stack.append(self.name)
+        self.start = time.time()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer._stack().pop()
+        self.tracer._record({
+            "name": self.name,
+            "parent": self.parent,
+            "thread": threading.current_thread().name,
+            "start": self.start,
+            "duration": time.time() - self.start,
+            "error": exc_type.__name__ if exc_type else None,
+            **self.attrs,
+        })
+        return False
+
+
+class Tracer:
+    """Records nested timing spans into a bounded in-memory buffer"""
+    
+    def __init__(self, max_spans: int):
+        self._spans = deque(maxlen=max_spans)
+        self._local = threading.local()
+    
+    def _stack(self) -> List[str]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+    
+    def _record(self, span: Dict):
+        self._spans.append(span)
+    
+    def span(self, name: str, **attrs):
+        if not _State.enabled:
+            return _NOOP
+        return _Span(self, name, attrs)
+    
+    def spans(self) -> List[Dict]:
+        return list(self._spans)
+    
+    def reset(self):
+        self._spans.clear()
+
+
+class Registry:
+    """Holds every declared metric and renders them together"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+        self.tracer = Tracer(settings.METRICS_TRACE_BUFFER)
+    
+    def _get_or_create(self, cls, name: str, *args):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.kind}")
+            return metric
+    
+    def counter(self, name: str, description: str) -> Counter:
+        return self._get_or_create(Counter, name, description)
+    
+    def histogram(self, name: str, description: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, description, buckets)
+    
+    def reset(self):
+        """Clear all recorded values (e.g. between pipeline runs)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+        self.tracer.reset()
+    
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        lines = []
+        for _, metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n" if lines else ""
+    
+    def snapshot(self, include_spans: bool = False) -> Dict:
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        data = {name: {"type": metric.kind, "series": metric.snapshot()} for name, metric in metrics}
+        result = {"enabled": _State.enabled, "metrics": data}
+        if include_spans:
+            result["spans"] = self.tracer.spans()
+        return result
+    
+    def write_prometheus(self, path: Path):
+        """Write a node-exporter style textfile (atomic replace)"""
+        path = Path(path)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(self.render_prometheus())
+        tmp.replace(path)
+    
+    def write_json(self, path: Path, **extra):
+        """Write a JSON snapshot with spans, e.g. once per pipeline run"""
+        Path(path).write_text(json.dumps({**extra, **self.snapshot(include_spans=True)}, indent=2, default=str))
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, description: str) -> Counter:
+    return REGISTRY.counter(name, description)
+
+
+def histogram(name: str, description: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+    return REGISTRY.histogram(name, description, buckets)
+
+
+def timed(hist: Histogram, **labels):
+    """Decorator observing a function's duration in hist (one flag check when disabled)"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _State.enabled:
+                return func(*args, **kwargs)
+            with _Timer(hist, labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def span(name: str, **attrs):
+    """Context manager recording a tracing span (no-op when disabled)"""
+    return REGISTRY.tracer.span(name, **attrs)
+
+
+# Shared hot-path metrics, declared here so every module reports under the same names
+HTTP_REQUEST_SECONDS = histogram("http_fetch_seconds", "Outbound HTTP request latency by source")
+HTTP_RESPONSE_BYTES = histogram("http_fetch_bytes", "Outbound HTTP response size by source", BYTES_BUCKETS)
+HTTP_ERRORS = counter("http_fetch_errors_total", "Outbound HTTP failures by source")
+COLLECTOR_SECONDS = histogram("collector_fetch_seconds", "Full collector fetch duration by source")
+COLLECTOR_ITEMS = counter("collector_items_total", "Items returned by collectors by source")
+ENCODER_SECONDS = histogram("encoder_batch_seconds", "Sentence encoder time per call")
+ENCODER_BATCH_SIZE = histogram("encoder_batch_size", "Texts per encoder call", SIZE_BUCKETS)
+VECTOR_QUERY_SECONDS = histogram("vector_query_seconds", "Vector database query latency")
+RETRIEVER_CACHE = counter("retriever_cache_total", "Retriever cache lookups by tier and outcome")
+CITATION_LOOKUPS = counter("citation_lookups_total", "Citation count lookups by cache outcome")
+RANK_SECONDS = histogram("rank_seconds", "Recommender.rank_items latency")
+RANK_ITEMS = histogram("rank_items", "Items ranked per call", SIZE_BUCKETS)
+LLM_SECONDS = histogram("llm_request_seconds", "LLM request latency by kind")
+LLM_TOKENS = counter("llm_tokens_total", "LLM tokens by kind and direction")
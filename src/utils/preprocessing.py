@@ -0,0 +1,136 @@
+"""
+Text preprocessing utilities
+"""
+import re
+from html.parser import HTMLParser
+from typing import List, Optional
+from bs4 import BeautifulSoup
+from src.utils.config import settings
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_WORD_RE = re.compile(r"\w+")
+
+# Elements whose text is never shown, and elements that break words apart
+_HIDDEN_TAGS = {"script", "style", "noscript", "template", "svg", "iframe", "object"}
+_BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt", "figcaption", "footer",
+    "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav", "ol", "p", "pre",
+    "section", "table", "td", "th", "title", "tr", "ul",
+}
+
+
+def clean_text(text: str) -> str:
+    """Collapse all whitespace runs to single spaces"""
+    if not text:
+        return ""
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def extract_text_from_html(html: str) -> str:
+    """Extract visible text from an HTML document"""
+    soup = BeautifulSoup(html, "html.parser")
+    
+    # Remove script and style elements
+    for script in soup(["script", "style"]):
+        script.decompose()
+    
+    return clean_text(soup.get_text(" "))
+
+
+class VisibleTextParser(HTMLParser):
+    """
+    Incremental visible-text extraction from HTML
+    
+    Feed the document in pieces; text is whitespace-normalized as it arrives
+    (one regex pass per text node) and `done` turns true once max_chars
+    characters have been collected, so the caller can stop reading.
+    """
+    
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.done = False
+        self._parts: List[str] = []
+        self._length = 0
+        self._hidden = 0
+        self._space = False
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in _HIDDEN_TAGS:
+            self._hidden += 1
+        elif tag in _BLOCK_TAGS:
+            self._space = True
+    
+    def handle_startendtag(self, tag, attrs):
+        if tag in _BLOCK_TAGS:
+            self._space = True
+    
+    def handle_endtag(self, tag):
+        if tag in _HIDDEN_TAGS:
+            self._hidden = max(self._hidden - 1, 0)
+        elif tag in _BLOCK_TAGS:
+            self._space = True
+    
+    def handle_data(self, data):
+        if self._hidden or self.done:
+            return
+        text = _WHITESPACE_RE.sub(" ", data)
+        if text.startswith(" "):
+            self._space = True
+            text = text[1:]
+        if not text:
+            return
+        trailing = text.endswith(" ")
+        if trailing:
+            text = text[:-1]
+        if self._space and self._parts:
+            self._parts.append(" ")
+            self._length += 1
+        self._parts.append(text)
+        self._length += len(text)
+        self._space = trailing
+        if self._length >= self.max_chars:
+            self.done = True
+    
+    def text(self) -> str:
+        return "".join(self._parts)[:self.max_chars]
+
+
+def tokenize_words(text: str) -> List[str]:
+    """Lowercase word tokens, punctuation dropped"""
+    return _WORD_RE.findall(text.lower())
+
+
+def chunk_text(text: str, chunk_size: Optional[int] = None, overlap: Optional[int] = None) -> List[str]:
+    """
+    Split text into overlapping character chunks on word boundaries
+    
+    Args:
+        text: Text to split
+        chunk_size: Target chunk length in characters
+        overlap: Characters shared between consecutive chunks
+    
+    Returns:
+        List of text chunks
+    """
+    chunk_size = chunk_size or settings.CHUNK_SIZE
+    overlap = settings.CHUNK_OVERLAP if overlap is None else overlap
+    text = clean_text(text)
+    if len(text) <= chunk_size:
+        return [text] if text else []
+    
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            # Back off to the last space so words aren't cut in half
+            space = text.rfind(" ", start, end)
+            if space > start:
+                end = space
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    
+    return [c for c in chunks if c]
@@ -0,0 +1,264 @@
+"""
+On-demand profiling of feed runs and Q&A calls
+
+Profiler wraps a block with a stack sampler and tracemalloc, and writes
+under PROFILE_DIR/<run_id>/:
+
+    <label>.collapsed   folded stacks, one "thread;outer;...;inner count" line
+                        per distinct stack (flamegraph.pl, speedscope, inferno)
+    <label>.top.txt     hottest functions and packages by self samples
+    <label>.alloc.txt   peak traced memory and the top surviving allocations
+    <label>.pstats      cProfile stats of the calling thread (deterministic mode)
+
+The sampler reads every thread's stack from a background thread, so it also
+covers the pipeline's worker pools; its cost does not grow with call counts.
+Deterministic mode adds cProfile for exact call counts, at a much higher
+overhead, but only on the calling thread: work done in stage threads or
+executor workers never reaches the .pstats file. It suits the Q&A path, which
+runs in one thread; feed runs always sample.
+"""
+import cProfile
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+from src.utils.config import settings
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODES = ("sampling", "deterministic")
+
+_ROOT = str(Path(__file__).resolve().parents[2]) + "/"
+_SITE = re.compile(r".*/(?:site|dist)-packages/")
+_STDLIB = re.compile(r".*/lib/python\d+\.\d+/")
+# Leaf frames of threads parked on a queue, lock or selector
+_IDLE = {("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"), ("queue.py", "get"),
+         ("queue.py", "put"), ("selectors.py", "select"), ("thread.py", "_worker")}
+
+
+def _where(filename: str) -> str:
+    """Path of a source file relative to the repo, site-packages or the stdlib"""
+    if filename.startswith(_ROOT):
+        return filename[len(_ROOT):]
+    return _STDLIB.sub("", _SITE.sub("", filename))
+
+
+def _package(where: str) -> str:
+    """Top-level package of a frame (src.<pkg> for repo code)"""
+    parts = where.split("/")
+    if parts[0] == "src" and len(parts) > 2:
+        return f"src.{parts[1]}"
+    if len(parts) == 1 or where.startswith("/"):
+        return parts[-1][:-3] if parts[-1].endswith(".py") else parts[-1]
+    return parts[0]
+
+
+def _thread_group(name: str) -> str:
+    """Pool threads share a flamegraph root: "embed_0", "embed_1" -> "embed" """
+    return re.sub(r"[-_]\d+$", "", name) or name
+
+
+class Profiler:
+    """
+    Context manager profiling the enclosed block
+    
+    Args:
+        run_id: Directory under PROFILE_DIR the reports go to
+        label: File name prefix (a run can hold several profiles)
+        mode: "sampling" or "deterministic" (default PROFILE_MODE; the
+            latter only profiles the calling thread)
+        interval: Seconds between stack samples (default PROFILE_INTERVAL)
+    """
+    
+    def __init__(self, run_id: str, label: str = "profile", mode: Optional[str] = None,
+                 interval: Optional[float] = None):
+        self.mode = mode or settings.PROFILE_MODE
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown profiling mode: {self.mode}")
+        self.run_id = run_id
+        self.label = label
+        self.interval = interval or settings.PROFILE_INTERVAL
+        self.path = Path(settings.PROFILE_DIR) / run_id
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.summary: Dict = {}
+        self._frames: Dict[object, str] = {}
+        self._sites: Dict[str, tuple] = {}  # frame label -> (file, function name)
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._owns_tracemalloc = False
+        self._started = 0.0
+    
+    def __enter__(self) -> "Profiler":
+        if settings.PROFILE_TRACEMALLOC_FRAMES > 0:
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start(settings.PROFILE_TRACEMALLOC_FRAMES)
+                self._owns_tracemalloc = True
+        self._sampler = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self._started = time.perf_counter()
+        self._sampler.start()
+        if self.mode == "deterministic":
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        return self
+    
+    def __exit__(self, *exc):
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        self._stop.set()
+        self._sampler.join()
+        seconds = time.perf_counter() - self._started
+        snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        peak = tracemalloc.get_traced_memory()[1] if snapshot is not None else 0
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+        try:
+            self._write(seconds, snapshot, peak)
+        except OSError as e:
+            logger.warning(f"Could not write profile {self.run_id}/{self.label}: {e}")
+        return False
+    
+    # Sampling
+    
+    def _frame(self, code) -> str:
+        label = self._frames.get(code)
+        if label is None:
+            name = getattr(code, "co_qualname", code.co_name)
+            where = _where(code.co_filename)
+            label = f"{name} ({where}:{code.co_firstlineno})"
+            self._frames[code] = label
+            self._sites[label] = (where, code.co_name)
+        return label
+    
+    def _sample(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                stack = [_thread_group(names.get(ident, str(ident)))]
+                stack.extend(self._frame(code) for code in reversed(codes))
+                self.stacks[tuple(stack)] += 1
+            self.samples += 1
+    
+    # Reports
+    
+    def _write(self, seconds: float, snapshot: Optional[tracemalloc.Snapshot], peak: int):
+        self.path.mkdir(parents=True, exist_ok=True)
+        files = {}
+        
+        collapsed = self.path / f"{self.label}.collapsed"
+        with open(collapsed, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{';'.join(stack)} {count}\n")
+        files["collapsed"] = str(collapsed)
+        
+        top = self.path / f"{self.label}.top.txt"
+        top.write_text(self._top_report(seconds))
+        files["top"] = str(top)
+        
+        if snapshot is not None:
+            allocations = self.path / f"{self.label}.alloc.txt"
+            allocations.write_text(self._allocation_report(snapshot, peak))
+            files["allocations"] = str(allocations)
+        
+        if self._cprofile is not None:
+            stats = self.path / f"{self.label}.pstats"
+            self._cprofile.dump_stats(stats)
+            files["pstats"] = str(stats)
+        
+        self.summary = {
+            "run_id": self.run_id,
+            "label": self.label,
+            "mode": self.mode,
+            "seconds": round(seconds, 3),
+            "samples": self.samples,
+            "peak_mb": round(peak / 1e6, 2),
+            "files": files,
+        }
+        logger.info(f"Profile {self.run_id}/{self.label}: {self.samples} samples over {seconds:.1f}s, "
+                    f"peak {peak / 1e6:.1f} MB traced, written to {self.path}")
+    
+    def _top_report(self, seconds: float) -> str:
+        self_samples, total_samples, packages = Counter(), Counter(), Counter()
+        idle = 0
+        for stack, count in self.stacks.items():
+            leaf = stack[-1]
+            if len(stack) == 1:
+                idle += count
+                continue
+            where, name = self._sites[leaf]
+            if (where.rsplit("/", 1)[-1], name) in _IDLE:
+                idle += count
+                continue
+            self_samples[leaf] += count
+            packages[_package(where)] += count
+            for frame in set(stack[1:]):
+                total_samples[frame] += count
+        busy = sum(self_samples.values())
+        n = settings.PROFILE_TOP
+        
+        def table(title: str, counts: Counter) -> list:
+            lines = [title, f"{'samples':>8} {'share':>6}  frame"]
+            for frame, count in counts.most_common(n):
+                lines.append(f"{count:>8} {count / busy:>6.1%}  {frame}")
+            return lines + [""]
+        
+        lines = [
+            f"Profile {self.run_id}/{self.label} ({self.mode})",
+            f"{seconds:.2f}s, {self.samples} sampling ticks every {self.interval * 1000:g} ms; "
+            f"{busy} busy and {idle} idle thread samples",
+            "",
+        ]
+        if busy:
+            lines += table("Self samples by package", packages)
+            lines += table("Self samples by function", self_samples)
+            lines += table("Total samples by function (on stack)", total_samples)
+        return "\n".join(lines)
+    
+    def _allocation_report(self, snapshot: tracemalloc.Snapshot, peak: int) -> str:
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+        by_line = snapshot.statistics("lineno")
+        n = settings.PROFILE_TOP
+        lines = [
+            f"Allocations {self.run_id}/{self.label}",
+            f"peak traced {peak / 1e6:.2f} MB; still allocated at the end "
+            f"{sum(stat.size for stat in by_line) / 1e6:.2f} MB in {sum(stat.count for stat in by_line)} blocks",
+            "",
+            "Top allocation sites (line)",
+        ]
+        for stat in by_line[:n]:
+            frame = stat.traceback[0]
+            lines.append(f"{stat.size / 1024:>10.1f} KiB {stat.count:>8} blocks  "
+                         f"{_where(frame.filename)}:{frame.lineno}")
+        lines += ["", "Top allocation tracebacks"]
+        for stat in snapshot.statistics("traceback")[:max(n // 3, 1)]:
+            lines.append(f"{stat.size / 1024:.1f} KiB in {stat.count} blocks")
+            lines.extend(f"    {_where(frame.filename)}:{frame.lineno}" for frame in stat.traceback)
+        return "\n".join(lines) + "\n"
+
+
+def new_run_id(kind: str) -> str:
+    """ID for a profile that is not tied to a pipeline run, e.g. qa-20240101-120000-1a2b3c"""
+    return f"{kind}-{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
@@ -0,0 +1,35 @@
+"""
+Shared fixtures
+
+Tests run offline: the encoder is benchmarks.corpus.HashingEncoder, and every
+store (vector index, SQLite, checkpoints) lives under pytest's tmp_path.
+"""
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from benchmarks.corpus import HashingEncoder
+from src.database.models import Base
+
+
+@pytest.fixture
+def encoder():
+    return HashingEncoder()
+
+
+@pytest.fixture
+def unit_vectors():
+    """unit_vectors(n, dim=32, seed=0) -> float32 rows of L2 norm 1"""
+    def make(n: int, dim: int = 32, seed: int = 0) -> np.ndarray:
+        matrix = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+        return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+    return make
+
+
+@pytest.fixture
+def sessions(tmp_path):
+    """Session factory for a fresh SQLite database with every table"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
@@ -0,0 +1,80 @@
+"""
+RunCheckpoint and StageLog: resuming a run, including after a crash mid-append
+"""
+import json
+import os
+import pytest
+from src.pipeline.checkpoint import RunCheckpoint, StageLog, gc_runs
+
+
+def test_stage_log_round_trip(tmp_path):
+    log = StageLog(tmp_path / "stage.log")
+    log.append([("a", 1), ("b", {"x": [1.0, 2.0]})])
+    log.append([("a", 3)])
+    log.append([])
+    
+    reopened = StageLog(tmp_path / "stage.log")
+    assert len(reopened) == 2
+    assert "b" in reopened and "c" not in reopened
+    assert reopened.get("a") == 3
+    assert reopened.get("b") == {"x": [1.0, 2.0]}
+    assert reopened.get("c", "missing") == "missing"
+
+
+@pytest.mark.parametrize("cut", [1, 2, 20, -1])
+def test_stage_log_resumes_after_torn_append(tmp_path, cut):
+    path = tmp_path / "stage.log"
+    log = StageLog(path)
+    log.append([("a", 1), ("b", 2)])
+    complete = path.stat().st_size
+    log.append([("c", [0.5] * 64)])
+    # A crash part-way through the last write; cut < 0 counts from the end of the record
+    os.truncate(path, complete + cut if cut > 0 else path.stat().st_size + cut)
+    
+    resumed = StageLog(path)
+    assert dict(resumed.items()) == {"a": 1, "b": 2}
+    assert path.stat().st_size == complete
+    # Records appended after the torn one are read back
+    resumed.append([("c", 3), ("d", 4)])
+    assert dict(StageLog(path).items()) == {"a": 1, "b": 2, "c": 3, "d": 4}
+
+
+def test_run_checkpoint_resume(tmp_path):
+    checkpoint = RunCheckpoint("run-1", root=tmp_path)
+    assert not checkpoint.resumed
+    checkpoint.raw.append([("arxiv", ["paper"])])
+    checkpoint.summaries.append([("2401.00001v1", "summary")])
+    checkpoint.mark_complete("rank")
+    
+    resumed = RunCheckpoint("run-1", root=tmp_path)
+    assert resumed.resumed
+    assert resumed.is_complete("rank") and not resumed.is_complete("store")
+    assert resumed.raw.get("arxiv") == ["paper"]
+    assert resumed.summaries.get("2401.00001v1") == "summary"
+    
+    resumed.reset()
+    assert not resumed.resumed
+    assert not RunCheckpoint("run-1", root=tmp_path).resumed
+
+
+def test_failed_stages_leave_the_run_unfinished(tmp_path):
+    checkpoint = RunCheckpoint("run-1", root=tmp_path)
+    checkpoint.finish([{"stage": "summarize", "errors": 1}], failed_stages=["summarize"])
+    
+    meta = json.loads((checkpoint.path / "run.json").read_text())
+    assert meta["status"] == "failed" and meta["failed_stages"] == ["summarize"]
+    assert not RunCheckpoint("run-1", root=tmp_path).finished
+    
+    checkpoint.finish([{"stage": "summarize", "errors": 0}])
+    assert RunCheckpoint("run-1", root=tmp_path).finished
+
+
+def test_gc_runs_keeps_recent_and_excluded(tmp_path):
+    for i, run_id in enumerate(["old-1", "old-2", "new"]):
+        RunCheckpoint(run_id, root=tmp_path)
+        os.utime(tmp_path / run_id, (i, i) if run_id != "new" else None)
+    
+    deleted = gc_runs(tmp_path, keep_last=1, max_age_days=1, exclude=("old-2",))
+    
+    assert deleted == ["old-1"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["new", "old-2"]
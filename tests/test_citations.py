@@ -0,0 +1,98 @@
+"""
+CitationEnricher: fresh entries from the cache, missing ones fetched in bulk,
+stale ones served as cached and refreshed in the background
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+from src.collectors.citations import CitationEnricher, base_id
+from src.collectors.records import PaperData
+from src.database.models import CitationCount, Paper
+
+
+class FakeProvider:
+    """Answers from a dict and records every batch it was asked about"""
+    
+    def __init__(self, counts: Dict[str, int], fail: bool = False):
+        self.counts = counts
+        self.fail = fail
+        self.calls: List[List[str]] = []
+    
+    def fetch(self, arxiv_ids: List[str]) -> Dict[str, int]:
+        self.calls.append(list(arxiv_ids))
+        if self.fail:
+            raise OSError("provider down")
+        return {arxiv_id: self.counts[arxiv_id] for arxiv_id in arxiv_ids if arxiv_id in self.counts}
+
+
+def _cached(sessions) -> Dict[str, CitationCount]:
+    with sessions() as db:
+        return {row.arxiv_id: row for row in db.query(CitationCount)}
+
+
+def test_base_id_strips_the_version():
+    assert base_id("2401.01234v12") == "2401.01234"
+    assert base_id("2401.01234") == "2401.01234"
+
+
+def test_missing_ids_are_fetched_in_batches_and_cached(sessions):
+    provider = FakeProvider({"2401.00001": 7, "2401.00002": 0, "2401.00004": 3})
+    enricher = CitationEnricher(provider, session_factory=sessions, batch_size=2)
+    
+    counts = enricher.lookup(["2401.00001v2", "2401.00002v1", "2401.00003v1", "2401.00004", "2401.00001v2"])
+    
+    assert counts == {"2401.00001v2": 7, "2401.00002v1": 0, "2401.00003v1": 0, "2401.00004": 3}
+    assert provider.calls == [["2401.00001", "2401.00002"], ["2401.00003", "2401.00004"]]
+    cached = _cached(sessions)
+    assert set(cached) == {"2401.00001", "2401.00002", "2401.00003", "2401.00004"}
+    assert cached["2401.00002"].found and not cached["2401.00003"].found
+
+
+def test_fresh_entries_do_not_reach_the_provider(sessions):
+    provider = FakeProvider({"2401.00001": 7})
+    enricher = CitationEnricher(provider, session_factory=sessions)
+    enricher.lookup(["2401.00001v1", "2401.00009v1"])
+    provider.calls.clear()
+    
+    assert enricher.lookup(["2401.00001v3", "2401.00009v1"]) == {"2401.00001v3": 7, "2401.00009v1": 0}
+    enricher.close(timeout=5)
+    assert provider.calls == []
+
+
+def test_stale_entries_are_served_then_refreshed(sessions):
+    fetched = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=48)
+    with sessions() as db:
+        db.add(CitationCount(arxiv_id="2401.00001", citation_count=2, found=True, fetched_date=fetched))
+        db.add(Paper(arxiv_id="2401.00001v2", title="Stored", citation_count=2))
+        db.commit()
+    provider = FakeProvider({"2401.00001": 40})
+    enricher = CitationEnricher(provider, session_factory=sessions, ttl_hours=24)
+    
+    assert enricher.lookup(["2401.00001v2"]) == {"2401.00001v2": 2}
+    enricher.close(timeout=5)
+    
+    assert provider.calls == [["2401.00001"]]
+    row = _cached(sessions)["2401.00001"]
+    assert row.citation_count == 40 and row.fetched_date > fetched
+    with sessions() as db:
+        assert db.query(Paper).one().citation_count == 40
+    assert enricher.lookup(["2401.00001v2"]) == {"2401.00001v2": 40}
+
+
+def test_provider_failure_maps_to_zero_and_is_retried(sessions):
+    provider = FakeProvider({"2401.00001": 5}, fail=True)
+    enricher = CitationEnricher(provider, session_factory=sessions)
+    
+    assert enricher.lookup(["2401.00001v1"]) == {"2401.00001v1": 0}
+    assert _cached(sessions) == {}
+    
+    provider.fail = False
+    assert enricher.lookup(["2401.00001v1"]) == {"2401.00001v1": 5}
+    assert len(provider.calls) == 2
+
+
+def test_enrich_sets_counts_in_place(sessions):
+    papers = [PaperData(f"2401.0000{i}v1", f"Paper {i}", [], "", [], None, "", "") for i in range(1, 4)]
+    enricher = CitationEnricher(FakeProvider({"2401.00001": 4, "2401.00003": 1}), session_factory=sessions)
+    
+    assert enricher.enrich(papers) == 2
+    assert [paper.citation_count for paper in papers] == [4, 0, 1]
@@ -0,0 +1,84 @@
+"""
+NearDuplicateDetector: MinHash estimates, LSH thresholds and clustering against history
+"""
+from types import SimpleNamespace
+import pytest
+from src.models.dedup import MinHasher, NearDuplicateDetector
+
+
+def _text(words: range, prefix: str = "w") -> str:
+    return " ".join(f"{prefix}{i}" for i in words)
+
+
+def _article(url: str, content: str, title: str = "Title") -> SimpleNamespace:
+    return SimpleNamespace(url=url, title=title, content=content, source="test")
+
+
+def _true_jaccard(hasher: MinHasher, a: str, b: str) -> float:
+    shingles_a, shingles_b = set(hasher.shingles(a).tolist()), set(hasher.shingles(b).tolist())
+    return len(shingles_a & shingles_b) / len(shingles_a | shingles_b)
+
+
+@pytest.mark.parametrize("shared", [0, 100, 200, 300])
+def test_minhash_estimates_jaccard(shared):
+    hasher = MinHasher(num_perm=256)
+    a = _text(range(300))
+    b = _text(range(300 - shared, 600 - shared))
+    
+    estimate = MinHasher.jaccard(hasher.signature(a), hasher.signature(b))
+    
+    assert estimate == pytest.approx(_true_jaccard(hasher, a, b), abs=0.1)
+
+
+def test_near_copy_is_a_duplicate_and_unrelated_text_is_not():
+    detector = NearDuplicateDetector(num_perm=128, bands=16, threshold=0.7, shingle_size=3)
+    original = _text(range(300))
+    near_copy = original.replace("w150 ", "v150 ")
+    
+    representatives, duplicates = detector.deduplicate([
+        _article("https://a/original", original),
+        _article("https://b/copy", near_copy),
+        _article("https://c/other", _text(range(300), prefix="x")),
+    ])
+    
+    assert {a.url for a in representatives} == {"https://a/original", "https://c/other"}
+    assert [a.url for a in duplicates["https://a/original"]] == ["https://b/copy"]
+
+
+def test_threshold_decides_partial_overlap():
+    # About half the shingles shared; 64 bands of 2 rows make the pair an LSH candidate
+    a, b = _text(range(300)), _text(range(100, 400))
+    for threshold, expected_representatives in ((0.7, 2), (0.4, 1)):
+        detector = NearDuplicateDetector(num_perm=128, bands=64, threshold=threshold, shingle_size=3)
+        representatives, _ = detector.deduplicate([_article("https://a", a), _article("https://b", b)])
+        assert len(representatives) == expected_representatives
+
+
+def test_longest_copy_represents_the_cluster():
+    detector = NearDuplicateDetector(threshold=0.5)
+    short = _article("https://short", _text(range(200)))
+    long = _article("https://long", _text(range(200)) + " w200 w201")
+    
+    representatives, duplicates = detector.deduplicate([short, long])
+    
+    assert representatives == [long]
+    assert duplicates == {"https://long": [short]}
+
+
+def test_history_is_saved_and_matched_in_a_later_run(sessions):
+    first = NearDuplicateDetector()
+    first.deduplicate([_article("https://stored", _text(range(300)))])
+    db = sessions()
+    first.save(db)
+    
+    later = NearDuplicateDetector()
+    assert later.load_history(db) == 1
+    representatives, duplicates = later.deduplicate([
+        _article("https://stored", _text(range(300))),
+        _article("https://syndicated", _text(range(300)).replace("w10 ", "v10 ")),
+    ])
+    later.save(db)
+    db.close()
+    
+    assert representatives == []
+    assert sorted(a.url for a in duplicates["https://stored"]) == ["https://stored", "https://syndicated"]
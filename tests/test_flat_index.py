@@ -0,0 +1,133 @@
+"""
+FlatCollection: Chroma-compatible writes, exact queries, compaction and quantized rescoring
+"""
+import numpy as np
+import pytest
+from src.models.flat_index import FlatClient, FlatCollection
+
+
+def _collection(tmp_path, quantization="none", rescore_factor=4) -> FlatCollection:
+    return FlatCollection(tmp_path / "items", "items", quantization=quantization, rescore_factor=rescore_factor)
+
+
+def _fill(collection: FlatCollection, vectors: np.ndarray):
+    collection.add(
+        ids=[f"item_{i}" for i in range(len(vectors))],
+        embeddings=vectors,
+        documents=[f"document {i}" for i in range(len(vectors))],
+        metadatas=[{"type": "paper" if i % 2 else "article", "published_ts": 1000 + i} for i in range(len(vectors))]
+    )
+
+
+def _exact_top_k(vectors: np.ndarray, query: np.ndarray, k: int) -> list:
+    return [f"item_{i}" for i in np.argsort(-(vectors @ query), kind="stable")[:k]]
+
+
+def test_add_and_get(tmp_path, unit_vectors):
+    collection = _collection(tmp_path)
+    vectors = unit_vectors(10)
+    _fill(collection, vectors)
+    
+    assert collection.count() == 10
+    got = collection.get(ids=["item_3", "missing", "item_1"], include=["documents", "metadatas", "embeddings"])
+    assert got["ids"] == ["item_3", "item_1"]
+    assert got["documents"] == ["document 3", "document 1"]
+    assert got["metadatas"][0] == {"type": "paper", "published_ts": 1003}
+    np.testing.assert_allclose(got["embeddings"][0], vectors[3], atol=1e-6)
+    assert collection.get(limit=4, offset=8, include=[])["ids"] == ["item_8", "item_9"]
+    with pytest.raises(ValueError):
+        collection.add(ids=["item_0"], embeddings=vectors[:1])
+
+
+def test_upsert_replaces_items(tmp_path, unit_vectors):
+    collection = _collection(tmp_path)
+    vectors = unit_vectors(10)
+    _fill(collection, vectors)
+    
+    collection.upsert(ids=["item_2", "item_new"], embeddings=vectors[[5, 6]] * 3.0,
+                      documents=["replaced", "new"], metadatas=[{"type": "paper"}, {}])
+    
+    assert collection.count() == 11
+    got = collection.get(ids=["item_2"], include=["documents", "embeddings"])
+    assert got["documents"] == ["replaced"]
+    # Stored normalized, like a cosine-space collection
+    np.testing.assert_allclose(got["embeddings"][0], vectors[5], atol=1e-6)
+
+
+def test_query_is_exact_and_filtered(tmp_path, unit_vectors):
+    collection = _collection(tmp_path)
+    vectors = unit_vectors(200, seed=1)
+    _fill(collection, vectors)
+    query = vectors[17]
+    
+    result = collection.query(query_embeddings=[query], n_results=5)
+    assert result["ids"][0] == _exact_top_k(vectors, query, 5)
+    assert result["ids"][0][0] == "item_17"
+    assert result["distances"][0][0] == pytest.approx(0.0, abs=1e-5)
+    assert result["documents"][0][0] == "document 17"
+    
+    papers = collection.query(query_embeddings=[query], n_results=5,
+                              where={"$and": [{"type": "paper"}, {"published_ts": {"$gte": 1100}}]})
+    assert papers["ids"][0]
+    for metadata in papers["metadatas"][0]:
+        assert metadata["type"] == "paper" and metadata["published_ts"] >= 1100
+
+
+def test_delete_and_compact(tmp_path, unit_vectors):
+    collection = _collection(tmp_path)
+    vectors = unit_vectors(50, seed=2)
+    _fill(collection, vectors)
+    deleted = [f"item_{i}" for i in range(0, 50, 3)]
+    collection.delete(ids=deleted)
+    query = vectors[4]
+    before = collection.query(query_embeddings=[query], n_results=10)
+    
+    collection.compact()
+    
+    assert collection.count() == 50 - len(deleted)
+    assert not collection.get(ids=deleted)["ids"]
+    assert collection.query(query_embeddings=[query], n_results=10)["ids"] == before["ids"]
+    assert not set(before["ids"][0]) & set(deleted)
+    # A second handle on the directory sees the compacted generation
+    assert FlatCollection(tmp_path / "items", "items").count() == 50 - len(deleted)
+
+
+@pytest.mark.parametrize("quantization", ["float16", "int8"])
+def test_quantized_query_rescores_to_exact_results(tmp_path, unit_vectors, quantization):
+    collection = _collection(tmp_path, quantization=quantization, rescore_factor=8)
+    vectors = unit_vectors(2000, dim=64, seed=3)
+    _fill(collection, vectors)
+    queries = unit_vectors(20, dim=64, seed=4)
+    
+    result = collection.query(query_embeddings=queries, n_results=5)
+    
+    for query, ids, distances in zip(queries, result["ids"], result["distances"]):
+        assert ids == _exact_top_k(vectors, query, 5)
+        # Distances come from the float32 rows, not the codes
+        expected = 1.0 - vectors[[int(i.split("_")[1]) for i in ids]] @ query
+        np.testing.assert_allclose(distances, expected, atol=1e-5)
+
+
+def test_compact_converts_quantization(tmp_path, unit_vectors):
+    collection = _collection(tmp_path)
+    vectors = unit_vectors(500, dim=64, seed=5)
+    _fill(collection, vectors)
+    query = unit_vectors(1, dim=64, seed=6)[0]
+    
+    collection.compact(quantization="int8")
+    
+    assert collection.quantization == "int8"
+    assert (collection.path / f"gen-{collection._generation}" / "codes.i8").stat().st_size == 500 * 64
+    assert collection.query(query_embeddings=[query], n_results=5)["ids"][0] == _exact_top_k(vectors, query, 5)
+
+
+def test_client_lists_and_deletes_collections(tmp_path, unit_vectors):
+    client = FlatClient(tmp_path)
+    client.get_or_create_collection("a").add(ids=["x"], embeddings=unit_vectors(1))
+    client.get_or_create_collection("b")
+    
+    assert [c.name for c in client.list_collections()] == ["a", "b"]
+    client.delete_collection("a")
+    assert [c.name for c in client.list_collections()] == ["b"]
+    with pytest.raises(ValueError):
+        client.get_collection("a")
@@ -0,0 +1,85 @@
+"""
+Reconciler: orphaned vectors are deleted, rows without a vector are indexed
+"""
+from datetime import datetime, timedelta
+import pytest
+from src.database.models import Article, Paper
+from src.models.embeddings import EmbeddingManager
+from src.models.reconcile import Reconciler
+
+
+@pytest.fixture
+def stores(tmp_path, encoder, sessions):
+    """
+    8 articles and 4 papers over two months; the index lacks articles 1 and 5
+    and paper p3, and holds vectors (one with chunks) for rows that were deleted
+    """
+    manager = EmbeddingManager(persist_dir=tmp_path / "vdb", collection_name="kb", model=encoder)
+    now = datetime.now()
+    db = sessions()
+    articles = [Article(source="devto", source_id=str(i), title=f"Article {i}", url=f"https://example.com/{i}",
+                        content=f"body {i}", published_date=now - timedelta(days=35 * (i % 2))) for i in range(8)]
+    papers = [Paper(arxiv_id=f"p{i}", title=f"Paper {i}", authors="A, B", abstract=f"abstract {i}",
+                    arxiv_url=f"https://arxiv.org/abs/p{i}", published_date=now) for i in range(4)]
+    db.add_all(articles + papers)
+    db.commit()
+    
+    indexed = [row for row in articles if row.source_id not in ("1", "5")]
+    manager.add_items("article", [str(row.id) for row in indexed], [row.title for row in indexed],
+                      [{} for _ in indexed], [row.published_date for row in indexed])
+    manager.add_items("paper", ["p0", "p1", "p2"], ["Paper 0", "Paper 1", "Paper 2"], [{}, {}, {}], [now] * 3)
+    # Indexed in another month than its row says: found in the fallback lookup, not missing
+    manager.add_items("paper", ["p3"], ["Paper 3"], [{}], [now - timedelta(days=70)])
+    manager.add_items("article", ["9001", "9002"], ["gone", "gone too"], [{}, {}], [now, now])
+    manager.add_items("paper", ["gone"], ["gone paper"], [{}], [now])
+    manager.add_chunks("article", "9003", ["chunk a", "chunk b", "chunk c"], {}, published_date=now)
+    missing = {str(row.id) for row in articles if row.source_id in ("1", "5")}
+    db.close()
+    return manager, missing
+
+
+def _vector_ids(manager: EmbeddingManager) -> set:
+    return {item_id for kind in ("paper", "article") for collection in manager.type_collections(kind)
+            if collection is not None for item_id in collection.get(include=[])["ids"]}
+
+
+def test_dry_run_counts_without_changing_the_index(stores, sessions):
+    manager, _ = stores
+    before = _vector_ids(manager)
+    
+    report = Reconciler(manager, sessions, batch_size=3, dry_run=True).run()
+    
+    assert report["dry_run"] is True
+    assert report["orphaned_vectors"] == 6
+    assert report["article"] == {"rows": 8, "missing_vectors": 2}
+    assert report["paper"] == {"rows": 4, "missing_vectors": 0}
+    assert _vector_ids(manager) == before
+
+
+def test_repair_deletes_orphans_and_indexes_missing_rows(stores, sessions):
+    manager, missing = stores
+    
+    report = Reconciler(manager, sessions, batch_size=3).run()
+    
+    assert report["orphaned_vectors"] == 6
+    ids = _vector_ids(manager)
+    assert {f"article_{key}" for key in missing} <= ids
+    assert not {item_id for item_id in ids if "900" in item_id or item_id == "paper_gone"}
+    assert len(ids) == 8 + 4
+    
+    again = Reconciler(manager, sessions, batch_size=3, dry_run=True).run()
+    assert again["orphaned_vectors"] == 0
+    assert again["article"]["missing_vectors"] == again["paper"]["missing_vectors"] == 0
+    assert again["vectors_scanned"] == 12
+
+
+def test_indexed_rows_are_searchable(stores, sessions):
+    manager, missing = stores
+    Reconciler(manager, sessions).run()
+    
+    with sessions() as db:
+        row = db.get(Article, int(sorted(missing)[0]))
+        query, url = f"{row.title} {row.content}", row.url
+    hit = manager.search(query, n_results=1, filter_type="article")[0]
+    assert hit["id"] == f"article_{sorted(missing)[0]}"
+    assert hit["metadata"]["url"] == url
@@ -0,0 +1,85 @@
+"""
+RecordBatch: column-encoded records written to disk and replayed
+"""
+import pickle
+from datetime import datetime, timezone
+import pytest
+from src.collectors.records import ArticleData, PaperData, RecordBatch
+
+
+def _papers():
+    return [
+        PaperData("2401.00001v1", "Attention, again", ["Ada Lovelace", "Alan Turing"], "An abstract.",
+                  ["cs.LG", "cs.CL"], datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+                  "https://arxiv.org/abs/2401.00001v1", "https://arxiv.org/pdf/2401.00001v1", 42),
+        PaperData("2401.00002v2", "Ünïcode ✓ and emoji 🚀", [], "", [], datetime(1969, 12, 31, 23, 59, 59),
+                  "https://arxiv.org/abs/2401.00002v2", "", 0),
+    ]
+
+
+def _articles():
+    return [
+        ArticleData("hackernews", "1", "Show HN", "https://example.com/1", "Body text", "pg",
+                    datetime(2024, 5, 6, 7, 8, 9), 120),
+        ArticleData("devto", "2", "No author", "https://example.com/2", None),
+    ]
+
+
+@pytest.mark.parametrize("records", [_papers(), _articles()], ids=["papers", "articles"])
+def test_round_trip_through_a_file(tmp_path, records):
+    path = RecordBatch.from_records(records).write(tmp_path / "batch.rec")
+    
+    with RecordBatch.open(path) as batch:
+        assert batch.kind == ("paper" if isinstance(records[0], PaperData) else "article")
+        assert len(batch) == len(records)
+        assert list(batch) == records
+        assert batch[-1] == records[-1]
+        with pytest.raises(IndexError):
+            batch[len(records)]
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_datetimes_keep_their_timezone_flag(tmp_path):
+    records = _papers() + [PaperData("x", "t", [], "", [], None, "", "")]
+    with RecordBatch.open(RecordBatch.from_records(records).write(tmp_path / "papers.rec")) as batch:
+        dates = batch.column("published_date")
+    
+    assert dates[0] == records[0].published_date and dates[0].tzinfo == timezone.utc
+    assert dates[1] == datetime(1969, 12, 31, 23, 59, 59) and dates[1].tzinfo is None
+    assert dates[2] is None
+
+
+def test_in_memory_batch_and_columns():
+    batch = RecordBatch.from_records(_articles())
+    
+    assert batch.column("author") == ["pg", None]
+    assert batch.column("upvotes") == [120, 0]
+    assert batch[1].content is None
+
+
+def test_empty_and_mixed_batches(tmp_path):
+    with pytest.raises(ValueError):
+        RecordBatch.from_records([])
+    with pytest.raises(TypeError):
+        RecordBatch.from_records(_papers() + _articles())
+    
+    path = RecordBatch.from_records([], kind="article").write(tmp_path / "empty.rec")
+    with RecordBatch.open(path) as batch:
+        assert batch.kind == "article" and list(batch) == []
+
+
+def test_open_rejects_other_files(tmp_path):
+    for name, data in (("short.rec", b"RE"), ("other.rec", b"NOTABATCHFILE" * 4)):
+        (tmp_path / name).write_bytes(data)
+        with pytest.raises(ValueError):
+            RecordBatch.open(tmp_path / name)
+
+
+def test_records_unpickle_from_slotted_and_dict_state():
+    paper = _papers()[0]
+    assert pickle.loads(pickle.dumps(paper)) == paper
+    
+    # Checkpoints written before the records had slots carry a plain __dict__
+    restored = PaperData.__new__(PaperData)
+    restored.__setstate__(({name: getattr(paper, name) for name in PaperData.__slots__}, None))
+    assert restored == paper
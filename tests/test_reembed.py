@@ -0,0 +1,130 @@
+"""
+ReembedJob: resume from the saved cursor, catch up, cut over, drop the old version
+"""
+from datetime import datetime, timedelta
+import pytest
+from benchmarks.corpus import HashingEncoder
+from src.models.embeddings import EmbeddingManager
+from src.models.reembed import ReembedJob
+
+
+class CountingEncoder(HashingEncoder):
+    """Counts the texts it encodes"""
+    
+    def __init__(self):
+        super().__init__()
+        self.encoded = 0
+    
+    def encode(self, texts, show_progress_bar: bool = False, **kwargs):
+        self.encoded += 1 if isinstance(texts, str) else len(texts)
+        return super().encode(texts, show_progress_bar=show_progress_bar, **kwargs)
+
+
+class Interrupted(Exception):
+    pass
+
+
+class FlakyJob(ReembedJob):
+    """Dies after a number of progress saves, like a killed process"""
+    
+    saves_left = 3
+    
+    def _report(self, progress, force=False):
+        super()._report(progress, force)
+        FlakyJob.saves_left -= 1
+        if FlakyJob.saves_left == 0:
+            raise Interrupted()
+
+
+N_ITEMS = 30
+
+
+@pytest.fixture
+def index(tmp_path, encoder):
+    """Writer on the initial version with N_ITEMS articles spread over two months"""
+    writer = EmbeddingManager(persist_dir=tmp_path, collection_name="kb", model=encoder)
+    now = datetime.now()
+    for i in range(N_ITEMS):
+        writer.add_article(str(i), f"Article {i}", f"topic{i} body words {i % 7}", {},
+                           published_date=now - timedelta(days=40 * (i % 2)))
+    return writer
+
+
+def _job(tmp_path, model) -> ReembedJob:
+    return ReembedJob(model_name="hash-v2", model=model, persist_dir=tmp_path, collection_name="kb", batch_size=4)
+
+
+def _ids(manager: EmbeddingManager) -> set:
+    return {item_id for collection in manager.type_collections("article")
+            for item_id in collection.get(include=[])["ids"]}
+
+
+def test_interrupted_job_resumes_without_reencoding(tmp_path, index):
+    model = CountingEncoder()
+    FlakyJob.saves_left = 3
+    with pytest.raises(Interrupted):
+        FlakyJob(model_name="hash-v2", model=model, persist_dir=tmp_path, collection_name="kb", batch_size=4).run()
+    
+    progress = index.versions.migration()
+    assert progress["phase"] == "copy" and progress["scanned"] == 12
+    assert model.encoded == 12
+    assert index.versions.active("hash-v2").name == "kb"
+    
+    result = _job(tmp_path, model).run()
+    assert result["embedded"] == N_ITEMS
+    assert model.encoded == N_ITEMS
+    assert index.versions.active("hash-v2").name == result["name"]
+    assert index.versions.migration() is None
+
+
+def test_cutover_carries_writes_made_during_the_copy(tmp_path, index):
+    FlakyJob.saves_left = 2
+    with pytest.raises(Interrupted):
+        FlakyJob(model_name="hash-v2", model=HashingEncoder(), persist_dir=tmp_path, collection_name="kb",
+                 batch_size=4).run()
+    # The pipeline keeps writing to the active version meanwhile
+    index.add_article("late", "Late arrival", "quantum gravity snails", {}, published_date=datetime.now())
+    for collection in index.type_collections("article"):
+        collection.delete(ids=["article_0"])
+    
+    reader = EmbeddingManager(persist_dir=tmp_path, collection_name="kb", model=HashingEncoder())
+    job = _job(tmp_path, HashingEncoder())
+    job.run()
+    
+    assert reader.search("anything", n_results=1) and reader.collection_name == job.version.name
+    assert _ids(reader) == _ids(index)
+    assert "article_late" in _ids(reader) and "article_0" not in _ids(reader)
+    assert reader.search("quantum gravity snails", n_results=1)[0]["id"] == "article_late"
+
+
+def test_run_is_a_no_op_once_cut_over(tmp_path, index):
+    model = CountingEncoder()
+    _job(tmp_path, model).run()
+    encoded = model.encoded
+    
+    status = _job(tmp_path, model).run()
+    assert status["active"]["model"] == "hash-v2"
+    assert model.encoded == encoded
+
+
+def test_drop_previous_copies_only_late_additions(tmp_path, index):
+    job = _job(tmp_path, HashingEncoder())
+    job.run()
+    active = EmbeddingManager(persist_dir=tmp_path, collection_name="kb", model=HashingEncoder())
+    active.search("anything", n_results=1)
+    # Changed after cutover, in the active version only: must stick
+    for collection in active.type_collections("article"):
+        collection.delete(ids=["article_1"])
+    # A writer started before the cutover still writes to the old version
+    index.add_article("fresh", "Fresh", "octopus chess", {}, published_date=datetime.now() + timedelta(minutes=1))
+    index.add_article("old", "Old", "backdated item", {}, published_date=datetime.now() - timedelta(days=3))
+    
+    assert job.drop_previous() == 2
+    
+    names = {collection.name for collection in job.client.list_collections()}
+    assert names and all(name.startswith(job.version.name) for name in names)
+    ids = _ids(EmbeddingManager(persist_dir=tmp_path, collection_name="kb", model=HashingEncoder()))
+    assert "article_fresh" in ids
+    assert "article_old" not in ids and "article_1" not in ids
+    assert job.registry.previous() is None and job.registry.migration() is None
+    assert job.drop_previous() == 0